@@ -1,20 +1,39 @@
-class Candle:
-	def __init__(self, open_time, open, high, low, close, volume, close_time) -> None:
-		self.open_time = open_time
-		self.open = open
-		self.high = high
-		self.low = low
-		self.close = close
-		self.volume = volume
-		self.close_time = close_time
+import numpy as np
+
+# One candle per row: timestamps in milliseconds, prices and volume as floats
+CANDLE_DTYPE = np.dtype([
+	("open_time", np.int64),
+	("open", np.float64),
+	("high", np.float64),
+	("low", np.float64),
+	("close", np.float64),
+	("volume", np.float64),
+	("close_time", np.int64),
+])
+CANDLE_COLUMNS = {column: CANDLE_DTYPE[column] for column in CANDLE_DTYPE.names}
+
+
+def convert_klines_to_candles(klines: list) -> np.ndarray:
+	"""
+	Turn raw Binance kline rows (prices come as strings) into a candle batch in one go,
+	column by column from one 2D array of the rows, without a Python tuple per candle
+	"""
+	candles = np.empty(len(klines), dtype=CANDLE_DTYPE)
+	if not klines:
+		return candles
+	rows = np.asarray(klines, dtype=object)
+	for column_index, (column, dtype) in enumerate(CANDLE_COLUMNS.items()):
+		candles[column] = rows[:, column_index].astype(dtype)
+	return candles
+
+
+def concatenate_candles(candles_list: list) -> np.ndarray:
+	"""
+	Glue candle batches together in time order, keeping one candle per open time
+	"""
+	if not candles_list:
+		return np.empty(0, dtype=CANDLE_DTYPE)
+	candles = np.concatenate(candles_list)
+	_, unique_indexes = np.unique(candles["open_time"], return_index=True)
+	return candles[unique_indexes]
 
-	def __repr__(self) -> str:
-		return (
-			f"open_time:{str(self.open_time)}"
-			f", open:{str(self.open)}"
-			f", high:{str(self.high)}"
-			f", low:{str(self.low)}"
-			f", close:{str(self.close)}"
-			f", volume:{str(self.volume)}"
-			f", close_time:{str(self.close_time)}"
-		)
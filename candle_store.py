@@ -0,0 +1,102 @@
+import os
+import threading
+import numpy as np
+from candle import CANDLE_COLUMNS, convert_klines_to_candles
+from config import CANDLE_STORE_DIRECTORY
+
+candle_stores = {}
+candle_stores_lock = threading.Lock()
+
+
+class CandleStore:
+	"""
+	Candle history of one (symbol, timeframe) kept on disk, one memory-mapped file per column
+	Candles are only ever appended, so a restart reuses everything downloaded so far
+	Appends map a new columns dict and swap it in with one assignment, so a reader that takes self.columns once
+	always sees columns of the same length without waiting for the lock
+	"""
+
+	def __init__(self, contract_symbol: str, timeframe: str, directory: str = CANDLE_STORE_DIRECTORY) -> None:
+		self.contract_symbol = contract_symbol
+		self.timeframe = timeframe
+		self.path = os.path.join(directory, f"{contract_symbol}_{timeframe}")
+		self.lock = threading.Lock()
+		self.columns = {}
+		os.makedirs(self.path, exist_ok=True)
+		self.map_columns()
+
+	def __len__(self) -> int:
+		return len(self.columns["open_time"])
+
+	def get_column_filename(self, column: str) -> str:
+		return os.path.join(self.path, column + ".bin")
+
+	def map_columns(self) -> None:
+		for column in CANDLE_COLUMNS:
+			open(self.get_column_filename(column), "ab").close()
+		# An interrupted append may leave some columns one candle longer than the others
+		columns = {}
+		length = min(os.path.getsize(self.get_column_filename(column)) // dtype.itemsize
+					 for column, dtype in CANDLE_COLUMNS.items())
+		for column, dtype in CANDLE_COLUMNS.items():
+			filename = self.get_column_filename(column)
+			if os.path.getsize(filename) != length * dtype.itemsize:
+				os.truncate(filename, length * dtype.itemsize)
+			if length == 0:
+				columns[column] = np.empty(0, dtype=dtype)
+			else:
+				columns[column] = np.memmap(filename, dtype=dtype, mode="r", shape=(length,))
+		self.columns = columns
+
+	def last_open_time(self) -> int:
+		open_times = self.columns["open_time"]
+		return int(open_times[-1]) if len(open_times) else -1
+
+	def last_close_time(self) -> int:
+		close_times = self.columns["close_time"]
+		return int(close_times[-1]) if len(close_times) else -1
+
+	def append(self, columns: dict, closed_before: int = None) -> int:
+		"""
+		Append candles (a candle batch or one array per column) that are newer than the last stored one
+		and closed before closed_before (ms)
+		Returns how many candles were added
+		"""
+		with self.lock:
+			new_candles = columns["open_time"] > self.last_open_time()
+			if closed_before is not None:
+				new_candles &= columns["close_time"] < closed_before
+			new_candles_count = int(np.count_nonzero(new_candles))
+			if new_candles_count == 0:
+				return 0
+			for column, dtype in CANDLE_COLUMNS.items():
+				with open(self.get_column_filename(column), "ab") as handle:
+					handle.write(np.ascontiguousarray(columns[column][new_candles], dtype=dtype).tobytes())
+			self.map_columns()
+			return new_candles_count
+
+	def append_klines(self, klines: list, closed_before: int = None) -> int:
+		if not klines:
+			return 0
+		return self.append(convert_klines_to_candles(klines), closed_before)
+
+	def tail(self, candles_count: int) -> dict:
+		columns = self.columns
+		first_index = max(len(columns["open_time"]) - candles_count, 0)
+		return {column: values[first_index:] for column, values in columns.items()}
+
+	def since(self, open_time: int) -> dict:
+		"""
+		All stored candles that opened after open_time (ms)
+		"""
+		columns = self.columns
+		first_index = int(np.searchsorted(columns["open_time"], open_time, side="right"))
+		return {column: values[first_index:] for column, values in columns.items()}
+
+
+def get_candle_store(contract_symbol: str, timeframe: str) -> CandleStore:
+	with candle_stores_lock:
+		key = (contract_symbol, timeframe)
+		if key not in candle_stores:
+			candle_stores[key] = CandleStore(contract_symbol, timeframe)
+		return candle_stores[key]
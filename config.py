@@ -7,16 +7,50 @@ WALLET_USAGE_PERCENT = 50.0  # How much of your money to use (50% means use half
 # Game Settings
 STRATEGIES_COUNT = 5  # How many different ways to trade (like having 5 different game strategies)
 MAXIMUM_NUMBER_OF_API_CALL_TRIES = 5  # How many times to try if something fails
-SLEEP_INTERVAL = 0.25  # How often to check prices (like checking the score every quarter second)
+SLEEP_INTERVAL = 0.25  # How long to wait before trying again after something went wrong
 
 # File Names for Saving Game Progress
 INDICATORS_DICT_FILENAME = "indicators_dict.pkl"  # Where to save trading information
 ORDERS_DICT_FILENAME = "orders_dict.pkl"  # Where to save your orders
+INDICATOR_STATE_DIRECTORY = "indicator_state"  # Where every pair keeps its own indicators, one small file each
+EXCHANGE_INFO_FILENAME = "exchange_info.json"  # Where to keep the rules of every coin (smallest price step, smallest amount, ...)
+CANDLE_STORE_DIRECTORY = "candle_store"  # Where to keep all downloaded candles between restarts
 
 # Time Settings
 ONE_MINUTE_IN_MILLISECONDS = 60 * 1000  # How long is one minute in computer time
 MAXIMUM_KLINE_CANDLES_PER_REQUEST = 1000  # How many price points to get at once
-HANDLING_POSITIONS_TIME_SECOND = 10  # When to check for new trades (like checking every 10 seconds)
+MAXIMUM_KLINE_DOWNLOAD_WORKERS = 8  # How many pages of price points to download at the same time
+MAXIMUM_PAIR_UPDATE_WORKERS = 8  # How many pairs can work out their indicators at the same time
+HANDLING_POSITIONS_TIME_SECOND = 10  # How many seconds after a candle closes to check for new trades (Binance needs a moment to finish the candle)
+EXTRA_OPEN_ORDERS_CHECK_INTERVAL_SECONDS = 5 * 60  # How often to cancel a take profit or stop loss whose partner is already gone
+GUI_REFRESH_INTERVAL_MILLISECONDS = 1000  # How often the window shows new prices, positions and log lines
+STATUS_MARKET_DATA_INTERVAL_SECONDS = 2  # How often the engine asks for the BTC price and the open positions the window shows
+CLOCK_SYNC_INTERVAL_SECONDS = 60  # How often to ask Binance what time it is (in between we keep time ourselves)
+CLOCK_SAMPLES_COUNT = 16  # How many of those answers to remember when working out our clock error
+CLOCK_INITIAL_SAMPLES_COUNT = 4  # How many times to ask right at the start
+CLOCK_MINIMUM_DRIFT_BASELINE_SECONDS = 5 * 60  # How far apart those answers must be before we believe our clock runs fast or slow
+CLOCK_MAXIMUM_DRIFT_PPM = 500  # How fast or slow (millionths of a second per second) a working clock can possibly run
+OPEN_ORDERS_SNAPSHOT_MAXIMUM_AGE_SECONDS = 30  # How long the list of open orders fetched once per round can be trusted
+USE_USER_DATA_STREAM = True  # Let Binance tell us about fills, positions and balance changes instead of asking again and again
+LISTEN_KEY_KEEPALIVE_INTERVAL_SECONDS = 30 * 60  # How often to tell Binance we are still listening (it forgets us after 60 minutes)
+USER_DATA_RESYNC_INTERVAL_SECONDS = 2 * 60 * 60  # How often to double check our copy of the account with Binance anyway
+ACCOUNT_BOOK_MAXIMUM_CLOSED_ORDERS = 500  # How many finished orders to remember
+FILL_CONFIRMATION_TIMEOUT_SECONDS = 10  # How long to wait for a market order to be filled before giving up on its TP/SL
+FILL_POLL_INITIAL_INTERVAL_SECONDS = 0.05  # First wait before asking again if the order is filled (it doubles every time)
+FILL_POLL_MAXIMUM_INTERVAL_SECONDS = 1  # Longest wait between two of those questions
+MAXIMUM_ORDER_FILL_WORKERS = 4  # How many new positions can wait for their fill at the same time
+EXCHANGE_INFO_TTL_SECONDS = 24 * 60 * 60  # How long those rules are trusted before asking Binance again
+USE_KLINE_STREAM = True  # Let Binance tell us the moment a candle closes instead of checking the clock all the time
+MAXIMUM_KLINE_BACKFILL_WORKERS = 4  # How many pairs can download the candles the stream missed at the same time
+KLINE_STREAM_TIMEOUT_SECONDS = 60  # How long past a candle close to wait for it from Binance before downloading it ourselves
+RESAMPLE_FROM_M1 = True  # Build bigger candles (15m, 1h, 4h, ...) from 1 minute candles instead of downloading each size
+
+# Speed Limits (Binance stops answering, or even bans us for a while, if we ask too much)
+RATE_LIMIT_WEIGHT_PER_MINUTE = 2400  # How much request weight Binance allows every minute
+RATE_LIMIT_ORDERS_PER_10_SECONDS = 300  # How many orders Binance allows every 10 seconds
+COALESCED_READ_TTL_SECONDS = 1.0  # How long the same question (prices, positions, balance) gets the same answer without asking again
+RATE_LIMIT_BACKOFF_SECONDS = 1  # First pause after Binance says we asked too much (it doubles every time)
+RATE_LIMIT_MAXIMUM_BACKOFF_SECONDS = 120  # Longest of those pauses
 
 # Game Status Codes
 ERROR = -1  # Something went wrong
@@ -29,6 +63,8 @@ CONTRACT_SYMBOL = SECOND_COIN_SYMBOL + FIRST_COIN_SYMBOL  # The full name of wha
 
 # Timeframe Settings (like choosing how often to check the game)
 TIMEFRAME = "h1"    # Choose from: "m1" (1 minute), "m3" (3 minutes), "m15" (15 minutes), "h1" (1 hour), "h2" (2 hours), "h4" (4 hours), "d1" (1 day)
+TIMEFRAME_INTERVALS = {"m1": "1m", "m3": "3m", "m15": "15m", "h1": "1h", "h2": "2h", "h4": "4h", "d1": "1d"}  # Binance names for each timeframe
+TIMEFRAME_MINUTES = {"m1": 1, "m3": 3, "m15": 15, "h1": 60, "h2": 120, "h4": 240, "d1": 1440}  # How many minutes are in one candle
 
 # How much to win or lose before stopping
 TAKE_PROFIT_PERCENTS = [2, 3, 1.5, 2, 1.5]  # How much profit to take for each strategy
@@ -44,11 +80,23 @@ PRICE_DIRECTION_INDICATOR_NAME_1 = "ema_20"  # First line to watch (fast line)
 PRICE_DIRECTION_INDICATOR_NAME_2 = "ema_50"  # Second line to watch (slow line)
 
 # Other Settings
+LOG_BUFFER_CAPACITY = 1000  # How many log lines to keep in memory for the window (the log file keeps all of them)
+GUI_LOG_TABLE_MAXIMUM_ROWS = 500  # How many log lines the window shows before dropping the oldest ones
 NEW_CLIENT_ORDER_ID_PREFIX = "aRandomString"  # Just a name for your orders
 LAST_ACCOUNT_BALANCES_LIST_MAX_LENGTH = 12  # How many past balances to remember
 IMPORTANT_CANDLES_COUNT = 100  # How many past prices to look at
 SEND_TELEGRAM_MESSAGE = False  # Whether to send messages to your phone
 HEDGE_MODE = True  # Whether to allow both up and down trades at the same time
 
+# Headless Settings (running the bot without the window, e.g. on a server)
+HEADLESS_CONFIG_FILENAME = "headless_config.json"  # Which pairs and strategies to trade without the window
+STATUS_SERVER_HOST = "127.0.0.1"  # Where to answer "how is the bot doing?" (only this computer can ask)
+STATUS_SERVER_PORT = 8765  # Which door to answer on (0 means don't answer at all)
+ENGINE_CONFIG_FILENAME = "engine_config.json"  # Pairs and strategies the window hands to the trading engine when you press Start
+ENGINE_IPC_HOST = "127.0.0.1"  # Where the trading engine tells the window how it is doing
+ENGINE_IPC_PORT = 8766  # Which door the engine and the window talk through (0 means the engine doesn't talk)
+ENGINE_IPC_KEY_FILENAME = "engine_ipc.key"  # Where the engine keeps the password the window needs to listen to it (a new one every start)
+ENGINE_STATUS_PUBLISH_INTERVAL_SECONDS = 1  # How often the engine sends the window its balances and log lines
+
 # API Settings
 API_BASE_URL = "https://fapi.binance.com"  # Binance Futures API endpoint
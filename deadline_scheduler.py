@@ -0,0 +1,94 @@
+import heapq
+import itertools
+import logging
+import threading
+from time import time
+
+
+def get_next_deadline(interval: float, offset: float, after: float) -> float:
+	"""
+	First moment after `after` that is offset seconds past a multiple of interval (candles close on such multiples)
+	"""
+	return ((after - offset) // interval + 1) * interval + offset
+
+
+class DeadlineScheduler:
+	"""
+	Runs periodic jobs at exact moments, e.g. 10 seconds after every h1 candle close, from a heap of deadlines
+	The thread sleeps until the earliest deadline instead of checking the clock again and again
+	When a job is late (the computer slept, a job took long) it is run once for all the deadlines it missed,
+	with the number of missed ones, instead of being skipped or run many times in a row
+	now returns the time in seconds, e.g. the estimated server time, so the deadlines follow the exchange clock
+	"""
+
+	def __init__(self, now=time) -> None:
+		self.now = now
+		self.condition = threading.Condition()
+		self.deadlines = []
+		self.jobs = {}
+		self.job_counter = itertools.count()
+		self.stop_event = threading.Event()
+		self.thread = None
+
+	def add_periodic_job(self, key, interval: float, callback, offset: float = 0) -> None:
+		"""
+		Call callback(deadline, missed_deadlines_count) offset seconds after every multiple of interval,
+		replacing the job already scheduled under key
+		"""
+		with self.condition:
+			job_id = next(self.job_counter)
+			self.jobs[key] = (job_id, interval, offset, callback)
+			heapq.heappush(self.deadlines, (get_next_deadline(interval, offset, self.now()), job_id, key))
+			self.condition.notify_all()
+
+	def remove_job(self, key) -> None:
+		with self.condition:
+			# Its deadline stays in the heap and is dropped when it comes up
+			self.jobs.pop(key, None)
+
+	def start(self) -> None:
+		self.thread = threading.Thread(target=self.run, name="deadline_scheduler", daemon=True)
+		self.thread.start()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		with self.condition:
+			self.condition.notify_all()
+
+	def run(self) -> None:
+		while not self.stop_event.is_set():
+			for key, deadline, missed_deadlines_count, callback in self.wait_for_due_jobs():
+				if missed_deadlines_count:
+					logging.warning(f"WARNING in DeadlineScheduler: {key} is late, catching up {missed_deadlines_count} missed deadline(s)")
+				try:
+					callback(deadline, missed_deadlines_count)
+				except Exception as e:
+					logging.error(f"ERROR in DeadlineScheduler job {key}: {e}")
+
+	def wait_for_due_jobs(self) -> list:
+		"""
+		Sleep until the earliest deadline, then take every job that is due and schedule its next deadline
+		"""
+		with self.condition:
+			while not self.stop_event.is_set():
+				while self.deadlines and self.jobs.get(self.deadlines[0][2], (None,))[0] != self.deadlines[0][1]:
+					heapq.heappop(self.deadlines)
+				now = self.now()
+				if self.deadlines and self.deadlines[0][0] <= now:
+					break
+				self.condition.wait(self.deadlines[0][0] - now if self.deadlines else None)
+			else:
+				return []
+			due_jobs = []
+			while self.deadlines and self.deadlines[0][0] <= now:
+				deadline, job_id, key = heapq.heappop(self.deadlines)
+				job = self.jobs.get(key)
+				if job is None or job[0] != job_id:
+					continue
+				_, interval, offset, callback = job
+				next_deadline = get_next_deadline(interval, offset, now)
+				# The latest deadline that has passed, and how many before it were never run
+				latest_deadline = next_deadline - interval
+				due_jobs.append((key, latest_deadline, round((latest_deadline - deadline) / interval), callback))
+				heapq.heappush(self.deadlines, (next_deadline, job_id, key))
+			return due_jobs
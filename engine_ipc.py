@@ -0,0 +1,235 @@
+import json
+import logging
+import os
+import secrets
+import subprocess
+import sys
+import threading
+from collections import deque
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from config import (ENGINE_IPC_HOST, ENGINE_IPC_PORT, ENGINE_IPC_KEY_FILENAME, ENGINE_STATUS_PUBLISH_INTERVAL_SECONDS,
+					LOG_BUFFER_CAPACITY)
+
+ENGINE_STOP_COMMAND = "stop"
+
+
+def get_engine_address(port: int = ENGINE_IPC_PORT) -> tuple:
+	return (ENGINE_IPC_HOST, port)
+
+
+def create_engine_key(filename: str = ENGINE_IPC_KEY_FILENAME) -> bytes:
+	"""
+	A new random password for this engine, in a file only this user can read, which is where the window finds it
+	"""
+	engine_key = secrets.token_hex(32)
+	if os.path.exists(filename):
+		# An existing file keeps its permissions, so it is made again
+		os.remove(filename)
+	with os.fdopen(os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as handle:
+		handle.write(engine_key)
+	return engine_key.encode()
+
+
+def read_engine_key(filename: str = ENGINE_IPC_KEY_FILENAME) -> bytes:
+	with open(filename, "r") as handle:
+		return handle.read().strip().encode()
+
+
+def send_message(connection, message) -> None:
+	# JSON rather than the pickles Connection.send uses, so a message can never run code
+	connection.send_bytes(json.dumps(message).encode())
+
+
+def receive_message(connection):
+	return json.loads(connection.recv_bytes())
+
+
+def start_engine_process(config_filename: str) -> subprocess.Popen:
+	"""
+	Run headless.py as a process of its own, which keeps trading even if the window that started it crashes
+	"""
+	bot_directory = os.path.dirname(os.path.abspath(__file__))
+	if os.name == "nt":
+		detach_arguments = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+	else:
+		detach_arguments = {"start_new_session": True}
+	return subprocess.Popen(
+		[sys.executable, os.path.join(bot_directory, "headless.py"), "--config", config_filename],
+		cwd=bot_directory,
+		**detach_arguments
+	)
+
+
+class EngineStatusPublisher:
+	"""
+	Engine side of the window <-> engine channel, a multiprocessing Listener on localhost that only lets in
+	who knows the password written to key_filename, and talks JSON
+	Every interval each subscriber gets {"status": get_status(), "log_rows": the log lines it has not seen yet}
+	(a new subscriber first gets everything still in the log buffer)
+	A subscriber may send ENGINE_STOP_COMMAND, on_stop() is called then
+	"""
+
+	def __init__(
+		self,
+		get_status,
+		log_buffer_handler,
+		on_stop=None,
+		address: tuple = None,
+		key_filename: str = ENGINE_IPC_KEY_FILENAME,
+		interval: float = ENGINE_STATUS_PUBLISH_INTERVAL_SECONDS
+	) -> None:
+		self.get_status = get_status
+		self.log_buffer_handler = log_buffer_handler
+		self.on_stop = on_stop
+		self.address = address or get_engine_address()
+		self.key_filename = key_filename
+		self.interval = interval
+		self.lock = threading.Lock()
+		self.connections = {}
+		self.stop_event = threading.Event()
+		self.listener = None
+
+	def start(self) -> None:
+		self.listener = Listener(self.address, authkey=create_engine_key(self.key_filename))
+		threading.Thread(target=self.run_accept_loop, name="engine_ipc_accept", daemon=True).start()
+		threading.Thread(target=self.run_publish_loop, name="engine_ipc_publish", daemon=True).start()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		self.listener.close()
+		with self.lock:
+			connections, self.connections = list(self.connections), {}
+		for connection in connections:
+			connection.close()
+
+	def run_accept_loop(self) -> None:
+		while not self.stop_event.is_set():
+			try:
+				connection = self.listener.accept()
+			except AuthenticationError as e:
+				logging.warning(f"WARNING in EngineStatusPublisher.run_accept_loop: {e}")
+				continue
+			except OSError:
+				# The listener was closed
+				return
+			with self.lock:
+				self.connections[connection] = 0
+			threading.Thread(target=self.run_command_loop, args=(connection,), name="engine_ipc_commands", daemon=True).start()
+
+	def run_command_loop(self, connection) -> None:
+		try:
+			while True:
+				if receive_message(connection) == ENGINE_STOP_COMMAND and self.on_stop is not None:
+					self.on_stop()
+		except (EOFError, OSError, ValueError):
+			self.remove_connection(connection)
+
+	def remove_connection(self, connection) -> None:
+		with self.lock:
+			self.connections.pop(connection, None)
+		connection.close()
+
+	def run_publish_loop(self) -> None:
+		while not self.stop_event.wait(self.interval):
+			self.publish()
+
+	def publish(self) -> None:
+		with self.lock:
+			connections = list(self.connections.items())
+		if not connections:
+			return
+		try:
+			status = self.get_status()
+		except Exception as e:
+			logging.error(f"ERROR in EngineStatusPublisher.publish: {e}")
+			return
+		for connection, log_sequence in connections:
+			log_rows, log_sequence = self.log_buffer_handler.get_rows_since(log_sequence)
+			try:
+				send_message(connection, {"status": status, "log_rows": log_rows})
+			except (OSError, ValueError):
+				self.remove_connection(connection)
+				continue
+			with self.lock:
+				if connection in self.connections:
+					self.connections[connection] = log_sequence
+
+
+class EngineStatusSubscriber:
+	"""
+	Window side of the channel: keeps the latest engine status and collects its log lines
+	Connects whenever an engine is listening, so a restarted window finds an engine that kept running
+	(the password is read again for every try, every engine start makes a new one)
+	"""
+
+	def __init__(self, address: tuple = None, key_filename: str = ENGINE_IPC_KEY_FILENAME, retry_interval: float = 1) -> None:
+		self.address = address or get_engine_address()
+		self.key_filename = key_filename
+		self.retry_interval = retry_interval
+		self.lock = threading.Lock()
+		self.connection = None
+		self.latest_status = None
+		self.log_rows = deque(maxlen=LOG_BUFFER_CAPACITY)
+		self.stop_event = threading.Event()
+
+	def start(self) -> None:
+		threading.Thread(target=self.run_receive_loop, name="engine_ipc_subscriber", daemon=True).start()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		with self.lock:
+			connection = self.connection
+		if connection is not None:
+			connection.close()
+
+	def run_receive_loop(self) -> None:
+		while not self.stop_event.is_set():
+			try:
+				connection = Client(self.address, authkey=read_engine_key(self.key_filename))
+			except (OSError, AuthenticationError):
+				# No engine running (yet)
+				self.stop_event.wait(self.retry_interval)
+				continue
+			with self.lock:
+				self.connection = connection
+			try:
+				while not self.stop_event.is_set():
+					message = receive_message(connection)
+					with self.lock:
+						self.latest_status = message["status"]
+						self.log_rows.extend(tuple(log_row) for log_row in message["log_rows"])
+			except (EOFError, OSError, ValueError):
+				pass
+			with self.lock:
+				self.connection = None
+				self.latest_status = None
+			connection.close()
+
+	def is_connected(self) -> bool:
+		with self.lock:
+			return self.connection is not None
+
+	def get_latest_status(self) -> dict:
+		"""
+		The last status the engine sent, None while no engine is connected
+		"""
+		with self.lock:
+			return self.latest_status
+
+	def take_log_rows(self) -> tuple:
+		with self.lock:
+			log_rows = tuple(self.log_rows)
+			self.log_rows.clear()
+		return log_rows
+
+	def send_stop(self) -> bool:
+		with self.lock:
+			connection = self.connection
+		if connection is None:
+			return False
+		try:
+			send_message(connection, ENGINE_STOP_COMMAND)
+		except (OSError, ValueError):
+			return False
+		return True
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from time import time
+from config import EXCHANGE_INFO_FILENAME, EXCHANGE_INFO_TTL_SECONDS, PRICE_DECIMAL_DIGITS, POSITION_QUANTITY_DECIMAL_DIGITS
+from utils import round_down
+
+EXCHANGE_INFO_RETRY_INTERVAL_SECONDS = 60
+
+
+def format_number(value: float) -> str:
+	"""
+	Plain decimal text for order parameters sent as strings (str() would give 1e-05 for small numbers)
+	"""
+	return format(Decimal(str(value)).normalize(), "f")
+
+
+def convert_exchange_info_to_symbols_info(exchange_info: dict, leverage_brackets: list) -> dict:
+	"""
+	Keep only what the bot needs from exchangeInfo (and the leverage brackets) for every symbol
+	"""
+	max_leverages = {
+		symbol_brackets["symbol"]: max(int(bracket["initialLeverage"]) for bracket in symbol_brackets["brackets"])
+		for symbol_brackets in leverage_brackets
+	}
+	symbols_info = {}
+	for symbol in exchange_info["symbols"]:
+		filters = {symbol_filter["filterType"]: symbol_filter for symbol_filter in symbol["filters"]}
+		symbols_info[symbol["symbol"]] = {
+			"tick_size": filters["PRICE_FILTER"]["tickSize"],
+			"step_size": filters["LOT_SIZE"]["stepSize"],
+			"min_quantity": filters["LOT_SIZE"]["minQty"],
+			"min_notional": filters.get("MIN_NOTIONAL", {}).get("notional", "0"),
+			"max_leverage": max_leverages.get(symbol["symbol"]),
+		}
+	return symbols_info
+
+
+class ExchangeInfoCache:
+	"""
+	Tick size, step size, minimum notional and maximum leverage of every symbol
+	Everything is loaded with one exchangeInfo call (plus one leverage brackets call) and kept in a JSON file,
+	so a restart within EXCHANGE_INFO_TTL_SECONDS needs no request at all
+	Symbols it does not know fall back to PRICE_DECIMAL_DIGITS and POSITION_QUANTITY_DECIMAL_DIGITS
+	A refresh is single flight and runs outside the lock: one caller fetches, the others keep using the expired
+	metadata meanwhile (or wait for it when there is none yet)
+	The file is only read by the first refresh, after that the copy in memory is at least as new
+	"""
+
+	def __init__(
+		self,
+		fetch_exchange_info,
+		fetch_leverage_brackets=None,
+		filename: str = EXCHANGE_INFO_FILENAME,
+		ttl: float = EXCHANGE_INFO_TTL_SECONDS
+	) -> None:
+		self.fetch_exchange_info = fetch_exchange_info
+		self.fetch_leverage_brackets = fetch_leverage_brackets
+		self.filename = filename
+		self.ttl = ttl
+		self.lock = threading.Lock()
+		self.symbols_info = None
+		self.saved_at = 0
+		self.failed_at = None
+		self.refresh_future = None
+		self.is_file_read = False
+
+	def load_from_file(self) -> bool:
+		try:
+			with open(self.filename, "r") as handle:
+				cache = json.load(handle)
+		except (FileNotFoundError, ValueError):
+			return False
+		if time() - cache["saved_at"] > self.ttl:
+			return False
+		with self.lock:
+			self.symbols_info, self.saved_at = cache["symbols"], cache["saved_at"]
+		return True
+
+	def refresh(self) -> bool:
+		try:
+			leverage_brackets = []
+			if self.fetch_leverage_brackets is not None:
+				try:
+					leverage_brackets = self.fetch_leverage_brackets()
+				except Exception as e:
+					logging.warning(f"WARNING in ExchangeInfoCache.refresh (no maximum leverages): {e}")
+			symbols_info = convert_exchange_info_to_symbols_info(self.fetch_exchange_info(), leverage_brackets)
+		except Exception as e:
+			logging.error(f"ERROR in ExchangeInfoCache.refresh: {e}")
+			with self.lock:
+				self.failed_at = time()
+			return False
+		saved_at = time()
+		with self.lock:
+			self.symbols_info, self.saved_at, self.failed_at = symbols_info, saved_at, None
+		temporary_filename = self.filename + ".tmp"
+		with open(temporary_filename, "w") as handle:
+			json.dump({"saved_at": saved_at, "symbols": symbols_info}, handle)
+		os.replace(temporary_filename, self.filename)
+		return True
+
+	def get_symbol_info(self, contract_symbol: str) -> dict:
+		with self.lock:
+			refresh_future = None
+			is_leader = False
+			if self.symbols_info is None or time() - self.saved_at > self.ttl:
+				refresh_future = self.refresh_future
+				# Without the metadata the fallbacks are used, and Binance is not asked again for a while
+				if refresh_future is None and (self.failed_at is None or time() - self.failed_at > EXCHANGE_INFO_RETRY_INTERVAL_SECONDS):
+					is_leader = True
+					refresh_future = self.refresh_future = Future()
+					is_file_read, self.is_file_read = self.is_file_read, True
+			symbols_info = self.symbols_info
+		if is_leader:
+			try:
+				if is_file_read or not self.load_from_file():
+					self.refresh()
+			finally:
+				with self.lock:
+					self.refresh_future = None
+				refresh_future.set_result(None)
+			symbols_info = self.symbols_info
+		elif refresh_future is not None and symbols_info is None:
+			refresh_future.result()
+			symbols_info = self.symbols_info
+		return (symbols_info or {}).get(contract_symbol)
+
+	def round_price(self, contract_symbol: str, price: float) -> float:
+		symbol_info = self.get_symbol_info(contract_symbol)
+		if symbol_info is None:
+			return round(price, PRICE_DECIMAL_DIGITS)
+		tick_size = Decimal(symbol_info["tick_size"])
+		return float((Decimal(str(price)) / tick_size).to_integral_value(ROUND_HALF_UP) * tick_size)
+
+	def round_quantity_down(self, contract_symbol: str, quantity: float) -> float:
+		symbol_info = self.get_symbol_info(contract_symbol)
+		if symbol_info is None:
+			return round_down(quantity, POSITION_QUANTITY_DECIMAL_DIGITS)
+		step_size = Decimal(symbol_info["step_size"])
+		return float((Decimal(str(quantity)) / step_size).to_integral_value(ROUND_DOWN) * step_size)
+
+	def is_order_too_small(self, contract_symbol: str, quantity: float, price: float) -> bool:
+		symbol_info = self.get_symbol_info(contract_symbol)
+		if symbol_info is None:
+			return quantity < 10 ** (-POSITION_QUANTITY_DECIMAL_DIGITS)
+		return quantity < float(symbol_info["min_quantity"]) or quantity * price < float(symbol_info["min_notional"])
+
+	def get_max_leverage(self, contract_symbol: str) -> int:
+		symbol_info = self.get_symbol_info(contract_symbol)
+		return symbol_info["max_leverage"] if symbol_info is not None else None
@@ -2,7 +2,7 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                           QHBoxLayout, QLabel, QPushButton, QTableWidget, 
+                           QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableView,
                            QTableWidgetItem, QGroupBox, QGridLayout, QSpinBox,
                            QDoubleSpinBox, QComboBox, QCheckBox, QMessageBox,
                            QFormLayout, QLineEdit, QListWidget, QScrollArea,
@@ -10,12 +10,29 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QPalette, QColor
 import sys
+import json
 import logging
 from datetime import datetime
 from config import *
 from main import *
 from PyQt5.QtWidgets import QAction
 from PyQt5.QtCore import QSettings
+from gui_data_worker import GuiDataWorker
+from gui_table_models import PositionsTableModel, LogTableModel
+from engine_ipc import EngineStatusSubscriber, start_engine_process
+
+# What the timeframe boxes show, and the timeframe the bot uses for it
+TIMEFRAME_LABELS = {
+    "1 Minute": "m1",
+    "3 Minutes": "m3",
+    "15 Minutes": "m15",
+    "1 Hour": "h1",
+    "2 Hours": "h2",
+    "4 Hours": "h4",
+    "1 Day": "d1"
+}
+# A strategy with this timeframe trades on the one from the general settings
+GENERAL_TIMEFRAME_LABEL = "Same as General"
 
 # Define color scheme
 COLORS = {
@@ -170,6 +187,11 @@ class StrategySettingsWidget(QWidget):
         self.sl_spin.setStyleSheet(spinbox_style)
         layout.addRow(self.create_label("Stop Loss (%):"), self.sl_spin)
         
+        # Strategies can trade on a timeframe of their own, next to the others
+        self.timeframe_combo = QComboBox()
+        self.timeframe_combo.addItems([GENERAL_TIMEFRAME_LABEL, *TIMEFRAME_LABELS])
+        layout.addRow(self.create_label("Timeframe:"), self.timeframe_combo)
+        
         # Strategy specific settings
         if strategy_id in [0, 1]:  # Price Movement Strategies
             self.add_ema_settings(layout, spinbox_style)
@@ -847,7 +869,7 @@ API_SECRET = "{self.api_secret}"
         
         # Timeframe Selection
         self.timeframe_combo = QComboBox()
-        self.timeframe_combo.addItems(["1 Minute", "3 Minutes", "15 Minutes", "1 Hour", "2 Hours", "4 Hours", "1 Day"])
+        self.timeframe_combo.addItems(list(TIMEFRAME_LABELS))
         self.timeframe_combo.setCurrentText("3 Minutes")
         self.timeframe_combo.setStyleSheet(widget_style)
         
@@ -911,19 +933,19 @@ API_SECRET = "{self.api_secret}"
         """)
         positions_layout = QVBoxLayout()
         
-        self.positions_table = QTableWidget()
-        self.positions_table.setColumnCount(6)
-        self.positions_table.setHorizontalHeaderLabels([
-            "Strategy ID", "Symbol", "Side", "Amount", "Entry Price", "PNL"
-        ])
+        # Only open positions are in the model, and only changed cells are repainted
+        self.positions_model = PositionsTableModel()
+        self.positions_table = QTableView()
+        self.positions_table.setModel(self.positions_model)
+        self.positions_model.rowsInserted.connect(self.positions_table.resizeColumnsToContents)
         self.positions_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 gridline-color: #E0E0E0;
                 border: 1px solid #E0E0E0;
                 border-radius: 4px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
             QHeaderView::section {
@@ -937,7 +959,7 @@ API_SECRET = "{self.api_secret}"
         """)
         
         # Set table properties
-        self.positions_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.positions_table.setEditTriggers(QTableView.NoEditTriggers)
         self.positions_table.horizontalHeader().setStretchLastSection(True)
         self.positions_table.verticalHeader().setVisible(False)
         
@@ -961,19 +983,18 @@ API_SECRET = "{self.api_secret}"
         """)
         log_layout = QVBoxLayout()
         
-        self.log_table = QTableWidget()
-        self.log_table.setColumnCount(4)
-        self.log_table.setHorizontalHeaderLabels([
-            "Time", "Level", "Symbol", "Message"
-        ])
+        # Log lines come from the in-memory log buffer, a few new ones at a time
+        self.log_model = LogTableModel()
+        self.log_table = QTableView()
+        self.log_table.setModel(self.log_model)
         self.log_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: white;
                 gridline-color: #E0E0E0;
                 border: 1px solid #E0E0E0;
                 border-radius: 4px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
             QHeaderView::section {
@@ -987,7 +1008,7 @@ API_SECRET = "{self.api_secret}"
         """)
         
         # Set table properties
-        self.log_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.log_table.setEditTriggers(QTableView.NoEditTriggers)
         self.log_table.horizontalHeader().setStretchLastSection(True)
         self.log_table.verticalHeader().setVisible(False)
         
@@ -998,13 +1019,18 @@ API_SECRET = "{self.api_secret}"
         main_layout.addLayout(tables_layout)
         
     def setup_timer(self):
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_gui)
-        self.update_timer.start(1000)
+        # The trading engine runs as its own process and publishes its state, the window only listens
+        self.engine_subscriber = EngineStatusSubscriber()
+        self.engine_subscriber.start()
+        self.engine_process = None
+        
+        # What the engine publishes is formatted on its own thread, the window only shows the results
+        self.gui_data_worker = GuiDataWorker(self.engine_subscriber)
+        self.gui_data_worker.snapshot_ready.connect(self.update_gui)
+        self.gui_data_worker.start()
         
         # Initialize bot state
         self.is_bot_running = False
-        self.trading_thread = None
 
     def create_label(self, text):
         label = QLabel(text)
@@ -1012,19 +1038,21 @@ API_SECRET = "{self.api_secret}"
         return label
 
     def start_bot(self):
+        # Not an error to clean up after, the engine that is running must keep running
+        if self.engine_subscriber.is_connected():
+            QMessageBox.warning(self, "Warning", "The trading engine is already running")
+            return
+        
         try:
             # Get selected trading pairs
             selected_pairs = [item.text() for item in self.pairs_list.selectedItems()]
             if not selected_pairs:
                 raise ValueError("Please select at least one trading pair")
             
-            # Update config with GUI values
-            global LEVERAGE, HEDGE_MODE, TIMEFRAME
-            
             # Basic settings
-            LEVERAGE = self.leverage_spin.value()
-            HEDGE_MODE = self.hedge_mode_check.isChecked()
-            TIMEFRAME = self.timeframe_combo.currentText()
+            leverage = self.leverage_spin.value()
+            hedge_mode = self.hedge_mode_check.isChecked()
+            timeframe = TIMEFRAME_LABELS[self.timeframe_combo.currentText()]
             
             # Collect strategy settings
             strategy_settings = []
@@ -1035,6 +1063,8 @@ API_SECRET = "{self.api_secret}"
                         "tp_percent": widget.tp_spin.value(),
                         "sl_percent": widget.sl_spin.value()
                     }
+                    if widget.timeframe_combo.currentText() != GENERAL_TIMEFRAME_LABEL:
+                        settings["timeframe"] = TIMEFRAME_LABELS[widget.timeframe_combo.currentText()]
                     
                     # Add strategy-specific settings
                     if i in [0, 1]:  # Price Movement Strategies
@@ -1060,39 +1090,29 @@ API_SECRET = "{self.api_secret}"
             if not strategy_settings:
                 raise ValueError("Please enable at least one strategy")
             
-            # Initialize indicators dictionary if needed
-            try:
-                load_indicators_dict()
-            except:
-                indicators_dict = {
-                    "candle_open_timestamp": 0,
-                    "candle_close_timestamp": 0,
-                    "candle_close_price": 0,
-                    "close_prices": []
-                }
-                save_indicators_dict()
-            
             # Start the bot
             self.is_bot_running = True
             self.bot_status_label.setText("Status: Running")
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
             
-            # Start the main trading loop in a separate thread
-            import threading
-            self.trading_thread = threading.Thread(
-                target=run_trading_bot,
-                args=(selected_pairs, strategy_settings)
-            )
-            self.trading_thread.daemon = True
-            self.trading_thread.start()
+            # Start the trading engine as a process of its own, it keeps trading if the window closes
+            with open(ENGINE_CONFIG_FILENAME, "w") as f:
+                json.dump({
+                    "trading_pairs": selected_pairs,
+                    "strategy_settings": strategy_settings,
+                    "timeframe": timeframe,
+                    "leverage": leverage,
+                    "hedge_mode": hedge_mode
+                }, f, indent=2)
+            self.engine_process = start_engine_process(ENGINE_CONFIG_FILENAME)
             
             # Log startup info
             pairs_str = ", ".join(selected_pairs)
             strategies_str = ", ".join([f"Strategy {i}" for i, s in enumerate(strategy_settings) if s["enabled"]])
             self.add_log("INFO", f"Bot started with pairs: {pairs_str}")
             self.add_log("INFO", f"Active strategies: {strategies_str}")
-            self.add_log("INFO", f"Timeframe: {TIMEFRAME}")
+            self.add_log("INFO", f"Timeframe: {timeframe}")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to start bot: {str(e)}")
@@ -1105,75 +1125,38 @@ API_SECRET = "{self.api_secret}"
             self.start_button.setEnabled(True)
             self.stop_button.setEnabled(False)
             
-            if self.trading_thread:
-                self.trading_thread.join(timeout=5)
-            
+            # The engine finishes its current round and exits, one that does not listen yet is terminated
+            if not self.engine_subscriber.send_stop() and self.engine_process is not None and self.engine_process.poll() is None:
+                self.engine_process.terminate()
+            self.engine_process = None
             self.add_log("INFO", "Bot stopped successfully")
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to stop bot: {str(e)}")
     
-    def run_trading_bot(self):
-        try:
-            init_bot()
-            update_account_balance_and_unrealized_profit(FIRST_COIN_SYMBOL)
-            set_leverage(CONTRACT_SYMBOL, LEVERAGE)
-            set_position_mode(HEDGE_MODE)
-            
-            while self.is_bot_running:
-                sleep(SLEEP_INTERVAL)
-                update_current_time()
-                check_and_cancel_extra_open_orders()
-                
-                if not is_it_time_to_update_and_trade(current_time):
-                    continue
-                    
-                load_orders_dict()
-                load_indicators_dict()
-                update_indicators_dict(CONTRACT_SYMBOL, current_time, self.timeframe_combo.currentText())
-                update_current_time()
-                update_recent_prices_list(CONTRACT_SYMBOL, current_time, IMPORTANT_CANDLES_COUNT, self.timeframe_combo.currentText())
-                save_indicators_dict()
-                update_contract_last_price(CONTRACT_SYMBOL)
-                update_account_balance_and_unrealized_profit(FIRST_COIN_SYMBOL)
-                
-                # Only run active strategies
-                active_strategies = [i for i, widget in enumerate(self.strategy_widgets) if widget.enabled.isChecked()]
-                for i in active_strategies:
-                    if not is_position_active(CONTRACT_SYMBOL, i):
-                        if is_it_time_to_open_long_position(i, indicators_dict):
-                            open_long_position(CONTRACT_SYMBOL, total_account_balance, TAKE_PROFIT_PERCENTS[i],
-                                            STOP_LOSS_PERCENTS[i], i)
-                        elif is_it_time_to_open_short_position(i, indicators_dict):
-                            open_short_position(CONTRACT_SYMBOL, total_account_balance, TAKE_PROFIT_PERCENTS[i],
-                                            STOP_LOSS_PERCENTS[i], i)
-                
-                save_orders_dict()
-                
-        except Exception as e:
-            self.add_log("ERROR", f"Trading bot error: {str(e)}")
-            self.stop_bot()
-    
-    def update_gui(self):
+    def update_gui(self, snapshot):
+        """
+        Slot for GuiDataWorker.snapshot_ready, only puts ready-made texts into the widgets
+        """
         try:
             # Update account information with color-coded values
-            self.balance_label.setText(f"{account_available_balance:.2f} {FIRST_COIN_SYMBOL}")
-            self.total_balance_label.setText(f"{total_account_balance:.2f} {FIRST_COIN_SYMBOL}")
+            self.balance_label.setText(snapshot.available_balance_text)
+            self.total_balance_label.setText(snapshot.total_balance_text)
             
-            # Color code profit/loss with error handling
-            try:
-                profit_text = f"{unrealized_profit:.2f} {FIRST_COIN_SYMBOL}"
-                if unrealized_profit > 0:
-                    self.unrealized_profit_label.setStyleSheet("color: #4CAF50; font-size: 14px; font-weight: bold;")  # Green
-                elif unrealized_profit < 0:
-                    self.unrealized_profit_label.setStyleSheet("color: #F44336; font-size: 14px; font-weight: bold;")  # Red
-                else:
-                    self.unrealized_profit_label.setStyleSheet("color: #212121; font-size: 14px; font-weight: bold;")  # Default
-            except NameError:
-                profit_text = "0.00 USDT"
-                self.unrealized_profit_label.setStyleSheet("color: #212121; font-size: 14px; font-weight: bold;")
+            # Color code profit/loss
+            if snapshot.unrealized_profit > 0:
+                self.unrealized_profit_label.setStyleSheet("color: #4CAF50; font-size: 14px; font-weight: bold;")  # Green
+            elif snapshot.unrealized_profit < 0:
+                self.unrealized_profit_label.setStyleSheet("color: #F44336; font-size: 14px; font-weight: bold;")  # Red
+            else:
+                self.unrealized_profit_label.setStyleSheet("color: #212121; font-size: 14px; font-weight: bold;")  # Default
+            self.unrealized_profit_label.setText(snapshot.unrealized_profit_text)
             
-            self.unrealized_profit_label.setText(profit_text)
+            # Follow the engine, which may have been started before this window or may have stopped on its own
+            if snapshot.is_engine_running != self.is_bot_running and (snapshot.is_engine_running or self.engine_process is None or self.engine_process.poll() is not None):
+                self.is_bot_running = snapshot.is_engine_running
+                self.start_button.setEnabled(not self.is_bot_running)
+                self.stop_button.setEnabled(self.is_bot_running)
             
             # Update bot status color
             if self.is_bot_running:
@@ -1183,88 +1166,58 @@ API_SECRET = "{self.api_secret}"
                 self.bot_status_label.setStyleSheet("color: #F44336;")  # Red for stopped
                 self.bot_status_label.setText("Status: Stopped")
             
-            # Update positions table
-            self.update_positions_table()
+            # Update positions table (None when the worker could not get them this time)
+            if snapshot.position_rows is not None:
+                self.update_positions_table(snapshot.position_rows)
             
             # Update log table
-            self.update_log_table()
+            self.update_log_table(snapshot.log_rows)
             
             # Update BTC price
-            try:
-                btc_price = float(binance_futures_api.ticker_price("BTCUSDT")["price"])
-                self.btc_price_label.setText(f"BTC/USDT: ${btc_price:,.2f}")
-                # Add color based on 24h change
-                ticker_24h = binance_futures_api.ticker_24hr("BTCUSDT")
-                price_change = float(ticker_24h["priceChangePercent"])
-                if price_change > 0:
-                    self.btc_price_label.setStyleSheet("""
-                        QLabel {
-                            color: #4CAF50;
-                            font-size: 16px;
-                            font-weight: bold;
-                            padding: 8px 16px;
-                            background: white;
-                            border: 1px solid #E0E0E0;
-                            border-radius: 4px;
-                        }
-                    """)
-                elif price_change < 0:
-                    self.btc_price_label.setStyleSheet("""
-                        QLabel {
-                            color: #F44336;
-                            font-size: 16px;
-                            font-weight: bold;
-                            padding: 8px 16px;
-                            background: white;
-                            border: 1px solid #E0E0E0;
-                            border-radius: 4px;
-                        }
-                    """)
-            except Exception as e:
-                self.btc_price_label.setText("BTC/USDT: Loading...")
+            self.btc_price_label.setText(snapshot.btc_price_text)
+            # Add color based on 24h change
+            if snapshot.btc_price_change_percent > 0:
+                self.btc_price_label.setStyleSheet("""
+                    QLabel {
+                        color: #4CAF50;
+                        font-size: 16px;
+                        font-weight: bold;
+                        padding: 8px 16px;
+                        background: white;
+                        border: 1px solid #E0E0E0;
+                        border-radius: 4px;
+                    }
+                """)
+            elif snapshot.btc_price_change_percent < 0:
+                self.btc_price_label.setStyleSheet("""
+                    QLabel {
+                        color: #F44336;
+                        font-size: 16px;
+                        font-weight: bold;
+                        padding: 8px 16px;
+                        background: white;
+                        border: 1px solid #E0E0E0;
+                        border-radius: 4px;
+                    }
+                """)
             
         except Exception as e:
             self.add_log("ERROR", f"GUI update error: {str(e)}")
-            return  # Add explicit return to ensure proper block closure
             
-    def update_positions_table(self):
+    def update_positions_table(self, position_rows):
         try:
-            # Get current positions from Binance
-            positions = binance_futures_api.get_position_risk()
-            
-            # Update table
-            self.positions_table.setRowCount(len(positions))
-            for i, position in enumerate(positions):
-                if float(position["positionAmt"]) != 0:
-                    self.positions_table.setItem(i, 0, QTableWidgetItem(str(i)))
-                    self.positions_table.setItem(i, 1, QTableWidgetItem(position["symbol"]))
-                    self.positions_table.setItem(i, 2, QTableWidgetItem("LONG" if float(position["positionAmt"]) > 0 else "SHORT"))
-                    self.positions_table.setItem(i, 3, QTableWidgetItem(str(abs(float(position["positionAmt"])))))
-                    self.positions_table.setItem(i, 4, QTableWidgetItem(str(float(position["entryPrice"]))))
-                    self.positions_table.setItem(i, 5, QTableWidgetItem(str(float(position["unRealizedProfit"]))))
-            
-            self.positions_table.resizeColumnsToContents()
+            self.positions_model.set_rows(position_rows)
             
         except Exception as e:
             self.add_log("ERROR", f"Failed to update positions table: {str(e)}")
     
-    def update_log_table(self):
+    def update_log_table(self, log_rows):
         try:
-            # Read the last few lines from the log file
-            with open("application.log", "r") as f:
-                lines = f.readlines()[-10:]  # Get last 10 lines
-            
-            # Update table
-            self.log_table.setRowCount(len(lines))
-            for i, line in enumerate(lines):
-                parts = line.split(" ")
-                if len(parts) >= 4:
-                    self.log_table.setItem(i, 0, QTableWidgetItem(parts[0] + " " + parts[1]))
-                    self.log_table.setItem(i, 1, QTableWidgetItem(parts[2]))
-                    self.log_table.setItem(i, 2, QTableWidgetItem(parts[3] if len(parts) > 3 else ""))
-                    self.log_table.setItem(i, 3, QTableWidgetItem(" ".join(parts[4:])))
-            
-            self.log_table.resizeColumnsToContents()
+            is_first_rows = self.log_model.rowCount() == 0
+            self.log_model.append_rows(log_rows)
+            # Size the columns once, the message column stretches anyway
+            if is_first_rows and log_rows:
+                self.log_table.resizeColumnsToContents()
             
         except Exception as e:
             self.add_log("ERROR", f"Failed to update log table: {str(e)}")
@@ -1272,13 +1225,7 @@ API_SECRET = "{self.api_secret}"
     def add_log(self, level, message):
         try:
             current_time = datetime.now().strftime("%Y/%m/%d %I:%M:%S %p")
-            row = self.log_table.rowCount()
-            self.log_table.insertRow(row)
-            self.log_table.setItem(row, 0, QTableWidgetItem(current_time))
-            self.log_table.setItem(row, 1, QTableWidgetItem(level))
-            self.log_table.setItem(row, 2, QTableWidgetItem(CONTRACT_SYMBOL))
-            self.log_table.setItem(row, 3, QTableWidgetItem(message))
-            self.log_table.resizeColumnsToContents()
+            self.update_log_table([(current_time, level, CONTRACT_SYMBOL, message)])
             
         except Exception as e:
             print(f"Failed to add log: {str(e)}")
@@ -1318,6 +1265,12 @@ API_SECRET = "{self.api_secret}"
                 item.setSelected(False)
             self.select_all_btn.setText("Select All")
 
+    def closeEvent(self, event):
+        # The engine keeps trading, a new window picks it up again
+        self.gui_data_worker.stop()
+        self.engine_subscriber.stop()
+        super().closeEvent(event)
+
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -1468,6 +1421,8 @@ class SettingsDialog(QDialog):
         super().accept()
 
 def main():
+    # Only logging here, the GUI never talks to Binance: it starts or attaches to the headless engine process over engine_ipc
+    configure_logging()
     app = QApplication(sys.argv)
     window = TradingBotGUI()
     window.show()
@@ -0,0 +1,90 @@
+from collections import namedtuple
+import logging
+from PyQt5.QtCore import QThread, pyqtSignal
+import main as trading_bot
+from config import FIRST_COIN_SYMBOL, GUI_REFRESH_INTERVAL_MILLISECONDS
+
+# Everything the window shows, formatted away from the UI thread (log_rows are only the new lines)
+# Tuples all the way down, so a snapshot can be handed between threads without being changed
+GuiSnapshot = namedtuple("GuiSnapshot", [
+    "available_balance_text",
+    "total_balance_text",
+    "unrealized_profit_text",
+    "unrealized_profit",
+    "btc_price_text",
+    "btc_price_change_percent",
+    "position_rows",
+    "log_rows",
+    "is_engine_running",
+])
+
+
+def format_position_rows(positions: list) -> tuple:
+    """
+    One row of display texts per open position (symbols without a position are left out)
+    """
+    position_rows = []
+    for position in positions:
+        position_amount = float(position["positionAmt"])
+        if position_amount == 0:
+            continue
+        position_rows.append((
+            position["symbol"],
+            "LONG" if position_amount > 0 else "SHORT",
+            str(abs(position_amount)),
+            str(float(position["entryPrice"])),
+            str(float(position["unRealizedProfit"])),
+        ))
+    return tuple(position_rows)
+
+
+class GuiDataWorker(QThread):
+    """
+    Turns what the trading engine process publishes through engine_subscriber (balances, the BTC price, positions,
+    the bot status and its log lines) into a GuiSnapshot every GUI_REFRESH_INTERVAL_MILLISECONDS on its own thread
+    The window itself never asks Binance, the engine's client is the only one
+    """
+    snapshot_ready = pyqtSignal(object)
+
+    def __init__(self, engine_subscriber, refresh_interval: int = GUI_REFRESH_INTERVAL_MILLISECONDS, parent=None):
+        super().__init__(parent)
+        self.engine_subscriber = engine_subscriber
+        self.refresh_interval = refresh_interval
+        self.is_running = True
+        self.last_log_sequence = 0
+
+    def stop(self):
+        self.is_running = False
+        self.wait()
+
+    def run(self):
+        while self.is_running:
+            try:
+                self.snapshot_ready.emit(self.create_snapshot())
+            except Exception as e:
+                # Shows up in the log table through the log buffer
+                logging.error(f"ERROR in GuiDataWorker.run: {e}")
+            self.msleep(self.refresh_interval)
+
+    def create_snapshot(self) -> GuiSnapshot:
+        # Zeros until an engine is running
+        engine_status = self.engine_subscriber.get_latest_status() or {}
+        unrealized_profit = engine_status.get("unrealized_profit", 0)
+        btc_price = engine_status.get("btc_price")
+        btc_price_text = f"BTC/USDT: ${btc_price:,.2f}" if btc_price is not None else "BTC/USDT: Loading..."
+        # Without an engine the table keeps what it shows
+        position_rows = format_position_rows(engine_status["positions"]) if "positions" in engine_status else None
+        # Only the lines logged since the last snapshot, by the window itself and by the engine
+        log_rows, self.last_log_sequence = trading_bot.log_buffer_handler.get_rows_since(self.last_log_sequence)
+        log_rows += self.engine_subscriber.take_log_rows()
+        return GuiSnapshot(
+            available_balance_text=f"{engine_status.get('account_available_balance', 0):.2f} {FIRST_COIN_SYMBOL}",
+            total_balance_text=f"{engine_status.get('total_account_balance', 0):.2f} {FIRST_COIN_SYMBOL}",
+            unrealized_profit_text=f"{unrealized_profit:.2f} {FIRST_COIN_SYMBOL}",
+            unrealized_profit=unrealized_profit,
+            btc_price_text=btc_price_text,
+            btc_price_change_percent=engine_status.get("btc_price_change_percent", 0.0),
+            position_rows=position_rows,
+            log_rows=log_rows,
+            is_engine_running=engine_status.get("is_bot_started", False),
+        )
@@ -0,0 +1,105 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from config import GUI_LOG_TABLE_MAXIMUM_ROWS
+
+POSITIONS_TABLE_HEADERS = ["Strategy ID", "Symbol", "Side", "Amount", "Entry Price", "PNL"]
+LOG_TABLE_HEADERS = ["Time", "Level", "Symbol", "Message"]
+
+
+class PositionsTableModel(QAbstractTableModel):
+    """
+    Open positions for a QTableView, one row per (symbol, side)
+    set_rows only touches what changed: new positions are inserted, closed ones removed,
+    and dataChanged is emitted just for the cells of a row whose texts are different
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(POSITIONS_TABLE_HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        if index.column() == 0:
+            return str(index.row())
+        return self.rows[index.row()][index.column() - 1]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return POSITIONS_TABLE_HEADERS[section]
+        return None
+
+    def set_rows(self, position_rows):
+        """
+        position_rows are (symbol, side, amount, entry price, pnl) texts, as made by format_position_rows
+        """
+        new_rows = {position_row[:2]: position_row for position_row in position_rows}
+        # Closed positions, from the bottom up so the row numbers still hold
+        for row in reversed(range(len(self.rows))):
+            if self.rows[row][:2] not in new_rows:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+        # Positions that are still open, only the cells that changed
+        for row, old_row in enumerate(self.rows):
+            new_row = new_rows.pop(old_row[:2])
+            if new_row == old_row:
+                continue
+            changed_columns = [column for column, text in enumerate(new_row) if text != old_row[column]]
+            self.rows[row] = new_row
+            self.dataChanged.emit(self.index(row, changed_columns[0] + 1), self.index(row, changed_columns[-1] + 1), [Qt.DisplayRole])
+        # New positions
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(new_rows) - 1)
+            self.rows.extend(new_rows.values())
+            self.endInsertRows()
+
+
+class LogTableModel(QAbstractTableModel):
+    """
+    Log lines for a QTableView, oldest first
+    New lines are appended as they come, and past maximum_rows the oldest ones are dropped,
+    so a refresh costs only the new lines and the table never grows without bound
+    """
+
+    def __init__(self, maximum_rows=GUI_LOG_TABLE_MAXIMUM_ROWS, parent=None):
+        super().__init__(parent)
+        self.maximum_rows = maximum_rows
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(LOG_TABLE_HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.rows[index.row()][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return LOG_TABLE_HEADERS[section]
+        return None
+
+    def append_rows(self, log_rows):
+        """
+        log_rows are (time, level, symbol, message) texts
+        """
+        log_rows = list(log_rows)[-self.maximum_rows:]
+        if not log_rows:
+            return
+        extra_rows_count = len(self.rows) + len(log_rows) - self.maximum_rows
+        if extra_rows_count > 0:
+            self.beginRemoveRows(QModelIndex(), 0, extra_rows_count - 1)
+            del self.rows[:extra_rows_count]
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(log_rows) - 1)
+        self.rows.extend(log_rows)
+        self.endInsertRows()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from engine_ipc import EngineStatusPublisher, get_engine_address
+from config import HEADLESS_CONFIG_FILENAME, STATUS_SERVER_HOST, STATUS_SERVER_PORT, ENGINE_IPC_PORT, TIMEFRAME_INTERVALS
+
+# Settings the config file may change, and the name they have in main
+OVERRIDABLE_SETTINGS = {"leverage": "LEVERAGE", "timeframe": "TIMEFRAME", "hedge_mode": "HEDGE_MODE"}
+
+
+def load_headless_config(filename: str) -> dict:
+	"""
+	Read the pairs and strategy settings to trade, in the same shape the GUI builds them:
+	{"trading_pairs": ["BTCUSDT"], "strategy_settings": [{"enabled": true, "tp_percent": 2, "sl_percent": -1, "ema_fast": 12, "ema_slow": 26}],
+	"timeframe": "h1", "leverage": 1, "hedge_mode": true}
+	A strategy can trade on its own "timeframe", and "pair_timeframes" ({"ETHUSDT": "m15"}) binds pairs to one,
+	otherwise "timeframe" is used
+	"""
+	with open(filename, "r") as handle:
+		headless_config = json.load(handle)
+	if not headless_config.get("trading_pairs"):
+		raise ValueError(f"{filename}: at least one trading pair is needed in trading_pairs")
+	if not any(settings.get("enabled") for settings in headless_config.get("strategy_settings", [])):
+		raise ValueError(f"{filename}: at least one strategy must be enabled in strategy_settings")
+	timeframes = [headless_config.get("timeframe"), *headless_config.get("pair_timeframes", {}).values(),
+				  *(settings.get("timeframe") for settings in headless_config["strategy_settings"])]
+	for timeframe in timeframes:
+		if timeframe is not None and timeframe not in TIMEFRAME_INTERVALS:
+			raise ValueError(f"{filename}: timeframe {timeframe} must be one of {', '.join(TIMEFRAME_INTERVALS)}")
+	return headless_config
+
+
+def create_status_request_handler(get_status):
+	class StatusRequestHandler(BaseHTTPRequestHandler):
+		def do_GET(self):
+			if self.path.rstrip("/") not in ("", "/status"):
+				self.send_error(404)
+				return
+			try:
+				body = json.dumps(get_status()).encode()
+			except Exception as e:
+				logging.error(f"ERROR in StatusRequestHandler.do_GET: {e}")
+				self.send_error(500)
+				return
+			self.send_response(200)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			# Status checks would flood application.log
+			pass
+
+	return StatusRequestHandler
+
+
+def start_status_server(get_status, host: str = STATUS_SERVER_HOST, port: int = STATUS_SERVER_PORT) -> ThreadingHTTPServer:
+	"""
+	Answer GET /status with get_status() as JSON, on a thread of its own
+	"""
+	status_server = ThreadingHTTPServer((host, port), create_status_request_handler(get_status))
+	status_server.daemon_threads = True
+	threading.Thread(target=status_server.serve_forever, name="status_server", daemon=True).start()
+	logging.info(f"Status available on http://{host}:{status_server.server_port}/status")
+	return status_server
+
+
+def stop_engine(trading_bot) -> None:
+	logging.info("Stop requested, finishing the current round before exiting")
+	trading_bot.shutdown()
+	logging.info("Bot stopped successfully")
+	os._exit(0)
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description="Run the trading bot without the GUI")
+	parser.add_argument("--config", default=HEADLESS_CONFIG_FILENAME, help="JSON file with trading_pairs and strategy_settings")
+	parser.add_argument("--pairs", nargs="+", help="trade these pairs instead of the ones in the config file")
+	parser.add_argument("--status-host", default=STATUS_SERVER_HOST, help="address of the status endpoint")
+	parser.add_argument("--status-port", type=int, default=STATUS_SERVER_PORT, help="port of the status endpoint, 0 turns it off")
+	parser.add_argument("--ipc-port", type=int, default=ENGINE_IPC_PORT, help="port the GUI listens to the engine on, 0 turns it off")
+	return parser.parse_args(arguments)
+
+
+def main(arguments: list = None, trading_bot=None) -> None:
+	"""
+	trading_bot is the already loaded main module when started as python main.py
+	"""
+	arguments = parse_arguments(arguments)
+	headless_config = load_headless_config(arguments.config)
+	trading_pairs = arguments.pairs or headless_config["trading_pairs"]
+
+	# Imported only now, so --help and a broken config file do not need Binance
+	if trading_bot is None:
+		import main as trading_bot
+	for key, name in OVERRIDABLE_SETTINGS.items():
+		if key in headless_config:
+			setattr(trading_bot, name, headless_config[key])
+	try:
+		trading_bot.bootstrap()
+	except Exception:
+		# Already logged, and there is nothing to do without Binance
+		sys.exit(1)
+
+	if arguments.status_port:
+		start_status_server(trading_bot.get_bot_status, arguments.status_host, arguments.status_port)
+	if arguments.ipc_port:
+		# The GUI shows what this process publishes, and its Stop button lands in stop_engine
+		try:
+			EngineStatusPublisher(
+				trading_bot.get_bot_status,
+				trading_bot.log_buffer_handler,
+				on_stop=lambda: stop_engine(trading_bot),
+				address=get_engine_address(arguments.ipc_port)
+			).start()
+		except OSError as e:
+			logging.error(f"Failed to listen on port {arguments.ipc_port}, is another engine running? {e}")
+			sys.exit(1)
+
+	logging.info(f"Headless bot started with pairs: {', '.join(trading_pairs)}, timeframe: {trading_bot.TIMEFRAME}")
+	trading_bot.run_trading_bot(trading_pairs, headless_config["strategy_settings"], headless_config.get("pair_timeframes"))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,63 @@
+import os
+import pickle
+import threading
+from config import INDICATOR_STATE_DIRECTORY
+
+
+class IndicatorStateStore:
+	"""
+	Indicator state kept per (symbol, timeframe, key), where key names the indicator and its parameters (e.g. "ema_20")
+	Every entry has its own small pickle file that is only read the first time the entry is needed,
+	and saving one entry never touches the others, so pairs can be updated at the same time
+	encode and decode turn an entry into what is pickled and back
+	"""
+
+	def __init__(self, directory: str = INDICATOR_STATE_DIRECTORY, encode=None, decode=None) -> None:
+		self.directory = directory
+		self.encode = encode or (lambda value: value)
+		self.decode = decode or (lambda value: value)
+		self.entries = {}
+		self.lock = threading.Lock()
+
+	def get_filename(self, contract_symbol: str, timeframe: str, key: str) -> str:
+		return os.path.join(self.directory, f"{contract_symbol}_{timeframe}_{key}.pkl")
+
+	def load(self, contract_symbol: str, timeframe: str, key: str):
+		try:
+			with open(self.get_filename(contract_symbol, timeframe, key), 'rb') as handle:
+				return self.decode(pickle.load(handle))
+		except FileNotFoundError:
+			return None
+
+	def get(self, contract_symbol: str, timeframe: str, key: str, create=None):
+		"""
+		The entry, loaded from its file on first use, or made by create() if it was never saved
+		"""
+		entry_key = (contract_symbol, timeframe, key)
+		with self.lock:
+			if entry_key in self.entries:
+				return self.entries[entry_key]
+		value = self.load(contract_symbol, timeframe, key)
+		if value is None and create is not None:
+			value = create()
+		with self.lock:
+			return self.entries.setdefault(entry_key, value)
+
+	def put(self, contract_symbol: str, timeframe: str, key: str, value) -> None:
+		with self.lock:
+			self.entries[(contract_symbol, timeframe, key)] = value
+		self.save(contract_symbol, timeframe, key)
+
+	def save(self, contract_symbol: str, timeframe: str, key: str) -> None:
+		"""
+		Write the entry to a temporary file first, so a crash never leaves a half written one behind
+		"""
+		with self.lock:
+			value = self.entries[(contract_symbol, timeframe, key)]
+		# Made on the first save, so importing the bot leaves the disk alone
+		os.makedirs(self.directory, exist_ok=True)
+		filename = self.get_filename(contract_symbol, timeframe, key)
+		temporary_filename = f"{filename}.{threading.get_ident()}.tmp"
+		with open(temporary_filename, 'wb') as handle:
+			pickle.dump(self.encode(value), handle, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(temporary_filename, filename)
@@ -83,7 +83,7 @@ def get_ema(prices: list, period: int) -> float:
 	if len(prices) < period:  # Need enough prices
 		return prices[-1] if prices else 0  # Return last price if not enough data
 	
-	sma = get_sma(prices, period)  # Start with simple average
+	sma = get_sma(prices[:period], period)  # Start with simple average of the first prices
 	multiplier = 2 / (period + 1)  # How much to trust new prices
 	
 	# Calculate EMA step by step
@@ -94,19 +94,40 @@ def get_ema(prices: list, period: int) -> float:
 	return ema
 
 
+def get_ema_list(prices: list, period: int) -> list:
+	"""
+	Calculate the EMA after every price, the same as calling get_ema on every beginning of the list
+	"""
+	if len(prices) < period:  # Not enough prices yet, the EMA is just the price
+		return list(prices)
+	
+	multiplier = 2 / (period + 1)
+	ema = get_sma(prices[:period], period)
+	emas = list(prices[:period - 1]) + [ema]
+	for price in prices[period:]:
+		ema = (price - ema) * multiplier + ema
+		emas.append(ema)
+	
+	return emas
+
+
 def get_macd(prices: list, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> tuple:
 	"""
 	Calculate MACD (Moving Average Convergence Divergence) - shows price momentum
 	Like watching two cars race and seeing which one is pulling ahead
 	"""
-	# Calculate the fast and slow EMAs
-	fast_ema = get_ema(prices, fast_period)
-	slow_ema = get_ema(prices, slow_period)
+	if not prices:
+		return 0, 0
+	
+	# Calculate the fast and slow EMAs after every price
+	fast_emas = get_ema_list(prices, fast_period)
+	slow_emas = get_ema_list(prices, slow_period)
 	
-	# Calculate MACD line (difference between fast and slow)
-	macd_line = fast_ema - slow_ema
+	# Calculate MACD line (difference between fast and slow) once the slow EMA is ready
+	macd_lines = [fast_ema - slow_ema for fast_ema, slow_ema in zip(fast_emas, slow_emas)]
+	macd_lines = macd_lines[slow_period - 1:] or macd_lines[-1:]
 	
 	# Calculate signal line (EMA of MACD line)
-	signal_line = get_ema([macd_line], signal_period)
+	signal_line = get_ema(macd_lines, signal_period)
 	
-	return macd_line, signal_line  # Return both lines
+	return macd_lines[-1], signal_line  # Return both lines
@@ -1,4 +1,5 @@
 import pickle
+from indicator_state_store import IndicatorStateStore
 
 indicators_dict_btcusdt_m1 = {
 	"candle_open_timestamp": 1650207540,
@@ -137,4 +138,4 @@ indicators_dict_xrpbusd_m15 = {
 }
 # POSITION_QUANTITY_DECIMAL_DIGITS = 1
 
-pickle.dump(indicators_dict_btcusdt_h1, open("indicators_dict.pkl", "wb"), protocol=pickle.HIGHEST_PROTOCOL)
+IndicatorStateStore().put("BTCUSDT", "h1", "indicators_dict", indicators_dict_btcusdt_h1)
@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from candle_store import get_candle_store
+from config import TIMEFRAME_INTERVALS, TIMEFRAME_MINUTES, ONE_MINUTE_IN_MILLISECONDS, MAXIMUM_KLINE_BACKFILL_WORKERS
+from stream_client import create_websocket_client
+from websocket_replay import record_message
+
+INTERVAL_TIMEFRAMES = {interval: timeframe for timeframe, interval in TIMEFRAME_INTERVALS.items()}
+
+
+def get_kline_stream_name(contract_symbol: str, timeframe: str) -> str:
+	return f"{contract_symbol.lower()}@kline_{TIMEFRAME_INTERVALS[timeframe]}"
+
+
+class KlineStream:
+	"""
+	Closed-kline events for many (symbol, timeframe) pairs over one multiplexed websocket
+	Every closed candle is appended to its candle store, then on_candle_closed(symbol, timeframe) is called
+	If candles were missed (e.g. after a reconnect), on_gap(symbol, timeframe, close_time) is called first to fill them,
+	on a worker thread so a slow download never holds up the websocket thread the other streams share;
+	the candles of that (symbol, timeframe) closing meanwhile wait behind it, so there is one backfill per pair at a time
+	A connection the client gave up on is opened again, and the next closed candle fills the gap that way
+	"""
+
+	def __init__(
+		self,
+		subscriptions: list,
+		on_candle_closed,
+		on_gap=None,
+		websocket_client_factory=create_websocket_client,
+		recording_filename: str = None
+	) -> None:
+		self.subscriptions = subscriptions
+		self.on_candle_closed = on_candle_closed
+		self.on_gap = on_gap
+		self.websocket_client_factory = websocket_client_factory
+		self.recording_filename = recording_filename
+		self.websocket_client = None
+		self.lock = threading.Lock()
+		self.stop_event = threading.Event()
+		self.connection_id = 0
+		self.backfill_executor = ThreadPoolExecutor(max_workers=MAXIMUM_KLINE_BACKFILL_WORKERS)
+		self.backfill_lock = threading.Lock()
+		self.waiting_klines = {}  # (symbol, timeframe) with a backfill in flight -> closed klines waiting for it
+
+	def start(self) -> None:
+		self.connect()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		with self.lock:
+			self.connection_id += 1
+			websocket_client, self.websocket_client = self.websocket_client, None
+		if websocket_client is not None:
+			websocket_client.stop()
+		self.backfill_executor.shutdown(wait=False, cancel_futures=True)
+
+	def connect(self) -> None:
+		with self.lock:
+			if self.stop_event.is_set():
+				return
+			self.connection_id += 1
+			connection_id = self.connection_id
+			old_websocket_client = self.websocket_client
+			self.websocket_client = None
+			if old_websocket_client is not None:
+				old_websocket_client.stop()
+			self.websocket_client = self.websocket_client_factory(
+				on_message=self.handle_message,
+				on_close=lambda *_: self.handle_close(connection_id)
+			)
+			self.websocket_client.subscribe([get_kline_stream_name(contract_symbol, timeframe)
+											 for contract_symbol, timeframe in self.subscriptions])
+
+	def reconnect(self) -> None:
+		try:
+			self.connect()
+		except Exception as e:
+			logging.error(f"ERROR in KlineStream.reconnect: {e}")
+
+	def handle_close(self, connection_id: int) -> None:
+		# Connections replaced on purpose close too
+		if self.stop_event.is_set() or connection_id != self.connection_id:
+			return
+		threading.Thread(target=self.reconnect, daemon=True).start()
+
+	def handle_message(self, _, message: str) -> None:
+		try:
+			if self.recording_filename:
+				record_message(self.recording_filename, message)
+			payload = json.loads(message)
+			# Combined streams wrap every event as {"stream": ..., "data": ...}
+			data = payload.get("data", payload)
+			if data.get("e") != "kline" or not data["k"]["x"]:
+				return
+			self.handle_closed_kline(data["k"])
+		except Exception as e:
+			logging.error(f"ERROR in KlineStream.handle_message: {e}")
+
+	def handle_closed_kline(self, kline: dict) -> None:
+		pair_timeframe = (kline["s"], INTERVAL_TIMEFRAMES[kline["i"]])
+		with self.backfill_lock:
+			if pair_timeframe in self.waiting_klines:
+				self.waiting_klines[pair_timeframe].append(kline)
+				return
+			if self.on_gap is not None and self.has_gap(kline):
+				self.waiting_klines[pair_timeframe] = [kline]
+				self.backfill_executor.submit(self.backfill_and_store, pair_timeframe)
+				return
+		self.store_closed_kline(kline)
+
+	def backfill_and_store(self, pair_timeframe: tuple) -> None:
+		"""
+		Fill the gap in front of the waiting klines, then store them in the order they closed
+		"""
+		while True:
+			with self.backfill_lock:
+				if not self.waiting_klines[pair_timeframe]:
+					del self.waiting_klines[pair_timeframe]
+					return
+				kline = self.waiting_klines[pair_timeframe].pop(0)
+			try:
+				if self.has_gap(kline):
+					self.on_gap(*pair_timeframe, kline["T"])
+				self.store_closed_kline(kline)
+			except Exception as e:
+				# The kline is left out, so the next one finds the gap again and asks for it
+				logging.error(f"ERROR in KlineStream.backfill_and_store: {e}")
+
+	def has_gap(self, kline: dict) -> bool:
+		timeframe = INTERVAL_TIMEFRAMES[kline["i"]]
+		candle_store = get_candle_store(kline["s"], timeframe)
+		candle_length = TIMEFRAME_MINUTES[timeframe] * ONE_MINUTE_IN_MILLISECONDS
+		return len(candle_store) > 0 and kline["t"] > candle_store.last_open_time() + candle_length
+
+	def store_closed_kline(self, kline: dict) -> None:
+		contract_symbol = kline["s"]
+		timeframe = INTERVAL_TIMEFRAMES[kline["i"]]
+		# A candle that is already stored (sent again around a reconnect) was already handled
+		if get_candle_store(contract_symbol, timeframe).append_klines([[kline["t"], kline["o"], kline["h"], kline["l"], kline["c"], kline["v"], kline["T"]]]):
+			self.on_candle_closed(contract_symbol, timeframe)
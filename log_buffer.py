@@ -0,0 +1,43 @@
+import logging
+from collections import deque
+from itertools import islice
+from datetime import datetime
+from config import LOG_BUFFER_CAPACITY, CONTRACT_SYMBOL
+
+
+class RingBufferLogHandler(logging.Handler):
+	"""
+	Keeps the last capacity log records in memory as (time, level, symbol, message) rows
+	Every row gets a sequence number, so a reader only picks up the rows it has not seen yet
+	"""
+
+	def __init__(self, capacity: int = LOG_BUFFER_CAPACITY) -> None:
+		super().__init__()
+		self.rows = deque(maxlen=capacity)
+		self.last_sequence = 0
+
+	def emit(self, record: logging.LogRecord) -> None:
+		try:
+			row = (
+				datetime.fromtimestamp(record.created).strftime("%Y/%m/%d %I:%M:%S %p"),
+				record.levelname,
+				getattr(record, "symbol", CONTRACT_SYMBOL),
+				record.getMessage()
+			)
+		except Exception:
+			self.handleError(record)
+			return
+		with self.lock:
+			self.last_sequence += 1
+			self.rows.append((self.last_sequence, row))
+
+	def get_rows_since(self, sequence: int) -> tuple:
+		"""
+		Rows logged after sequence (those pushed out of the buffer meanwhile are gone), and the new last sequence
+		"""
+		with self.lock:
+			if sequence >= self.last_sequence:
+				return (), self.last_sequence
+			# Walked from the newest end, so a poll costs the new rows only, not the whole buffer
+			new_rows = [row for _, row in islice(reversed(self.rows), self.last_sequence - sequence)]
+			return tuple(reversed(new_rows)), self.last_sequence
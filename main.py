@@ -1,356 +1,249 @@
-from time import sleep
+from time import sleep, monotonic
 from datetime import *
+from concurrent.futures import ThreadPoolExecutor
 from indicators import *
 from config import *
 import pickle
 import logging
+import queue
 import sys
-from candle import Candle
-from binance.um_futures import UMFutures
+import threading
+from candle import convert_klines_to_candles, concatenate_candles
+from candle_store import get_candle_store
+from kline_stream import KlineStream
+from server_clock import ServerClock
+from resampler import is_timeframe_boundary, resample_into_candle_store
+from streaming_indicators import get_indicator_key, create_streaming_indicator, streaming_indicator_from_dict
+from indicator_state_store import IndicatorStateStore
+from order_state import OpenOrdersSnapshot
+from user_data_stream import AccountBook, UserDataStream, OPEN_ORDER_STATUSES
+from exchange_info import ExchangeInfoCache, format_number
+from rate_limiter import RateLimitedClient, PRIORITY_GUI
+from log_buffer import RingBufferLogHandler
+from deadline_scheduler import DeadlineScheduler
+from binance.error import ClientError
 from credentials import *
 from utils import *
 from telegram_message_sender import *
 
-# Configure logging
-logging.basicConfig(
-	level=logging.INFO,
-	format='%(asctime)s - %(levelname)s - %(message)s',
-	handlers=[
-		logging.FileHandler('application.log'),
-		logging.StreamHandler()
-	]
-)
+# Logging, the Binance client and the Telegram bot are only set up by bootstrap(),
+# so importing this module is quick and needs no network
+log_buffer_handler = RingBufferLogHandler()
+bootstrap_lock = threading.Lock()
+binance_futures_api = None
 
-# Initialize Binance Futures API
-try:
-	if not API_KEY or not SECRET_KEY:
-		raise ValueError("Binance API credentials are missing. Please add them to credentials.py")
-	
-	binance_futures_api = UMFutures(
-		key=API_KEY,
-		secret=SECRET_KEY,
-		base_url=API_BASE_URL
-	)
-	
-	# Test the connection
-	binance_futures_api.time()
-	logging.info("Successfully connected to Binance Futures API")
-	
-except Exception as e:
-	logging.error(f"Failed to initialize Binance Futures API: {str(e)}")
-	sys.exit(1)
-
-is_price_increasing = False
-is_price_decreasing = False
-is_macd_increasing = False
-is_macd_decreasing = False
-is_macd_positive = False
-is_macd_negative = False
 account_available_balance = 0
 total_account_balance = 0
+unrealized_profit = 0
+# What the window shows, kept up to date by update_status_market_data
+btc_price = None
+btc_price_change_percent = 0.0
+open_positions = []
 is_bot_started = False
+running_trading_pairs = []
+pair_timeframes = {}
 current_time = datetime.now()
-indicators_dict = {}
 orders_dict = {}
 contract_open_orders_count = 0
 open_orders_list = []
 last_account_available_balances_list = []
 last_total_account_balances_list = []
+# Sampled past the request queue, so time spent waiting in it is not taken for network round trip
+server_clock = ServerClock(lambda: binance_futures_api.send_now("time")["serverTime"])
+kline_download_executor = ThreadPoolExecutor(max_workers=MAXIMUM_KLINE_DOWNLOAD_WORKERS, thread_name_prefix="kline_download")
+pair_update_executor = ThreadPoolExecutor(max_workers=MAXIMUM_PAIR_UPDATE_WORKERS, thread_name_prefix="pair_update")
+indicator_state_store = IndicatorStateStore()
+streaming_indicator_store = IndicatorStateStore(encode=lambda indicator: indicator.to_dict(), decode=streaming_indicator_from_dict)
+indicator_evaluation_cache = {}
+orders_dict_lock = threading.Lock()
+trading_cycle_lock = threading.Lock()
+# Follows the server clock, so jobs run right after the exchange closes a candle
+deadline_scheduler = DeadlineScheduler(now=lambda: get_local_timestamp() / 1000)
+order_fill_executor = ThreadPoolExecutor(max_workers=MAXIMUM_ORDER_FILL_WORKERS, thread_name_prefix="order_fill")
+pending_entries = set()
+open_orders_snapshot = OpenOrdersSnapshot(lambda: binance_futures_api.get_orders(timestamp=get_local_timestamp()))
+exchange_info = ExchangeInfoCache(
+	lambda: binance_futures_api.exchange_info(),
+	lambda: binance_futures_api.leverage_brackets(timestamp=get_local_timestamp())
+)
+account_book = AccountBook()
+user_data_stream = UserDataStream(
+	account_book,
+	create_listen_key=lambda: binance_futures_api.new_listen_key()["listenKey"],
+	renew_listen_key=lambda listen_key: binance_futures_api.renew_listen_key(listenKey=listen_key),
+	fetch_snapshots=lambda: (
+		binance_futures_api.get_orders(timestamp=get_local_timestamp()),
+		binance_futures_api.get_position_risk(timestamp=get_local_timestamp()),
+		binance_futures_api.balance()
+	)
+)
+INDICATOR_NAMES = ["ema_50", "ema_40", "ema_30", "ema_20", "ema_10", "macd_ema_12", "macd_ema_26", "macd_line", "signal_line"]
+
+
+def configure_logging() -> None:
+	"""
+	Log to application.log, the console and the in-memory buffer the GUI reads (only the first call does anything)
+	"""
+	logging.basicConfig(
+		level=logging.INFO,
+		format='%(asctime)s - %(levelname)s - %(message)s',
+		handlers=[
+			logging.FileHandler('application.log'),
+			logging.StreamHandler(),
+			log_buffer_handler
+		]
+	)
+
+
+def bootstrap() -> None:
+	"""
+	Set up logging, the Binance client and the Telegram bot, once
+	Raises if Binance cannot be reached, the caller decides whether that ends the program
+	"""
+	global binance_futures_api
+	with bootstrap_lock:
+		if binance_futures_api is not None:
+			return
+		configure_logging()
+		try:
+			if not API_KEY or not SECRET_KEY:
+				raise ValueError("Binance API credentials are missing. Please add them to credentials.py")
+			
+			from binance.um_futures import UMFutures
+			client = RateLimitedClient(UMFutures(
+				key=API_KEY,
+				secret=SECRET_KEY,
+				base_url=API_BASE_URL,
+				show_limit_usage=True
+			))
+			
+			# Test the connection
+			client.time()
+			logging.info("Successfully connected to Binance Futures API")
+			
+		except Exception as e:
+			logging.error(f"Failed to initialize Binance Futures API: {str(e)}")
+			raise
+		binance_futures_api = client
+		init_telegram_bot()
 
 
-@retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in update_current_time: {e}") or ERROR)
 def update_current_time() -> int:
 	global current_time
 	global last_time
 	last_time = current_time
-	current_time = datetime.fromtimestamp(binance_futures_api.time()["serverTime"] / 1000)
+	current_time = server_clock.now()
 	return SUCCESSFUL
 
 
 def get_local_timestamp() -> int:
-	return int(datetime.now().timestamp())
+	"""
+	Current server time in milliseconds, as Binance expects it in the timestamp of signed requests
+	"""
+	return server_clock.timestamp()
 
 
-def convert_binance_data_list_to_candles_list(binance_data_list: list) -> list:
-	candles_list = []
-	for binance_data in binance_data_list:
-		candle = Candle(datetime.fromtimestamp(binance_data[0] // 1000), binance_data[1], binance_data[2],
-						binance_data[3], binance_data[4], None, datetime.fromtimestamp(binance_data[6] // 1000))
-		candles_list.append(candle)
-	return candles_list
+def get_kline_page_windows(start_timestamp: int, end_timestamp: int, timeframe: str) -> list:
+	"""
+	Split [start_timestamp, end_timestamp] into the time ranges of one klines request each
+	"""
+	page_length = MAXIMUM_KLINE_CANDLES_PER_REQUEST * TIMEFRAME_MINUTES[timeframe] * ONE_MINUTE_IN_MILLISECONDS
+	return [(page_start, min(page_start + page_length - 1, end_timestamp))
+			for page_start in range(start_timestamp, end_timestamp, page_length)]
 
 
-def get_m1_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
-) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS)
-	all_m1_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_m1_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_m1_candles_list = klines(symbol=contract_symbol, interval="1m", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for m1_candle in current_time_range_m1_candles_list:
-			all_m1_candles_list.append(Candle(datetime.fromtimestamp(m1_candle[0] // 1000),
-											  m1_candle[1],
-											  m1_candle[2],
-											  m1_candle[3],
-											  m1_candle[4],
-											  m1_candle[5],
-											  datetime.fromtimestamp(m1_candle[6] // 1000)))
-	return (SUCCESSFUL, all_m1_candles_list)
-
-
-def get_m15_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
-) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 15 - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 15)
-	all_m15_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 15 + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 15 + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_m15_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_m15_candles_list = klines(symbol=contract_symbol, interval="15m", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for m15_candle in current_time_range_m15_candles_list:
-			all_m15_candles_list.append(Candle(datetime.fromtimestamp(m15_candle[0] // 1000),
-											   m15_candle[1],
-											   m15_candle[2],
-											   m15_candle[3],
-											   m15_candle[4],
-											   m15_candle[5],
-											   datetime.fromtimestamp(m15_candle[6] // 1000)))
-	return (SUCCESSFUL, all_m15_candles_list)
-
-
-def get_h1_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
-) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60)
-	all_h1_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_h1_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_h1_candles_list = klines(symbol=contract_symbol, interval="1h", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for h1_candle in current_time_range_h1_candles_list:
-			all_h1_candles_list.append(Candle(datetime.fromtimestamp(h1_candle[0] // 1000),
-											  h1_candle[1],
-											  h1_candle[2],
-											  h1_candle[3],
-											  h1_candle[4],
-											  h1_candle[5],
-											  datetime.fromtimestamp(h1_candle[6] // 1000)))
-	return (SUCCESSFUL, all_h1_candles_list)
-
-
-def get_h2_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
-) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 2 - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 2)
-	all_h2_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 2 + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 2 + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_h2_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_h2_candles_list = klines(symbol=contract_symbol, interval="2h", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for h2_candle in current_time_range_h2_candles_list:
-			all_h2_candles_list.append(Candle(datetime.fromtimestamp(h2_candle[0] // 1000),
-									   h2_candle[1],
-									   h2_candle[2],
-									   h2_candle[3],
-									   h2_candle[4],
-									   h2_candle[5],
-									   datetime.fromtimestamp(h2_candle[6] // 1000)))
-	return (SUCCESSFUL, all_h2_candles_list)
-
-
-def get_h4_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
-) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 4 - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 4)
-	all_h4_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 4 + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 4 + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_h4_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_h4_candles_list = klines(symbol=contract_symbol, interval="4h", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for h4_candle in current_time_range_h4_candles_list:
-			all_h4_candles_list.append(Candle(datetime.fromtimestamp(h4_candle[0] // 1000),
-											  h4_candle[1],
-											  h4_candle[2],
-											  h4_candle[3],
-											  h4_candle[4],
-											  h4_candle[5],
-											  datetime.fromtimestamp(h4_candle[6] // 1000)))
-	return (SUCCESSFUL, all_h4_candles_list)
-
-
-def get_d1_candles(
-	contract_symbol: str, 
-	start_datetime: datetime, 
-	end_datetime: datetime
+@retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_klines_page: {e}") or (ERROR, convert_klines_to_candles([])))
+def get_klines_page(contract_symbol: str, timeframe: str, start_timestamp: int, end_timestamp: int) -> tuple:
+	return (SUCCESSFUL, convert_klines_to_candles(binance_futures_api.klines(symbol=contract_symbol,
+																			 interval=TIMEFRAME_INTERVALS[timeframe],
+																			 startTime=start_timestamp,
+																			 endTime=end_timestamp,
+																			 limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)))
+
+
+def get_klines(
+	contract_symbol: str,
+	timeframe: str,
+	start_timestamp: int,
+	end_timestamp: int
 ) -> tuple:
-	start_timestamp = int(start_datetime.timestamp() * 1000)
-	end_timestamp = int(end_datetime.timestamp() * 1000)
-	number_of_kline_candles_requests = (end_timestamp - start_timestamp + MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 24 - 1) // (MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 24)
-	all_d1_candles_list = []
-	for i in range(number_of_kline_candles_requests):
-		current_time_range_start = i * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 24 + start_timestamp
-		current_time_range_end = (i + 1) * MAXIMUM_KLINE_CANDLES_PER_REQUEST * ONE_MINUTE_IN_MILLISECONDS * 60 * 24 + start_timestamp - 1
-		current_time_range_start = max(current_time_range_start, start_timestamp)
-		current_time_range_start = min(current_time_range_start, end_timestamp)
-		current_time_range_end = max(current_time_range_end, start_timestamp)
-		current_time_range_end = min(current_time_range_end, end_timestamp)
-
-		klines = retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in get_d1_candles: {e}" or (ERROR, [])))(binance_futures_api.klines)
-		current_time_range_d1_candles_list = klines(symbol=contract_symbol, interval="1d", startTime=current_time_range_start, endTime=current_time_range_end, limit=MAXIMUM_KLINE_CANDLES_PER_REQUEST)
-
-		for d1_candle in current_time_range_d1_candles_list:
-			all_d1_candles_list.append(Candle(datetime.fromtimestamp(d1_candle[0] // 1000),
-											  d1_candle[1],
-											  d1_candle[2],
-											  d1_candle[3],
-											  d1_candle[4],
-											  d1_candle[5],
-											  datetime.fromtimestamp(d1_candle[6] // 1000)))
-	return (SUCCESSFUL, all_d1_candles_list)
-
-
-def update_recent_prices_list(
-	contract_symbol: str, 
-	current_time: datetime, 
+	"""
+	Download all klines of a timeframe between two timestamps (ms) as one candle batch
+	All pages are requested at once on kline_download_executor, then glued back together in time order
+	"""
+	page_windows = get_kline_page_windows(start_timestamp, end_timestamp, timeframe)
+	pages = list(kline_download_executor.map(lambda page_window: get_klines_page(contract_symbol, timeframe, *page_window), page_windows))
+	status = ERROR if any(page_status == ERROR for page_status, _ in pages) else SUCCESSFUL
+	# Neighbouring pages may share a boundary candle
+	return (status, concatenate_candles([candles for _, candles in pages]))
+
+
+def download_into_candle_store(
+	contract_symbol: str,
+	current_time: datetime,
+	candles_count: int,
+	timeframe: str,
+	start_timestamp: int = None
+) -> int:
+	"""
+	Download only the candles closed since the last stored one (or a first history of candles_count candles)
+	"""
+	candle_store = get_candle_store(contract_symbol, timeframe)
+	current_timestamp = int(current_time.timestamp() * 1000)
+	if len(candle_store):
+		start_timestamp = candle_store.last_close_time() + 1
+	elif start_timestamp is None:
+		start_timestamp = current_timestamp - (candles_count + 10) * TIMEFRAME_MINUTES[timeframe] * ONE_MINUTE_IN_MILLISECONDS
+	status, candles = get_klines(contract_symbol, timeframe, start_timestamp, current_timestamp)
+	candle_store.append(candles, closed_before=current_timestamp)
+	return status
+
+
+def update_candle_store(
+	contract_symbol: str,
+	current_time: datetime,
 	candles_count: int,
 	timeframe: str
-) -> None:
+) -> int:
+	"""
+	Bring the candle store of timeframe up to current_time
+	"""
+	return update_candle_stores(contract_symbol, current_time, candles_count, [timeframe])
 
-	global recent_m1_open_prices_list
-	global recent_m1_high_prices_list
-	global recent_m1_low_prices_list
-	global recent_m1_close_prices_list
-
-	global recent_m15_open_prices_list
-	global recent_m15_high_prices_list
-	global recent_m15_low_prices_list
-	global recent_m15_close_prices_list
-
-	global recent_h1_open_prices_list
-	global recent_h1_high_prices_list
-	global recent_h1_low_prices_list
-	global recent_h1_close_prices_list
-
-	global recent_h2_open_prices_list
-	global recent_h2_high_prices_list
-	global recent_h2_low_prices_list
-	global recent_h2_close_prices_list
-
-	global recent_h4_open_prices_list
-	global recent_h4_high_prices_list
-	global recent_h4_low_prices_list
-	global recent_h4_close_prices_list
-
-	global recent_d1_open_prices_list
-	global recent_d1_high_prices_list
-	global recent_d1_low_prices_list
-	global recent_d1_close_prices_list
-
-	if timeframe == "m1":
-		start_time = current_time - timedelta(minutes=candles_count + 10)
-		end_time = current_time
-		recent_candles_list = get_m1_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_m1_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_m1_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_m1_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_m1_close_prices_list = [float(candle.close) for candle in recent_candles_list]
-	if timeframe == "m15":
-		start_time = current_time - timedelta(minutes=(candles_count + 10) * 15)
-		end_time = current_time
-		recent_candles_list = get_m15_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_m15_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_m15_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_m15_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_m15_close_prices_list = [float(candle.close) for candle in recent_candles_list]
-	if timeframe == "h1":
-		start_time = current_time - timedelta(minutes=(candles_count + 10) * 60)
-		end_time = current_time
-		recent_candles_list = get_h1_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_h1_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_h1_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_h1_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_h1_close_prices_list = [float(candle.close) for candle in recent_candles_list]
-	if timeframe == "h2":
-		start_time = current_time - timedelta(minutes=(candles_count + 10) * 60 * 2)
-		end_time = current_time
-		recent_candles_list = get_h2_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_h2_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_h2_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_h2_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_h2_close_prices_list = [float(candle.close) for candle in recent_candles_list]
-	if timeframe == "h4":
-		start_time = current_time - timedelta(minutes=(candles_count + 10) * 60 * 4)
-		end_time = current_time
-		recent_candles_list = get_h4_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_h4_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_h4_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_h4_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_h4_close_prices_list = [float(candle.close) for candle in recent_candles_list]
-	if timeframe == "d1":
-		start_time = current_time - timedelta(minutes=(candles_count + 10) * 60 * 24)
-		end_time = current_time
-		recent_candles_list = get_d1_candles(contract_symbol, start_time, end_time)[1][:-1][-candles_count:]
-		recent_d1_open_prices_list = [float(candle.open) for candle in recent_candles_list]
-		recent_d1_high_prices_list = [float(candle.high) for candle in recent_candles_list]
-		recent_d1_low_prices_list = [float(candle.low) for candle in recent_candles_list]
-		recent_d1_close_prices_list = [float(candle.close) for candle in recent_candles_list]
+
+def update_candle_stores(
+	contract_symbol: str,
+	current_time: datetime,
+	candles_count: int,
+	timeframes: list
+) -> int:
+	"""
+	Bring the candle stores of timeframes of one pair up to current_time
+	With RESAMPLE_FROM_M1 only the first history of a higher timeframe is downloaded as it is, after that
+	its candles are built from the m1 store, so one m1 feed per pair serves every timeframe
+	A new m1 store starts at the earliest last close among them, so the candle a bigger timeframe still has open
+	is built from all of its minutes
+	"""
+	if not RESAMPLE_FROM_M1:
+		statuses = [download_into_candle_store(contract_symbol, current_time, candles_count, timeframe) for timeframe in timeframes]
+		return ERROR if ERROR in statuses else SUCCESSFUL
+	resampled_timeframes = [timeframe for timeframe in timeframes if timeframe != "m1"]
+	statuses = []
+	for timeframe in resampled_timeframes:
+		if len(get_candle_store(contract_symbol, timeframe)) == 0:
+			statuses.append(download_into_candle_store(contract_symbol, current_time, candles_count, timeframe))
+	if resampled_timeframes:
+		m1_candles_count = candles_count * max(TIMEFRAME_MINUTES[timeframe] for timeframe in resampled_timeframes)
+		m1_start_timestamp = min(get_candle_store(contract_symbol, timeframe).last_close_time() for timeframe in resampled_timeframes) + 1
+	else:
+		m1_candles_count = candles_count
+		m1_start_timestamp = 0
+	# An empty store's last close is -1
+	statuses.append(download_into_candle_store(contract_symbol, current_time, m1_candles_count, "m1",
+											   start_timestamp=m1_start_timestamp or None))
+	for timeframe in resampled_timeframes:
+		resample_into_candle_store(contract_symbol, timeframe)
+	return ERROR if ERROR in statuses else SUCCESSFUL
 
 
 def load_orders_dict() -> None:
@@ -369,71 +262,106 @@ def save_orders_dict() -> None:
 
 def save_orders_dict_to_file(filename : str = ORDERS_DICT_FILENAME) -> None:
 	global orders_dict
-	with open(filename, 'wb') as handle:
+	with orders_dict_lock, open(filename, 'wb') as handle:
 		pickle.dump(orders_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 def update_orders_dict(current_time: datetime, key: str, value: str) -> None:
 	global orders_dict
-	orders_dict["timestamp"] = current_time
-	orders_dict[key] = value
+	with orders_dict_lock:
+		orders_dict["timestamp"] = current_time
+		orders_dict[key] = value
 
 
-def load_indicators_dict() -> None:
-	global indicators_dict
-	indicators_dict = load_indicators_dict_from_file(INDICATORS_DICT_FILENAME)
+def evaluate_indicator(contract_symbol: str, timeframe: str, name: str, params: tuple) -> dict:
+	"""
+	Values of one indicator after the last closed candle of (symbol, timeframe)
+	They are worked out at most once per candle and then shared by every strategy and both directions
+	"""
+	last_close_time = get_candle_store(contract_symbol, timeframe).last_close_time()
+	cache_key = (contract_symbol, timeframe, name, params)
+	cached_evaluation = indicator_evaluation_cache.get(cache_key)
+	if cached_evaluation is not None and cached_evaluation[0] == last_close_time:
+		return cached_evaluation[1]
+	key = get_indicator_key(name, params)
+	indicator = streaming_indicator_store.get(contract_symbol, timeframe, key, lambda: create_streaming_indicator(name, params))
+	last_open_time = indicator.last_open_time
+	indicator.update_with_candles(get_candle_store(contract_symbol, timeframe).since(last_open_time))
+	if indicator.last_open_time != last_open_time:
+		streaming_indicator_store.save(contract_symbol, timeframe, key)
+	indicator_values = indicator.get_values()
+	indicator_evaluation_cache[cache_key] = (last_close_time, indicator_values)
+	return indicator_values
+
+
+def update_streaming_indicators(contract_symbol: str, timeframe: str, strategy_settings: list) -> dict:
+	"""
+	Evaluate every indicator the strategies trading on this timeframe need, right after its candle closed
+	An indicator seen for the first time starts from the whole stored history, after that each candle costs O(1)
+	"""
+	streaming_indicators = {}
+	for strategy_id, settings in enumerate(strategy_settings):
+		if not settings["enabled"] or get_strategy_timeframe(contract_symbol, settings) != timeframe:
+			continue
+		for name, params in get_strategy_indicators(strategy_id, settings):
+			streaming_indicators[get_indicator_key(name, params)] = evaluate_indicator(contract_symbol, timeframe, name, params)
+	return streaming_indicators
 
 
-def load_indicators_dict_from_file(filename: str = INDICATORS_DICT_FILENAME) -> list:
-	global indicators_dict
-	with open(filename, 'rb') as handle:
-		return pickle.load(handle)
+def create_indicators_dict(contract_symbol: str, timeframe: str) -> dict:
+	"""
+	Fresh EMA/MACD state, or the one from the old single indicators_dict file if it belongs to this pair
+	"""
+	if contract_symbol == CONTRACT_SYMBOL and timeframe == TIMEFRAME:
+		try:
+			with open(INDICATORS_DICT_FILENAME, 'rb') as handle:
+				return pickle.load(handle)
+		except FileNotFoundError:
+			pass
+	return {"candle_open_timestamp": 0, "candle_close_timestamp": 0, "candle_close_price": 0, **dict.fromkeys(INDICATOR_NAMES, 0)}
 
 
-def save_indicators_dict() -> None:
-	save_indicators_dict_to_file(INDICATORS_DICT_FILENAME)
+def get_indicators_dict(contract_symbol: str, timeframe: str) -> dict:
+	return indicator_state_store.get(contract_symbol, timeframe, "indicators_dict",
+									 lambda: create_indicators_dict(contract_symbol, timeframe))
 
 
-def save_indicators_dict_to_file(filename: str = INDICATORS_DICT_FILENAME) -> None:
-	global indicators_dict
-	with open(filename, 'wb') as handle:
-		pickle.dump(indicators_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
+def save_indicators_dict(contract_symbol: str = CONTRACT_SYMBOL, timeframe: str = TIMEFRAME) -> None:
+	indicator_state_store.save(contract_symbol, timeframe, "indicators_dict")
 
 
 def update_indicators_dict(
 	contract_symbol: str,
 	current_time: datetime, 
 	timeframe: str
-) -> None:
-	global indicators_dict
-	if timeframe == "m1":
-		candles_list = get_m1_candles(contract_symbol, datetime.fromtimestamp(indicators_dict["candle_close_timestamp"]), current_time)[1]
-	if timeframe == "m15":
-		candles_list = get_m15_candles(contract_symbol, datetime.fromtimestamp(indicators_dict["candle_close_timestamp"]), current_time)[1]
-	if timeframe == "h1":
-		candles_list = get_h1_candles(contract_symbol, datetime.fromtimestamp(indicators_dict["candle_close_timestamp"]), current_time)[1]
-	close_prices_list = [candle.close for candle in candles_list]
-	open_times_list = [candle.open_time for candle in candles_list]
-	close_times_list = [candle.close_time for candle in candles_list]
-	_ema_50 = indicators_dict["ema_50"]
-	_ema_40 = indicators_dict["ema_40"]
-	_ema_30 = indicators_dict["ema_30"]
-	_ema_20 = indicators_dict["ema_20"]
-	_ema_10 = indicators_dict["ema_10"]
-	_macd_ema_12 = indicators_dict["macd_ema_12"]
-	_macd_ema_26 = indicators_dict["macd_ema_26"]
-	_macd_line = indicators_dict["macd_line"]
-	_signal_line = indicators_dict["signal_line"]
+) -> dict:
+	"""
+	Bring the EMA/MACD state of one (symbol, timeframe) up to its last stored candle and save it
+	"""
+	pair_indicators_dict = get_indicators_dict(contract_symbol, timeframe)
+	new_candles = get_candle_store(contract_symbol, timeframe).since(int(pair_indicators_dict["candle_close_timestamp"] * 1000))
+	close_prices_list = new_candles["close"].tolist()
+	open_times_list = new_candles["open_time"].tolist()
+	close_times_list = new_candles["close_time"].tolist()
+	if not close_prices_list:
+		return pair_indicators_dict
+	if pair_indicators_dict["candle_close_timestamp"] == 0:
+		# Never updated before, so start every EMA from the first price instead of from 0
+		for indicator_name in INDICATOR_NAMES:
+			pair_indicators_dict[indicator_name] = close_prices_list[0] if "ema" in indicator_name else 0
+	_ema_50 = pair_indicators_dict["ema_50"]
+	_ema_40 = pair_indicators_dict["ema_40"]
+	_ema_30 = pair_indicators_dict["ema_30"]
+	_ema_20 = pair_indicators_dict["ema_20"]
+	_ema_10 = pair_indicators_dict["ema_10"]
+	_macd_ema_12 = pair_indicators_dict["macd_ema_12"]
+	_macd_ema_26 = pair_indicators_dict["macd_ema_26"]
+	_macd_line = pair_indicators_dict["macd_line"]
+	_signal_line = pair_indicators_dict["signal_line"]
 	for i in range(len(close_prices_list)):
-		_close_price = round(float(close_prices_list[i]), PRICE_DECIMAL_DIGITS)
-		_open_time = open_times_list[i].timestamp()
-		_close_time = close_times_list[i].timestamp()
-		if timeframe == "m1" and current_time - timedelta(minutes=1) < datetime.fromtimestamp(_open_time):
-			break
-		if timeframe == "m15" and current_time - timedelta(minutes=15) < datetime.fromtimestamp(_open_time):
-			break
-		if timeframe == "h1" and current_time - timedelta(minutes=60) < datetime.fromtimestamp(_open_time):
-			break
+		_close_price = round(close_prices_list[i], PRICE_DECIMAL_DIGITS)
+		_open_time = open_times_list[i] // 1000
+		_close_time = close_times_list[i] // 1000
 		_ema_50 = round(get_new_ema(_ema_50, _close_price, 50), INDICATORS_DECIMAL_DIGITS)
 		_ema_40 = round(get_new_ema(_ema_40, _close_price, 40), INDICATORS_DECIMAL_DIGITS)
 		_ema_30 = round(get_new_ema(_ema_30, _close_price, 30), INDICATORS_DECIMAL_DIGITS)
@@ -443,20 +371,22 @@ def update_indicators_dict(
 		_macd_ema_26 = round(get_new_ema(_macd_ema_26, _close_price, 26), INDICATORS_DECIMAL_DIGITS)
 		_macd_line = round(_macd_ema_12 - _macd_ema_26, INDICATORS_DECIMAL_DIGITS)
 		_signal_line = round(get_new_ema(_signal_line, _macd_line, 9), INDICATORS_DECIMAL_DIGITS)
-		indicators_dict = {
-			"candle_open_timestamp": _open_time,
-			"candle_close_timestamp": _close_time,
-			"candle_close_price": _close_price,
-			"ema_50": _ema_50,
-			"ema_40": _ema_40,
-			"ema_30": _ema_30,
-			"ema_20": _ema_20,
-			"ema_10": _ema_10,
-			"macd_ema_12": _macd_ema_12,
-			"macd_ema_26": _macd_ema_26,
-			"macd_line": _macd_line,
-			"signal_line": _signal_line,
-		}
+	pair_indicators_dict.update({
+		"candle_open_timestamp": _open_time,
+		"candle_close_timestamp": _close_time,
+		"candle_close_price": _close_price,
+		"ema_50": _ema_50,
+		"ema_40": _ema_40,
+		"ema_30": _ema_30,
+		"ema_20": _ema_20,
+		"ema_10": _ema_10,
+		"macd_ema_12": _macd_ema_12,
+		"macd_ema_26": _macd_ema_26,
+		"macd_line": _macd_line,
+		"signal_line": _signal_line,
+	})
+	save_indicators_dict(contract_symbol, timeframe)
+	return pair_indicators_dict
 
 
 def update_account_balance_and_unrealized_profit(first_coin_symbol: str) -> int:
@@ -471,6 +401,21 @@ def update_account_balance_and_unrealized_profit(first_coin_symbol: str) -> int:
 		last_account_available_balances_list = last_account_available_balances_list[-LAST_ACCOUNT_BALANCES_LIST_MAX_LENGTH:]
 	if len(last_total_account_balances_list) > LAST_ACCOUNT_BALANCES_LIST_MAX_LENGTH:
 		last_total_account_balances_list = last_total_account_balances_list[-LAST_ACCOUNT_BALANCES_LIST_MAX_LENGTH:]
+	if user_data_stream.is_live() and account_book.get_balance(first_coin_symbol) is not None:
+		# The wallet balance comes from the events, the available balance from the last resync
+		balance_dict = account_book.get_balance(first_coin_symbol)
+		account_available_balance = float(balance_dict.get("availableBalance", 0))
+		total_account_balance = float(balance_dict["balance"])
+		# Unrealized profit moves with the mark price and the stream only tells it on ACCOUNT_UPDATE, so it is still asked for
+		for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
+			try:
+				unrealized_profit = sum(float(position["unRealizedProfit"])
+										for position in binance_futures_api.get_position_risk(timestamp=get_local_timestamp()))
+				return SUCCESSFUL
+			except:
+				pass
+		logging.error("ERROR in update_account_balance_and_unrealized_profit")
+		return ERROR
 	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
 		try:
 			balance_list = binance_futures_api.balance()
@@ -497,7 +442,10 @@ def update_contract_last_price(contract_symbol: str) -> int:
 
 @retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in close_all_open_positions_market_price: {e}") or ERROR)
 def close_all_open_positions_market_price() -> int:
-	all_open_positions = binance_futures_api.get_position_risk(timestamp=get_local_timestamp())
+	if user_data_stream.is_live():
+		all_open_positions = account_book.get_positions()
+	else:
+		all_open_positions = binance_futures_api.get_position_risk(timestamp=get_local_timestamp())
 	for position in all_open_positions:
 		position_quantity = float(position["positionAmt"])
 		if position_quantity == 0.0:
@@ -524,77 +472,15 @@ def close_all_open_positions_market_price() -> int:
 	return SUCCESSFUL
 
 
-def init_bot() -> None:
-	global binance_futures_api
-	
-	if IS_TESTNET:
-		binance_futures_api = UMFutures(key=API_KEY_TESTNET, secret=SECRET_KEY_TESTNET, base_url=URL_BASE_TESTNET)
-	else:
-		binance_futures_api = UMFutures(key=API_KEY_PRODUCTION, secret=SECRET_KEY_PRODUCTION, base_url=URL_BASE_PRODUCTION)
-		
-def update_is_price_increasing(
-	price_direction_indicator_name_1: str, 
-	price_direction_indicator_name_2: str
-) -> None:
-	global last_is_price_increasing
-	global is_price_increasing
-	global indicators_dict
-	global contract_last_price
-	last_is_price_increasing = is_price_increasing
-	is_price_increasing = indicators_dict[price_direction_indicator_name_1] > indicators_dict[price_direction_indicator_name_2]
-
-
-def update_is_price_decreasing(
-	price_direction_indicator_name_1: str,
-	price_direction_indicator_name_2: str
-) -> None:
-	global last_is_price_decreasing
-	global is_price_decreasing
-	global indicators_dict
-	global contract_last_price
-	last_is_price_decreasing = is_price_decreasing
-	is_price_decreasing = indicators_dict[price_direction_indicator_name_1] < indicators_dict[price_direction_indicator_name_2]
-
-
-def update_is_macd_increasing() -> None:
-	global last_is_macd_increasing
-	global is_macd_increasing
-	global indicators_dict
-	last_is_macd_increasing = is_macd_increasing
-	is_macd_increasing = indicators_dict["macd_line"] > indicators_dict["signal_line"]
-
-
-def update_is_macd_decreasing() -> None:
-	global last_is_macd_decreasing
-	global is_macd_decreasing
-	global indicators_dict
-	global contract_last_price
-	last_is_macd_decreasing = is_macd_decreasing
-	is_macd_decreasing = indicators_dict["macd_line"] < indicators_dict["signal_line"]
-
-
-def update_is_macd_positive() -> None:
-	global last_is_macd_positive
-	global is_macd_positive
-	global indicators_dict
-	last_is_macd_positive = is_macd_positive
-	is_macd_positive = indicators_dict["macd_line"] > 0
-
-
-def update_is_macd_negative() -> None:
-	global last_is_macd_negative
-	global is_macd_negative
-	global indicators_dict
-	global contract_last_price
-	last_is_macd_negative = is_macd_negative
-	is_macd_negative = indicators_dict["macd_line"] < 0
-
-
 @retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in is_take_profit_unexecuted: {e}") or (ERROR, False))
 def is_take_profit_unexecuted(contract_symbol: str, strategy_id: int) -> tuple:
 	order_id = orders_dict.get("strategy" + str(strategy_id) + "_last_take_profit_order_id", -1)
 	if int(order_id) == -1:
 		return (SUCCESSFUL, False)
+	if user_data_stream.is_live():
+		return (SUCCESSFUL, account_book.is_order_open(contract_symbol, order_id))
+	if open_orders_snapshot.is_fresh():
+		return (SUCCESSFUL, open_orders_snapshot.is_order_open(contract_symbol, order_id))
 	order = binance_futures_api.query_order(symbol=contract_symbol, orderId=order_id, timestamp=get_local_timestamp())
 	if order["status"] == "FILLED" or order["status"] == "EXPIRED" or order["status"] == "CANCELED":
 		return (SUCCESSFUL, False)
@@ -607,6 +493,10 @@ def is_stop_loss_unexecuted(contract_symbol: str, strategy_id: int) -> tuple:
 	order_id = orders_dict.get("strategy" + str(strategy_id) + "_last_stop_loss_order_id", -1)
 	if int(order_id) == -1:
 		return (SUCCESSFUL, False)
+	if user_data_stream.is_live():
+		return (SUCCESSFUL, account_book.is_order_open(contract_symbol, order_id))
+	if open_orders_snapshot.is_fresh():
+		return (SUCCESSFUL, open_orders_snapshot.is_order_open(contract_symbol, order_id))
 	order = binance_futures_api.query_order(symbol=contract_symbol, orderId=order_id, timestamp=get_local_timestamp())
 	if order["status"] == "FILLED" or order["status"] == "EXPIRED" or order["status"] == "CANCELED":
 		return (SUCCESSFUL, False)
@@ -615,6 +505,8 @@ def is_stop_loss_unexecuted(contract_symbol: str, strategy_id: int) -> tuple:
 
 
 def is_position_active(contract_symbol: str, strategy_id: int) -> bool:
+	if (contract_symbol, strategy_id) in pending_entries:
+		return True
 	return is_take_profit_unexecuted(contract_symbol, strategy_id)[1] and is_stop_loss_unexecuted(contract_symbol, strategy_id)[1]
 
 
@@ -630,32 +522,48 @@ def cancel_extra_open_order(contract_symbol: str, strategy_id: int) -> int:
 
 	if order_id is not None:
 		binance_futures_api.cancel_order(symbol=contract_symbol, orderId=order_id, timestamp=get_local_timestamp())
+		open_orders_snapshot.remove_order(contract_symbol, order_id)
 		send_cancel_order_message(order_id)
 	return SUCCESSFUL
 
 
+def get_strategy_indicators(strategy_id: int, strategy_settings: dict) -> list:
+	"""
+	The (name, params) of every streaming indicator a strategy looks at
+	"""
+	if strategy_id in [0, 1]:  # Price Movement Strategies
+		return [("ema", (strategy_settings["ema_fast"],)), ("ema", (strategy_settings["ema_slow"],))]
+	elif strategy_id in [2, 3]:  # MACD Strategies
+		return [("macd", (strategy_settings["macd_fast"], strategy_settings["macd_slow"], strategy_settings["macd_signal"]))]
+	elif strategy_id == 4:  # RSI Strategy
+		return [("rsi", (strategy_settings["rsi_period"],))]
+	return []
+
+
+def get_streaming_indicator(indicators_dict: dict, name: str, params: tuple) -> dict:
+	return evaluate_indicator(indicators_dict["contract_symbol"], indicators_dict["timeframe"], name, params)
+
+
 def is_it_time_to_open_long_position(strategy_id: int, indicators_dict: dict, strategy_settings: dict) -> bool:
 	"""
 	Check if it's time to buy (go long) based on the strategy settings
 	"""
 	if strategy_id in [0, 1]:  # Price Movement Strategies
-		fast_ema = get_ema(indicators_dict["close_prices"], strategy_settings["ema_fast"])
-		slow_ema = get_ema(indicators_dict["close_prices"], strategy_settings["ema_slow"])
+		fast_ema = get_streaming_indicator(indicators_dict, "ema", (strategy_settings["ema_fast"],))["value"]
+		slow_ema = get_streaming_indicator(indicators_dict, "ema", (strategy_settings["ema_slow"],))["value"]
 		return fast_ema > slow_ema
 	
 	elif strategy_id in [2, 3]:  # MACD Strategies
-		macd_line, signal_line = get_macd(
-			indicators_dict["close_prices"],
+		macd = get_streaming_indicator(indicators_dict, "macd", (
 			strategy_settings["macd_fast"],
 			strategy_settings["macd_slow"],
 			strategy_settings["macd_signal"]
-		)
-		return macd_line > signal_line
+		))
+		return macd["macd_line"] > macd["signal_line"]
 	
 	elif strategy_id == 4:  # RSI Strategy
-		current_rsi = get_rsi(indicators_dict["close_prices"], strategy_settings["rsi_period"])
-		previous_rsi = get_rsi(indicators_dict["close_prices"][:-1], strategy_settings["rsi_period"])
-		return previous_rsi < strategy_settings["rsi_oversold"] and current_rsi >= strategy_settings["rsi_oversold"]
+		rsi = get_streaming_indicator(indicators_dict, "rsi", (strategy_settings["rsi_period"],))
+		return rsi["previous_value"] < strategy_settings["rsi_oversold"] and rsi["value"] >= strategy_settings["rsi_oversold"]
 	
 	return False
 
@@ -665,37 +573,25 @@ def is_it_time_to_open_short_position(strategy_id: int, indicators_dict: dict, s
 	Check if it's time to sell (go short) based on the strategy settings
 	"""
 	if strategy_id in [0, 1]:  # Price Movement Strategies
-		fast_ema = get_ema(indicators_dict["close_prices"], strategy_settings["ema_fast"])
-		slow_ema = get_ema(indicators_dict["close_prices"], strategy_settings["ema_slow"])
+		fast_ema = get_streaming_indicator(indicators_dict, "ema", (strategy_settings["ema_fast"],))["value"]
+		slow_ema = get_streaming_indicator(indicators_dict, "ema", (strategy_settings["ema_slow"],))["value"]
 		return fast_ema < slow_ema
 	
 	elif strategy_id in [2, 3]:  # MACD Strategies
-		macd_line, signal_line = get_macd(
-			indicators_dict["close_prices"],
+		macd = get_streaming_indicator(indicators_dict, "macd", (
 			strategy_settings["macd_fast"],
 			strategy_settings["macd_slow"],
 			strategy_settings["macd_signal"]
-		)
-		return macd_line < signal_line
+		))
+		return macd["macd_line"] < macd["signal_line"]
 	
 	elif strategy_id == 4:  # RSI Strategy
-		current_rsi = get_rsi(indicators_dict["close_prices"], strategy_settings["rsi_period"])
-		previous_rsi = get_rsi(indicators_dict["close_prices"][:-1], strategy_settings["rsi_period"])
-		return previous_rsi > strategy_settings["rsi_overbought"] and current_rsi <= strategy_settings["rsi_overbought"]
+		rsi = get_streaming_indicator(indicators_dict, "rsi", (strategy_settings["rsi_period"],))
+		return rsi["previous_value"] > strategy_settings["rsi_overbought"] and rsi["value"] <= strategy_settings["rsi_overbought"]
 	
 	return False
 
 
-def is_it_time_to_update_and_trade(current_time: datetime) -> bool:
-	return int(current_time.minute) == 0 and HANDLING_POSITIONS_TIME_SECOND <= int(
-		current_time.second) % 60 <= HANDLING_POSITIONS_TIME_SECOND + 1
-
-
-def is_it_time_to_cancel_extra_open_orders(current_time: datetime) -> bool:
-	return int(current_time.minute) % 5 == 0 and HANDLING_POSITIONS_TIME_SECOND <= int(
-		current_time.second) % 60 <= HANDLING_POSITIONS_TIME_SECOND + 1
-
-
 @retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in cancel_symbol_open_orders: {e}") or ERROR)
 def cancel_symbol_open_orders(contract_symbol: str) -> int:
 	binance_futures_api.cancel_open_orders(symbol=contract_symbol)
@@ -705,6 +601,10 @@ def cancel_symbol_open_orders(contract_symbol: str) -> int:
 
 @retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in set_leverage: {e}") or ERROR)
 def set_leverage(contract_symbol: str, leverage: int) -> int:
+	max_leverage = exchange_info.get_max_leverage(contract_symbol)
+	if max_leverage is not None and leverage > max_leverage:
+		logging.warning(f"WARNING in set_leverage: {contract_symbol} allows at most {max_leverage}x")
+		leverage = max_leverage
 	binance_futures_api.change_leverage(symbol=contract_symbol, leverage=leverage, timestamp=get_local_timestamp())
 	return SUCCESSFUL
 
@@ -725,8 +625,8 @@ def open_long_position(
 	logging.info("=" * 60)
 	logging.info("open_long_position for strategy #" + str(strategy_id))
 	market_order_created = False
-	position_quantity = round_down(WALLET_USAGE_PERCENT / 100 / STRATEGIES_COUNT * first_coin_amount / contract_last_price, POSITION_QUANTITY_DECIMAL_DIGITS)
-	if position_quantity < 10 ** (-POSITION_QUANTITY_DECIMAL_DIGITS):
+	position_quantity = exchange_info.round_quantity_down(contract_symbol, WALLET_USAGE_PERCENT / 100 / STRATEGIES_COUNT * first_coin_amount / contract_last_price)
+	if exchange_info.is_order_too_small(contract_symbol, position_quantity, contract_last_price):
 		logging.info("=" * 60)
 		return SUCCESSFUL
 	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
@@ -739,65 +639,33 @@ def open_long_position(
 														 quantity=position_quantity,
 														 type="MARKET",
 														 newClientOrderId=NEW_CLIENT_ORDER_ID_PREFIX + str(get_local_timestamp())[-10:],
+														 newOrderRespType="RESULT",
 														 timestamp=get_local_timestamp())
 			send_new_order_message(contract_symbol, "BUY", position_quantity)
 			send_open_long_position_message(order_id)
 			update_orders_dict(get_local_timestamp(), order_id, market_order["orderId"])
 			market_order_created = True
 			break
+		except ClientError as e:
+			# Rejected by Binance, sending the same order again would only be rejected again
+			logging.error(f"ERROR in open_long_position: {e}")
+			break
 		except:
 			pass
 	if not market_order_created:
 		logging.error("ERROR in open_long_position")
 		logging.info("=" * 60)
 		return ERROR
-	sleep(4 * SLEEP_INTERVAL)
-	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
-		try:
-			position_entry_price = contract_last_price
-			market_order = binance_futures_api.query_order(symbol=contract_symbol, orderId=market_order["orderId"], timestamp=get_local_timestamp())
-			try:
-				if float(market_order["avgPrice"]) > 0:
-					position_entry_price = contract_last_price
-			except:
-				pass
-			take_profit_price = round((1 + take_profit_percent / 100) * position_entry_price, PRICE_DECIMAL_DIGITS)
-			stop_loss_price = round((1 + stop_loss_percent / 100) * position_entry_price, PRICE_DECIMAL_DIGITS)
-			take_profit_price_limit = round(take_profit_price - 10 ** (-PRICE_DECIMAL_DIGITS), PRICE_DECIMAL_DIGITS)
-			stop_loss_price_limit = round(stop_loss_price - 10 ** (-PRICE_DECIMAL_DIGITS), PRICE_DECIMAL_DIGITS)
-			take_profit_order = binance_futures_api.new_order(symbol=contract_symbol,
-															  side="SELL",
-															  positionSide="LONG",
-															  type="TAKE_PROFIT_MARKET",
-															  stopPrice=take_profit_price,
-															  quantity=position_quantity,
-															  timestamp=get_local_timestamp())
-			send_new_order_message(contract_symbol, "SELL", position_quantity)
-			send_open_long_position_message("strategy" + str(strategy_id) + "_last_take_profit_order_id")
-			stop_loss_order = binance_futures_api.new_order(symbol=contract_symbol,
-															side="SELL",
-															positionSide="LONG",
-															type="STOP_MARKET",
-															stopPrice=stop_loss_price,
-															quantity=position_quantity,
-															timestamp=get_local_timestamp())
-			send_new_order_message(contract_symbol, "SELL", position_quantity)
-			send_open_long_position_message("strategy" + str(strategy_id) + "_last_stop_loss_order_id")
-			update_orders_dict(get_local_timestamp(), "strategy" + str(strategy_id) + "_last_take_profit_order_id", take_profit_order["orderId"])
-			update_orders_dict(get_local_timestamp(), "strategy" + str(strategy_id) + "_last_stop_loss_order_id", stop_loss_order["orderId"])
-			logging.info("get_local_timestamp:", get_local_timestamp())
-			logging.info("position_entry_price:", position_entry_price)
-			logging.info("take_profit_price:", take_profit_price)
-			logging.info("stop_loss_price:", stop_loss_price)
-			logging.info("take_profit_price_limit:", take_profit_price_limit)
-			logging.info("stop_loss_price_limit:", stop_loss_price_limit)
-			logging.info("=" * 60)
-			return SUCCESSFUL
-		except:
-			pass
-	logging.error("ERROR in open_long_position")
+	if market_order["status"] == "FILLED":
+		status = protect_position(contract_symbol, "LONG", market_order, contract_last_price, take_profit_percent, stop_loss_percent, strategy_id)
+	else:
+		# Not filled yet, so the trading loop goes on with the other pairs while the fill is waited for
+		pending_entries.add((contract_symbol, strategy_id))
+		order_fill_executor.submit(protect_position, contract_symbol, "LONG", market_order, contract_last_price,
+								   take_profit_percent, stop_loss_percent, strategy_id)
+		status = SUCCESSFUL
 	logging.info("=" * 60)
-	return ERROR
+	return status
 
 
 def open_short_position(
@@ -810,8 +678,8 @@ def open_short_position(
 	logging.info("=" * 60)
 	logging.info("open_short_position for strategy #" + str(strategy_id))
 	market_order_created = False
-	position_quantity = round_down(WALLET_USAGE_PERCENT / 100 / STRATEGIES_COUNT * first_coin_amount / contract_last_price, POSITION_QUANTITY_DECIMAL_DIGITS)
-	if position_quantity < 10 ** (-POSITION_QUANTITY_DECIMAL_DIGITS):
+	position_quantity = exchange_info.round_quantity_down(contract_symbol, WALLET_USAGE_PERCENT / 100 / STRATEGIES_COUNT * first_coin_amount / contract_last_price)
+	if exchange_info.is_order_too_small(contract_symbol, position_quantity, contract_last_price):
 		logging.info("=" * 60)
 		return SUCCESSFUL
 	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
@@ -824,94 +692,304 @@ def open_short_position(
 														 quantity=position_quantity,
 														 type="MARKET",
 														 newClientOrderId=NEW_CLIENT_ORDER_ID_PREFIX + str(get_local_timestamp())[-10:],
+														 newOrderRespType="RESULT",
 														 timestamp=get_local_timestamp())
 			send_new_order_message(contract_symbol, "SELL", position_quantity)
 			send_open_short_position_message(order_id)
 			update_orders_dict(get_local_timestamp(), order_id, market_order["orderId"])
 			market_order_created = True
 			break
+		except ClientError as e:
+			# Rejected by Binance, sending the same order again would only be rejected again
+			logging.error(f"ERROR in open_short_position: {e}")
+			break
 		except:
 			pass
 	if not market_order_created:
 		logging.error("ERROR in open_short_position")
 		logging.info("=" * 60)
 		return ERROR
-	sleep(4 * SLEEP_INTERVAL)
-	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
+	if market_order["status"] == "FILLED":
+		status = protect_position(contract_symbol, "SHORT", market_order, contract_last_price, take_profit_percent, stop_loss_percent, strategy_id)
+	else:
+		# Not filled yet, so the trading loop goes on with the other pairs while the fill is waited for
+		pending_entries.add((contract_symbol, strategy_id))
+		order_fill_executor.submit(protect_position, contract_symbol, "SHORT", market_order, contract_last_price,
+								   take_profit_percent, stop_loss_percent, strategy_id)
+		status = SUCCESSFUL
+	logging.info("=" * 60)
+	return status
+
+
+def wait_for_order_fill(contract_symbol: str, order_id: int) -> dict:
+	"""
+	The market order once it is done, or None if that took longer than FILL_CONFIRMATION_TIMEOUT_SECONDS
+	With a live user data stream the fill event wakes us up, otherwise the order is polled, quickly at first
+	"""
+	deadline = monotonic() + FILL_CONFIRMATION_TIMEOUT_SECONDS
+	if user_data_stream.is_live():
+		order = account_book.wait_for_order(contract_symbol, order_id, FILL_CONFIRMATION_TIMEOUT_SECONDS)
+		if order is not None:
+			return order
+	poll_interval = FILL_POLL_INITIAL_INTERVAL_SECONDS
+	while True:
 		try:
-			position_entry_price = contract_last_price
-			market_order = binance_futures_api.query_order(symbol=contract_symbol, orderId=market_order["orderId"], timestamp=get_local_timestamp())
-			try:
-				if float(market_order["avgPrice"]) > 0:
-					position_entry_price = contract_last_price
-			except:
-				pass
-			take_profit_price = round((1 - take_profit_percent / 100) * position_entry_price, PRICE_DECIMAL_DIGITS)
-			stop_loss_price = round((1 - stop_loss_percent / 100) * position_entry_price, PRICE_DECIMAL_DIGITS)
-			take_profit_price_limit = round(take_profit_price + 10 ** (-PRICE_DECIMAL_DIGITS), PRICE_DECIMAL_DIGITS)
-			stop_loss_price_limit = round(stop_loss_price + 10 ** (-PRICE_DECIMAL_DIGITS), PRICE_DECIMAL_DIGITS)
-			take_profit_order = binance_futures_api.new_order(symbol=contract_symbol,
-															  side="BUY",
-															  positionSide="SHORT",
-															  type="TAKE_PROFIT_MARKET",
-															  stopPrice=take_profit_price,
-															  quantity=position_quantity,
-															  timestamp=get_local_timestamp())
-			send_new_order_message(contract_symbol, "BUY", position_quantity)
-			send_open_short_position_message("strategy" + str(strategy_id) + "_last_take_profit_order_id")
-			stop_loss_order = binance_futures_api.new_order(symbol=contract_symbol,
-															side="BUY",
-															positionSide="SHORT",
-															type="STOP_MARKET",
-															stopPrice=stop_loss_price,
-															quantity=position_quantity,
-															timestamp=get_local_timestamp())
-			send_new_order_message(contract_symbol, "BUY", position_quantity)
-			send_open_short_position_message("strategy" + str(strategy_id) + "_last_stop_loss_order_id")
-			update_orders_dict(get_local_timestamp(), "strategy" + str(strategy_id) + "_last_take_profit_order_id", take_profit_order["orderId"])
-			update_orders_dict(get_local_timestamp(), "strategy" + str(strategy_id) + "_last_stop_loss_order_id", stop_loss_order["orderId"])
-			logging.info("get_local_timestamp:", get_local_timestamp())
-			logging.info("position_entry_price:", position_entry_price)
-			logging.info("take_profit_price:", take_profit_price)
-			logging.info("stop_loss_price:", stop_loss_price)
-			logging.info("take_profit_price_limit:", take_profit_price_limit)
-			logging.info("stop_loss_price_limit:", stop_loss_price_limit)
-			logging.info("=" * 60)
+			order = binance_futures_api.query_order(symbol=contract_symbol, orderId=order_id, timestamp=get_local_timestamp())
+			if order["status"] not in OPEN_ORDER_STATUSES:
+				return order
+		except Exception as e:
+			logging.error(f"ERROR in wait_for_order_fill: {e}")
+		if monotonic() >= deadline:
+			return None
+		sleep(poll_interval)
+		poll_interval = min(poll_interval * 2, FILL_POLL_MAXIMUM_INTERVAL_SECONDS)
+
+
+def protect_position(
+	contract_symbol: str,
+	position_side: str,
+	market_order: dict,
+	last_price: float,
+	take_profit_percent: float,
+	stop_loss_percent: float,
+	strategy_id: int
+) -> int:
+	"""
+	Place the take profit and stop loss of a new position as soon as its market order is filled
+	They are priced from the average fill price and sized by the quantity that was really filled
+	"""
+	try:
+		if market_order["status"] != "FILLED":
+			market_order = wait_for_order_fill(contract_symbol, market_order["orderId"])
+			if market_order is None:
+				logging.error(f"ERROR in protect_position: order {contract_symbol} for strategy #{strategy_id} was not confirmed in time")
+				return ERROR
+		position_quantity = float(market_order["executedQty"])
+		if position_quantity <= 0:
+			logging.info(f"protect_position: order for strategy #{strategy_id} ended {market_order['status']} without a fill")
 			return SUCCESSFUL
-		except:
-			pass
-	logging.error("ERROR in open_short_position")
-	logging.info("=" * 60)
-	return ERROR
+		position_entry_price = float(market_order.get("avgPrice", 0)) or last_price
+		direction = 1 if position_side == "LONG" else -1
+		take_profit_price = exchange_info.round_price(contract_symbol, (1 + direction * take_profit_percent / 100) * position_entry_price)
+		stop_loss_price = exchange_info.round_price(contract_symbol, (1 + direction * stop_loss_percent / 100) * position_entry_price)
+		logging.info(f"position_entry_price:{position_entry_price}")
+		logging.info(f"take_profit_price:{take_profit_price}")
+		logging.info(f"stop_loss_price:{stop_loss_price}")
+		return place_bracket_orders(contract_symbol, position_side, position_quantity, take_profit_price, stop_loss_price, strategy_id,
+									market_order["orderId"])
+	finally:
+		pending_entries.discard((contract_symbol, strategy_id))
+		save_orders_dict()
+
+
+def get_bracket_order_client_id(entry_order_id: int, leg_name: str) -> str:
+	"""
+	The same client order id for a leg however often it is sent, so Binance can tell us whether it already has it
+	"""
+	return f"{NEW_CLIENT_ORDER_ID_PREFIX}_{entry_order_id}_{'tp' if leg_name == 'take_profit' else 'sl'}"
+
+
+def get_bracket_orders(
+	contract_symbol: str,
+	position_side: str,
+	position_quantity: float,
+	take_profit_price: float,
+	stop_loss_price: float,
+	entry_order_id: int
+) -> dict:
+	closing_side = "SELL" if position_side == "LONG" else "BUY"
+	# batchOrders wants every value as a string
+	return {
+		"take_profit": {
+			"symbol": contract_symbol,
+			"side": closing_side,
+			"positionSide": position_side,
+			"type": "TAKE_PROFIT_MARKET",
+			"stopPrice": format_number(take_profit_price),
+			"quantity": format_number(position_quantity),
+			"newClientOrderId": get_bracket_order_client_id(entry_order_id, "take_profit"),
+		},
+		"stop_loss": {
+			"symbol": contract_symbol,
+			"side": closing_side,
+			"positionSide": position_side,
+			"type": "STOP_MARKET",
+			"stopPrice": format_number(stop_loss_price),
+			"quantity": format_number(position_quantity),
+			"newClientOrderId": get_bracket_order_client_id(entry_order_id, "stop_loss"),
+		},
+	}
+
+
+def find_order_by_client_id(contract_symbol: str, client_order_id: str) -> dict:
+	"""
+	The order sent with client_order_id, or None if Binance never got it
+	"""
+	try:
+		return binance_futures_api.query_order(symbol=contract_symbol, origClientOrderId=client_order_id, timestamp=get_local_timestamp())
+	except ClientError as e:
+		# -2013: Order does not exist
+		if e.error_code == -2013:
+			return None
+		raise
+
+
+def place_bracket_orders(
+	contract_symbol: str,
+	position_side: str,
+	position_quantity: float,
+	take_profit_price: float,
+	stop_loss_price: float,
+	strategy_id: int,
+	entry_order_id: int
+) -> int:
+	"""
+	Send the take profit and the stop loss of a position together in one batch request
+	Binance answers every leg on its own, so a placed leg is never sent twice and only a failed request is retried
+	A request whose answer was lost (timeout, 5xx) may still have placed its legs, so before sending them again
+	each leg is looked up by its client order id
+	"""
+	unplaced_orders = get_bracket_orders(contract_symbol, position_side, position_quantity, take_profit_price, stop_loss_price, entry_order_id)
+	rejected_leg_names = []
+	is_answer_lost = False
+	for i in range(MAXIMUM_NUMBER_OF_API_CALL_TRIES):
+		try:
+			if is_answer_lost:
+				# Legs the lost request did place are only recorded
+				for leg_name in list(unplaced_orders):
+					placed_order = find_order_by_client_id(contract_symbol, unplaced_orders[leg_name]["newClientOrderId"])
+					if placed_order is not None:
+						record_bracket_order(contract_symbol, position_side, position_quantity, strategy_id, leg_name, unplaced_orders.pop(leg_name), placed_order)
+				if not unplaced_orders:
+					break
+			leg_names = list(unplaced_orders)
+			is_answer_lost = True
+			leg_results = binance_futures_api.new_batch_order(batchOrders=[unplaced_orders[leg_name] for leg_name in leg_names])
+			is_answer_lost = False
+		except Exception as e:
+			logging.error(f"ERROR in place_bracket_orders: {e}")
+			continue
+		for leg_name, leg_result in zip(leg_names, leg_results):
+			if "orderId" not in leg_result:
+				# Prices and quantities already follow the symbol's filters, so a rejection would only repeat
+				logging.error(f"ERROR in place_bracket_orders: {leg_name} of strategy #{strategy_id} was rejected: {leg_result.get('msg')}")
+				rejected_leg_names.append(leg_name)
+				del unplaced_orders[leg_name]
+				continue
+			record_bracket_order(contract_symbol, position_side, position_quantity, strategy_id, leg_name, unplaced_orders.pop(leg_name), leg_result)
+		if not unplaced_orders:
+			break
+	return ERROR if unplaced_orders or rejected_leg_names else SUCCESSFUL
+
+
+def record_bracket_order(
+	contract_symbol: str,
+	position_side: str,
+	position_quantity: float,
+	strategy_id: int,
+	leg_name: str,
+	order: dict,
+	leg_result: dict
+) -> None:
+	order_id_key = "strategy" + str(strategy_id) + "_last_" + leg_name + "_order_id"
+	send_new_order_message(contract_symbol, order["side"], position_quantity)
+	if position_side == "LONG":
+		send_open_long_position_message(order_id_key)
+	else:
+		send_open_short_position_message(order_id_key)
+	update_orders_dict(get_local_timestamp(), order_id_key, leg_result["orderId"])
+	open_orders_snapshot.add_order(contract_symbol, leg_result["orderId"])
+	account_book.add_order(contract_symbol, leg_result)
+	logging.info(f"{leg_name} order of strategy #{strategy_id} placed: {leg_result['orderId']}")
+
+
+def refresh_open_orders() -> None:
+	"""
+	One request for all open orders of the account, then every TP/SL check of the cycle is answered from it
+	"""
+	global open_orders_list
+	if user_data_stream.is_live():
+		open_orders_list = account_book.get_open_orders()
+	elif open_orders_snapshot.refresh():
+		open_orders_list = open_orders_snapshot.get_open_orders()
+
+
+@retry(MAXIMUM_NUMBER_OF_API_CALL_TRIES, lambda e: logging.error(f"ERROR in update_status_market_data: {e}") or ERROR)
+def update_status_market_data() -> int:
+	"""
+	The BTC price and the open positions for the status, asked with the priority of the window so trading never waits for them
+	"""
+	global btc_price
+	global btc_price_change_percent
+	global open_positions
+	status_binance_api = binance_futures_api.with_priority(PRIORITY_GUI)
+	btc_price = float(status_binance_api.ticker_price("BTCUSDT")["price"])
+	btc_price_change_percent = float(status_binance_api.ticker_24hr("BTCUSDT")["priceChangePercent"])
+	open_positions = [
+		{key: position[key] for key in ("symbol", "positionSide", "positionAmt", "entryPrice", "unRealizedProfit")}
+		for position in status_binance_api.get_position_risk(timestamp=get_local_timestamp())
+		if float(position["positionAmt"]) != 0
+	]
+	return SUCCESSFUL
 
 
 def check_and_cancel_extra_open_orders() -> None:
-	if is_it_time_to_cancel_extra_open_orders(current_time):
-		for i in range(STRATEGIES_COUNT):
-			cancel_extra_open_order(CONTRACT_SYMBOL, i)
+	"""
+	Housekeeping the deadline scheduler runs every EXTRA_OPEN_ORDERS_CHECK_INTERVAL_SECONDS, between trading rounds
+	Every running pair is checked against the open orders fetched once for all of them
+	"""
+	with trading_cycle_lock:
+		refresh_open_orders()
+		if not user_data_stream.is_live() and not open_orders_snapshot.is_fresh():
+			# Without them every pair and strategy would cost a query per order
+			logging.warning("WARNING in check_and_cancel_extra_open_orders: open orders are unknown, checking again next time")
+			return
+		for pair in running_trading_pairs:
+			for i in range(STRATEGIES_COUNT):
+				cancel_extra_open_order(pair, i)
+
+
+def get_strategy_timeframe(contract_symbol: str, settings: dict) -> str:
+	"""
+	Timeframe a strategy trades a pair on: its own "timeframe" setting, else the pair's, else TIMEFRAME
+	"""
+	return settings.get("timeframe") or pair_timeframes.get(contract_symbol) or TIMEFRAME
+
+
+def get_trading_timeframes(trading_pairs: list, strategy_settings: list) -> dict:
+	"""
+	Every timeframe some enabled strategy trades each pair on
+	"""
+	trading_timeframes = {}
+	for pair in trading_pairs:
+		trading_timeframes[pair] = sorted(
+			{get_strategy_timeframe(pair, settings) for settings in strategy_settings if settings["enabled"]},
+			key=lambda timeframe: TIMEFRAME_MINUTES[timeframe]
+		)
+	return trading_timeframes
 
 
-def run_trading_bot(trading_pairs: list, strategy_settings: list):
+def run_trading_bot(trading_pairs: list, strategy_settings: list, timeframes_of_pairs: dict = None):
 	"""
 	Main trading bot function that handles multiple pairs
+	Each strategy trades on its own "timeframe" (or the one of the pair in timeframes_of_pairs, or TIMEFRAME),
+	all timeframes of a pair are built from one candle feed and every (pair, timeframe) has its own indicator state
 	"""
-	# Initialize for each trading pair
+	global is_bot_started
+	global running_trading_pairs
+	global pair_timeframes
+	bootstrap()
+	is_bot_started = True
+	running_trading_pairs = list(trading_pairs)
+	pair_timeframes = dict(timeframes_of_pairs or {})
+	trading_timeframes = get_trading_timeframes(trading_pairs, strategy_settings)
+
+	# Initialize for each trading pair (indicators are loaded per pair when first needed)
 	pair_indicators = {}
 	pair_orders = {}
 	
 	for pair in trading_pairs:
 		try:
-			# Initialize indicators for this pair
-			pair_indicators[pair] = {
-				"candle_open_timestamp": 0,
-				"candle_close_timestamp": 0,
-				"candle_close_price": 0,
-				"close_prices": [],
-				"ema_settings": {},
-				"macd_settings": {},
-				"rsi_settings": {}
-			}
-			
 			# Initialize orders for this pair
 			pair_orders[pair] = {}
 			
@@ -922,65 +1000,239 @@ def run_trading_bot(trading_pairs: list, strategy_settings: list):
 			logging.error(f"Failed to initialize {pair}: {str(e)}")
 			continue
 	
-	# Main trading loop
+	# Fills, positions and balances arrive on the user data stream
+	if USE_USER_DATA_STREAM:
+		try:
+			user_data_stream.start()
+		except Exception as e:
+			# Everything is asked over REST while the stream is not live
+			logging.error(f"Failed to start the user data stream, asking Binance over REST instead: {str(e)}")
+
+	# Candles either arrive from the kline stream the moment they close,
+	# or the scheduler wakes up HANDLING_POSITIONS_TIME_SECOND after every close and they are downloaded
+	closed_candles_queue = queue.Queue()
+	if USE_KLINE_STREAM:
+		update_current_time()
+		for pair in trading_pairs:
+			update_candle_stores(pair, current_time, IMPORTANT_CANDLES_COUNT, trading_timeframes[pair])
+		# With RESAMPLE_FROM_M1 one m1 stream per pair feeds every timeframe
+		kline_stream = KlineStream(sorted({(pair, "m1" if RESAMPLE_FROM_M1 else timeframe)
+										   for pair in trading_pairs for timeframe in trading_timeframes[pair]}),
+								   on_candle_closed=lambda pair, timeframe: handle_closed_candle(pair, timeframe, trading_timeframes[pair], closed_candles_queue),
+								   on_gap=backfill_candle_store)
+		try:
+			kline_stream.start()
+		except Exception as e:
+			logging.error(f"Failed to start the kline stream, downloading the candles instead: {str(e)}")
+		# Longest quiet time of a working stream, after that the candles are downloaded instead
+		kline_stream_timeout = min(TIMEFRAME_MINUTES[timeframe] for _, timeframe in kline_stream.subscriptions) * 60 + KLINE_STREAM_TIMEOUT_SECONDS
+	else:
+		kline_stream_timeout = None
+		for pair in trading_pairs:
+			for timeframe in trading_timeframes[pair]:
+				deadline_scheduler.add_periodic_job(
+					("candle_closed", pair, timeframe),
+					TIMEFRAME_MINUTES[timeframe] * 60,
+					lambda deadline, missed_deadlines_count, pair=pair, timeframe=timeframe: closed_candles_queue.put((pair, timeframe)),
+					offset=HANDLING_POSITIONS_TIME_SECOND
+				)
+	deadline_scheduler.add_periodic_job(
+		"cancel_extra_open_orders",
+		EXTRA_OPEN_ORDERS_CHECK_INTERVAL_SECONDS,
+		lambda deadline, missed_deadlines_count: check_and_cancel_extra_open_orders(),
+		offset=HANDLING_POSITIONS_TIME_SECOND
+	)
+	deadline_scheduler.add_periodic_job(
+		"update_status_market_data",
+		STATUS_MARKET_DATA_INTERVAL_SECONDS,
+		lambda deadline, missed_deadlines_count: update_status_market_data()
+	)
+	deadline_scheduler.start()
+
+	# Main trading loop, asleep until a candle closes
 	while True:
 		try:
-			sleep(SLEEP_INTERVAL)
+			closed_pair_timeframes = get_closed_pair_timeframes(closed_candles_queue, kline_stream_timeout)
 			update_current_time()
-			
-			if not is_it_time_to_update_and_trade(current_time):
-				continue
-			
-			# Update account balance
-			update_account_balance_and_unrealized_profit(FIRST_COIN_SYMBOL)
-			
-			# Process each trading pair
-			for pair in trading_pairs:
-				try:
-					# Update indicators
-					update_indicators_dict(pair, current_time, TIMEFRAME)
-					update_recent_prices_list(pair, current_time, IMPORTANT_CANDLES_COUNT, TIMEFRAME)
-					update_contract_last_price(pair)
-					
-					# Check each strategy
-					for strategy_id, settings in enumerate(strategy_settings):
-						if not settings["enabled"]:
-							continue
-							
-						if not is_position_active(pair, strategy_id):
-							# Check for long position
-							if is_it_time_to_open_long_position(strategy_id, pair_indicators[pair], settings):
-								open_long_position(
-									pair,
-									total_account_balance / len(trading_pairs),  # Split balance among pairs
-									settings["tp_percent"],
-									settings["sl_percent"],
-									strategy_id
-								)
-							
-							# Check for short position if hedge mode is enabled
-							elif HEDGE_MODE and is_it_time_to_open_short_position(strategy_id, pair_indicators[pair], settings):
-								open_short_position(
-									pair,
-									total_account_balance / len(trading_pairs),  # Split balance among pairs
-									settings["tp_percent"],
-									settings["sl_percent"],
-									strategy_id
-								)
-					
-					# Save state
-					save_indicators_dict()
-					save_orders_dict()
-					
-				except Exception as e:
-					logging.error(f"Error processing {pair}: {str(e)}")
+			if not closed_pair_timeframes:
+				logging.warning(f"No closed candle from the kline stream for {kline_stream_timeout} seconds, downloading them")
+				kline_stream.reconnect()
+				closed_pair_timeframes = poll_closed_pair_timeframes(trading_timeframes)
+				if not closed_pair_timeframes:
 					continue
+			if not USE_KLINE_STREAM:
+				# A late round downloads every candle it missed, so nothing is skipped
+				for pair, timeframe in closed_pair_timeframes:
+					update_candle_store(pair, current_time, IMPORTANT_CANDLES_COUNT, timeframe)
+			
+			# A round is never cut in half by shutdown()
+			with trading_cycle_lock:
+				# Update account balance and open orders
+				update_account_balance_and_unrealized_profit(FIRST_COIN_SYMBOL)
+				refresh_open_orders()
+				
+				# Every (pair, timeframe) has its own indicator state, so they are all updated at the same time
+				for pair_timeframe, indicators in zip(closed_pair_timeframes, pair_update_executor.map(
+						lambda pair_timeframe: update_pair_indicators(*pair_timeframe, strategy_settings), closed_pair_timeframes)):
+					pair_indicators[pair_timeframe] = indicators
+				
+				# Process each trading pair
+				for pair, timeframe in closed_pair_timeframes:
+					process_trading_pair(pair, timeframe, trading_pairs, strategy_settings, pair_indicators)
 			
 		except Exception as e:
 			logging.error(f"Error in main loop: {str(e)}")
 			sleep(SLEEP_INTERVAL)
 
 
+def update_pair_indicators(pair: str, timeframe: str, strategy_settings: list) -> dict:
+	try:
+		return {
+			"contract_symbol": pair,
+			"timeframe": timeframe,
+			"indicators_dict": update_indicators_dict(pair, current_time, timeframe),
+			"streaming_indicators": update_streaming_indicators(pair, timeframe, strategy_settings)
+		}
+	except Exception as e:
+		logging.error(f"Error updating indicators of {pair} {timeframe}: {str(e)}")
+		return None
+
+
+def process_trading_pair(pair: str, timeframe: str, trading_pairs: list, strategy_settings: list, pair_indicators: dict) -> None:
+	if pair_indicators.get((pair, timeframe)) is None:
+		return
+	try:
+		update_contract_last_price(pair)
+		
+		# Check each strategy that trades this pair on this timeframe
+		for strategy_id, settings in enumerate(strategy_settings):
+			if not settings["enabled"] or get_strategy_timeframe(pair, settings) != timeframe:
+				continue
+				
+			if not is_position_active(pair, strategy_id):
+				# Check for long position
+				if is_it_time_to_open_long_position(strategy_id, pair_indicators[(pair, timeframe)], settings):
+					open_long_position(
+						pair,
+						total_account_balance / len(trading_pairs),  # Split balance among pairs
+						settings["tp_percent"],
+						settings["sl_percent"],
+						strategy_id
+					)
+				
+				# Check for short position if hedge mode is enabled
+				elif HEDGE_MODE and is_it_time_to_open_short_position(strategy_id, pair_indicators[(pair, timeframe)], settings):
+					open_short_position(
+						pair,
+						total_account_balance / len(trading_pairs),  # Split balance among pairs
+						settings["tp_percent"],
+						settings["sl_percent"],
+						strategy_id
+					)
+		
+		# Save state
+		save_orders_dict()
+		
+	except Exception as e:
+		logging.error(f"Error processing {pair} {timeframe}: {str(e)}")
+
+
+def get_closed_pair_timeframes(closed_candles_queue: queue.Queue, timeout: float = None) -> list:
+	"""
+	Wait for the next closed candle, then also take every (pair, timeframe) whose candle closed at the same moment
+	Returns an empty list when nothing closed within timeout seconds
+	"""
+	try:
+		closed_pair_timeframes = [closed_candles_queue.get(timeout=timeout)]
+	except queue.Empty:
+		return []
+	while not closed_candles_queue.empty():
+		pair_timeframe = closed_candles_queue.get_nowait()
+		if pair_timeframe not in closed_pair_timeframes:
+			closed_pair_timeframes.append(pair_timeframe)
+	return closed_pair_timeframes
+
+
+def poll_closed_pair_timeframes(trading_timeframes: dict) -> list:
+	"""
+	Download the candles the kline stream should have brought, and return every (pair, timeframe) that got a new one
+	"""
+	closed_pair_timeframes = []
+	for pair, timeframes in trading_timeframes.items():
+		for timeframe in timeframes:
+			candle_store = get_candle_store(pair, timeframe)
+			last_close_time = candle_store.last_close_time()
+			update_candle_store(pair, current_time, IMPORTANT_CANDLES_COUNT, timeframe)
+			if candle_store.last_close_time() > last_close_time:
+				closed_pair_timeframes.append((pair, timeframe))
+	return closed_pair_timeframes
+
+
+def handle_closed_candle(contract_symbol: str, timeframe: str, trading_timeframes: list, closed_candles_queue: queue.Queue) -> None:
+	"""
+	Queue (pair, trading timeframe) for every trading timeframe whose candle closed with this one,
+	building those candles from m1 when the feed is m1
+	"""
+	for trading_timeframe in trading_timeframes:
+		if timeframe != trading_timeframe:
+			if timeframe != "m1":
+				# Without resampling every timeframe has a feed of its own
+				continue
+			close_timestamp = get_candle_store(contract_symbol, timeframe).last_close_time()
+			if not is_timeframe_boundary(close_timestamp, trading_timeframe):
+				continue
+			if resample_into_candle_store(contract_symbol, trading_timeframe, timeframe) == 0:
+				continue
+		closed_candles_queue.put((contract_symbol, trading_timeframe))
+
+
+def backfill_candle_store(contract_symbol: str, timeframe: str, close_timestamp: int) -> None:
+	update_candle_store(contract_symbol, datetime.fromtimestamp(close_timestamp / 1000), IMPORTANT_CANDLES_COUNT, timeframe)
+
+
+def get_bot_status() -> dict:
+	"""
+	What the bot is doing right now, as plain JSON-friendly values
+	"""
+	return {
+		"is_bot_started": is_bot_started,
+		"trading_pairs": running_trading_pairs,
+		"timeframe": TIMEFRAME,
+		"pair_timeframes": pair_timeframes,
+		"current_time": str(current_time),
+		"account_available_balance": account_available_balance,
+		"total_account_balance": total_account_balance,
+		"unrealized_profit": unrealized_profit,
+		"btc_price": btc_price,
+		"btc_price_change_percent": btc_price_change_percent,
+		"positions": open_positions,
+		"open_orders_count": len(open_orders_list),
+		"pending_entries_count": len(pending_entries),
+		"is_user_data_stream_live": user_data_stream.is_live(),
+	}
+
+
+def shutdown() -> None:
+	"""
+	Wait for the current trading round and for new positions still waiting for their TP/SL, then stop listening
+	The trading loop stays blocked afterwards, the caller ends the process
+	"""
+	global is_bot_started
+	trading_cycle_lock.acquire()
+	order_fill_executor.shutdown(wait=True)
+	user_data_stream.stop()
+	save_orders_dict()
+	is_bot_started = False
+
+
+def main() -> None:
+	"""
+	Run the bot without the GUI, see headless.py for the options
+	"""
+	from headless import main as run_headless
+	run_headless(trading_bot=sys.modules[__name__])
+
+
 def log_results() -> None:
 	output = (
 		f"{'_' * 60}\n"
@@ -994,13 +1246,6 @@ def log_results() -> None:
 		f"unrealized_profit:{str(unrealized_profit)}{str(FIRST_COIN_SYMBOL)}\n"
 		f"last_account_available_balances_list:{str(last_account_available_balances_list)}\n"
 		f"last_total_account_balances_list:{str(last_total_account_balances_list)}\n"
-		f"is_price_increasing:{str(is_price_increasing)}\n"
-		f"is_price_decreasing:{str(is_price_decreasing)}\n"
-		f"is_macd_increasing:{str(is_macd_increasing)}\n"
-		f"is_macd_decreasing:{str(is_macd_decreasing)}\n"
-		f"is_macd_positive:{str(is_macd_positive)}\n"
-		f"is_macd_negative:{str(is_macd_negative)}\n"
-		f"indicators_dict:{str(indicators_dict)}\n"
 	)
 
 	logging.info(output)
@@ -0,0 +1,52 @@
+import logging
+import threading
+from time import monotonic
+from config import OPEN_ORDERS_SNAPSHOT_MAXIMUM_AGE_SECONDS
+
+
+class OpenOrdersSnapshot:
+	"""
+	All open orders of the account, fetched with one request per cycle
+	Every "is this take profit / stop loss still waiting" question is then answered from memory.
+	An order is open exactly when query_order would say NEW or PARTIALLY_FILLED
+	Orders placed or cancelled by the bot in between are written into the snapshot right away
+	"""
+
+	def __init__(self, fetch_open_orders, maximum_age: float = OPEN_ORDERS_SNAPSHOT_MAXIMUM_AGE_SECONDS) -> None:
+		self.fetch_open_orders = fetch_open_orders
+		self.maximum_age = maximum_age
+		self.lock = threading.Lock()
+		self.open_order_ids = set()
+		self.open_orders = []
+		self.refresh_time = None
+
+	def refresh(self) -> bool:
+		try:
+			open_orders = self.fetch_open_orders()
+		except Exception as e:
+			logging.error(f"ERROR in OpenOrdersSnapshot.refresh: {e}")
+			return False
+		with self.lock:
+			self.open_orders = open_orders
+			self.open_order_ids = {(order["symbol"], int(order["orderId"])) for order in open_orders}
+			self.refresh_time = monotonic()
+		return True
+
+	def is_fresh(self) -> bool:
+		return self.refresh_time is not None and monotonic() - self.refresh_time <= self.maximum_age
+
+	def is_order_open(self, contract_symbol: str, order_id: int) -> bool:
+		with self.lock:
+			return (contract_symbol, int(order_id)) in self.open_order_ids
+
+	def add_order(self, contract_symbol: str, order_id: int) -> None:
+		with self.lock:
+			self.open_order_ids.add((contract_symbol, int(order_id)))
+
+	def remove_order(self, contract_symbol: str, order_id: int) -> None:
+		with self.lock:
+			self.open_order_ids.discard((contract_symbol, int(order_id)))
+
+	def get_open_orders(self, contract_symbol: str = None) -> list:
+		with self.lock:
+			return [order for order in self.open_orders if contract_symbol is None or order["symbol"] == contract_symbol]
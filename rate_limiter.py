@@ -0,0 +1,206 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+from time import time
+from request_coalescer import RequestCoalescer
+from config import (RATE_LIMIT_WEIGHT_PER_MINUTE, RATE_LIMIT_ORDERS_PER_10_SECONDS, RATE_LIMIT_BACKOFF_SECONDS,
+					RATE_LIMIT_MAXIMUM_BACKOFF_SECONDS)
+
+# Lower number goes first
+PRIORITY_ORDERS = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET_DATA = 2
+PRIORITY_GUI = 3
+
+# How much of the weight budget each priority may use, the rest is kept free for the ones above it
+PRIORITY_WEIGHT_SHARES = {PRIORITY_ORDERS: 0.95, PRIORITY_ACCOUNT: 0.9, PRIORITY_MARKET_DATA: 0.8, PRIORITY_GUI: 0.6}
+
+ORDER_METHODS = {"new_order", "new_batch_order", "cancel_order", "cancel_batch_order", "cancel_open_orders"}
+METHOD_PRIORITIES = {
+	**{method_name: PRIORITY_ORDERS for method_name in ORDER_METHODS},
+	"change_leverage": PRIORITY_ACCOUNT,
+	"change_position_mode": PRIORITY_ACCOUNT,
+	"query_order": PRIORITY_ACCOUNT,
+	"get_orders": PRIORITY_ACCOUNT,
+	"balance": PRIORITY_ACCOUNT,
+	"get_position_risk": PRIORITY_ACCOUNT,
+	"new_listen_key": PRIORITY_ACCOUNT,
+	"renew_listen_key": PRIORITY_ACCOUNT,
+}
+METHOD_WEIGHTS = {
+	"new_order": 0,
+	"balance": 5,
+	"get_position_risk": 5,
+	"new_batch_order": 0,
+	"exchange_info": 1,
+}
+# How many orders a request counts as toward the order limits (the other order methods count as one)
+METHOD_ORDER_COUNTS = {
+	"new_batch_order": 5,
+}
+
+
+def get_request_weight(method_name: str, args: tuple, kwargs: dict) -> int:
+	"""
+	Request weight of an endpoint as Binance counts it
+	"""
+	symbol = kwargs.get("symbol", args[0] if args else None)
+	if method_name == "klines":
+		limit = kwargs.get("limit", 500)
+		return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+	if method_name == "get_orders" and symbol is None:
+		return 40
+	if method_name == "ticker_24hr" and symbol is None:
+		return 40
+	if method_name == "ticker_price" and symbol is None:
+		return 2
+	return METHOD_WEIGHTS.get(method_name, 1)
+
+
+def get_request_order_count(method_name: str) -> int:
+	if method_name not in ORDER_METHODS:
+		return 0
+	return METHOD_ORDER_COUNTS.get(method_name, 1)
+
+
+class RequestScheduler:
+	"""
+	Keeps every request inside the Binance limits: request weight per minute and orders per 10 seconds
+	The counts come from the x-mbx-used-weight-1m and x-mbx-order-count-10s response headers, plus the weight
+	of requests sent since. When the budget is short, requests wait in priority order (orders first, GUI last).
+	After a 429 (too many requests) or 418 (banned) everything waits for Retry-After, or for a growing, jittered pause
+	"""
+
+	def __init__(
+		self,
+		weight_per_minute: int = RATE_LIMIT_WEIGHT_PER_MINUTE,
+		orders_per_10_seconds: int = RATE_LIMIT_ORDERS_PER_10_SECONDS
+	) -> None:
+		self.weight_per_minute = weight_per_minute
+		self.orders_per_10_seconds = orders_per_10_seconds
+		self.condition = threading.Condition()
+		self.waiting_tickets = []
+		self.ticket_counter = itertools.count()
+		self.minute_window = 0
+		self.used_weight = 0
+		self.ten_seconds_window = 0
+		self.orders_count = 0
+		self.paused_until = 0
+		self.backoffs_count = 0
+
+	def roll_windows(self, now: float) -> None:
+		if int(now // 60) != self.minute_window:
+			self.minute_window = int(now // 60)
+			self.used_weight = 0
+		if int(now // 10) != self.ten_seconds_window:
+			self.ten_seconds_window = int(now // 10)
+			self.orders_count = 0
+
+	def get_wait_time(self, weight: int, order_count: int, priority: int, now: float) -> float:
+		if now < self.paused_until:
+			return self.paused_until - now
+		if self.used_weight + weight > self.weight_per_minute * PRIORITY_WEIGHT_SHARES[priority]:
+			return (self.minute_window + 1) * 60 - now
+		if order_count and self.orders_count + order_count > self.orders_per_10_seconds * PRIORITY_WEIGHT_SHARES[PRIORITY_ORDERS]:
+			return (self.ten_seconds_window + 1) * 10 - now
+		return 0
+
+	def acquire(self, weight: int, order_count: int, priority: int) -> None:
+		"""
+		Wait until the request fits in the budget and nothing more urgent is waiting, then count it
+		"""
+		with self.condition:
+			ticket = (priority, next(self.ticket_counter))
+			heapq.heappush(self.waiting_tickets, ticket)
+			self.condition.notify_all()
+			while True:
+				now = time()
+				self.roll_windows(now)
+				wait_time = self.get_wait_time(weight, order_count, priority, now)
+				if self.waiting_tickets[0] == ticket and wait_time <= 0:
+					break
+				self.condition.wait(wait_time if self.waiting_tickets[0] == ticket else None)
+			heapq.heappop(self.waiting_tickets)
+			self.used_weight += weight
+			self.orders_count += order_count
+			self.condition.notify_all()
+
+	def record_limit_usage(self, limit_usage: dict) -> None:
+		with self.condition:
+			self.roll_windows(time())
+			for header, value in limit_usage.items():
+				header = header.lower()
+				# Requests still in flight are not in the header yet, so the bigger count wins
+				if header == "x-mbx-used-weight-1m":
+					self.used_weight = max(self.used_weight, int(value))
+				elif header == "x-mbx-order-count-10s":
+					self.orders_count = max(self.orders_count, int(value))
+			self.backoffs_count = 0
+
+	def record_error(self, status_code: int, headers: dict) -> None:
+		if status_code not in (429, 418):
+			return
+		with self.condition:
+			retry_after = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+			if retry_after is not None:
+				pause = float(retry_after)
+			else:
+				pause = min(RATE_LIMIT_BACKOFF_SECONDS * 2 ** self.backoffs_count, RATE_LIMIT_MAXIMUM_BACKOFF_SECONDS)
+			pause *= random.uniform(1, 1.5)
+			self.backoffs_count += 1
+			self.paused_until = max(self.paused_until, time() + pause)
+			logging.warning(f"WARNING in RequestScheduler: Binance answered {status_code}, pausing requests for {pause:.1f}s")
+			self.condition.notify_all()
+
+
+class RateLimitedClient:
+	"""
+	Wraps the Binance client so every call goes through a RequestScheduler
+	The client must be made with show_limit_usage=True, the usage part is read here and only the data is returned
+	with_priority gives a view of the same client whose calls all use one priority (e.g. PRIORITY_GUI)
+	Identical reads of all views share one RequestCoalescer, so they are sent once and reused for a moment
+	"""
+
+	def __init__(self, client, scheduler: RequestScheduler = None, priority: int = None, coalescer: RequestCoalescer = None) -> None:
+		self.client = client
+		self.scheduler = scheduler or RequestScheduler()
+		self.priority = priority
+		self.coalescer = coalescer or RequestCoalescer()
+
+	def with_priority(self, priority: int) -> "RateLimitedClient":
+		return RateLimitedClient(self.client, self.scheduler, priority, self.coalescer)
+
+	def send_now(self, name: str, *args, **kwargs):
+		"""
+		Send a request right away, past the queue and the coalescer, still reading its usage and errors
+		For timing the request itself (e.g. sampling the server clock), where waiting in the queue would be measured too
+		"""
+		try:
+			response = getattr(self.client, name)(*args, **kwargs)
+		except Exception as e:
+			self.scheduler.record_error(getattr(e, "status_code", None), getattr(e, "header", None))
+			raise
+		if isinstance(response, dict) and "limit_usage" in response:
+			self.scheduler.record_limit_usage(response["limit_usage"] or {})
+			return response["data"]
+		return response
+
+	def __getattr__(self, name: str):
+		attribute = getattr(self.client, name)
+		if not callable(attribute):
+			return attribute
+
+		def send(*args, **kwargs):
+			priority = self.priority if self.priority is not None else METHOD_PRIORITIES.get(name, PRIORITY_MARKET_DATA)
+			self.scheduler.acquire(get_request_weight(name, args, kwargs), get_request_order_count(name), priority)
+			response = self.send_now(name, *args, **kwargs)
+			if name in ORDER_METHODS:
+				# Positions and balances are about to change, the next read must not reuse an older answer
+				self.coalescer.invalidate({"get_position_risk", "balance"})
+			return response
+
+		def call(*args, **kwargs):
+			return self.coalescer.call(name, send, args, kwargs)
+		return call
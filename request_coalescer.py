@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from config import COALESCED_READ_TTL_SECONDS
+
+# Reads that the bot and the GUI both make, usually within the same second
+COALESCED_METHODS = {"get_position_risk", "ticker_price", "ticker_24hr", "balance"}
+# Parameters that change on every call but not the answer
+IGNORED_PARAMETERS = {"timestamp", "recvWindow"}
+
+
+def get_request_key(method_name: str, args: tuple, kwargs: dict) -> tuple:
+	parameters = {name: value for name, value in kwargs.items() if name not in IGNORED_PARAMETERS}
+	if args:
+		# ticker_price("BTCUSDT") and ticker_price(symbol="BTCUSDT") are the same request
+		parameters["symbol"] = args[0]
+	return (method_name, tuple(sorted(parameters.items())))
+
+
+class RequestCoalescer:
+	"""
+	Single flight for identical reads: while one is on its way every identical call waits for that same answer,
+	and the answer is reused for ttl seconds, so the bot and the GUI see the same data and pay its weight once
+	"""
+
+	def __init__(self, ttl: float = COALESCED_READ_TTL_SECONDS) -> None:
+		self.ttl = ttl
+		self.lock = threading.Lock()
+		self.in_flight = {}
+		self.results = {}
+
+	def call(self, method_name: str, fetch, args: tuple, kwargs: dict):
+		if method_name not in COALESCED_METHODS:
+			return fetch(*args, **kwargs)
+		key = get_request_key(method_name, args, kwargs)
+		with self.lock:
+			result = self.results.get(key)
+			if result is not None and monotonic() - result[0] <= self.ttl:
+				return result[1]
+			future = self.in_flight.get(key)
+			is_leader = future is None
+			if is_leader:
+				future = self.in_flight[key] = Future()
+		if not is_leader:
+			return future.result()
+		try:
+			response = fetch(*args, **kwargs)
+		except Exception as e:
+			with self.lock:
+				del self.in_flight[key]
+			future.set_exception(e)
+			raise
+		with self.lock:
+			self.results[key] = (monotonic(), response)
+			del self.in_flight[key]
+		future.set_result(response)
+		return response
+
+	def invalidate(self, method_names=None) -> None:
+		"""
+		Forget cached answers (all of them, or those of some methods), e.g. after placing orders
+		"""
+		with self.lock:
+			for key in list(self.results):
+				if method_names is None or key[0] in method_names:
+					del self.results[key]
@@ -0,0 +1,53 @@
+import numpy as np
+from candle_store import get_candle_store
+from config import TIMEFRAME_MINUTES, ONE_MINUTE_IN_MILLISECONDS
+
+
+def get_timeframe_length(timeframe: str) -> int:
+	return TIMEFRAME_MINUTES[timeframe] * ONE_MINUTE_IN_MILLISECONDS
+
+
+def resample_candles(columns: dict, timeframe: str) -> dict:
+	"""
+	Aggregate lower timeframe candles (usually m1) into candles of a higher timeframe
+	Candles are grouped by the higher timeframe candle they fall in (aligned to UTC like Binance does),
+	and only groups that cover their whole time range without a missing candle are returned
+	"""
+	timeframe_length = get_timeframe_length(timeframe)
+	if len(columns["open_time"]) == 0:
+		return {column: values[:0] for column, values in columns.items()}
+	group_open_times = columns["open_time"] // timeframe_length * timeframe_length
+	group_starts = np.flatnonzero(np.r_[True, group_open_times[1:] != group_open_times[:-1]])
+	group_ends = np.r_[group_starts[1:], len(group_open_times)] - 1
+	source_length = columns["close_time"][0] - columns["open_time"][0] + 1
+	resampled_columns = {
+		"open_time": group_open_times[group_starts],
+		"open": columns["open"][group_starts],
+		"high": np.maximum.reduceat(columns["high"], group_starts),
+		"low": np.minimum.reduceat(columns["low"], group_starts),
+		"close": columns["close"][group_ends],
+		"volume": np.add.reduceat(columns["volume"], group_starts),
+		"close_time": group_open_times[group_starts] + timeframe_length - 1,
+	}
+	# The first group may start in the middle, the last one may still be open and any of them may miss a candle inside
+	is_complete = (columns["open_time"][group_starts] == resampled_columns["open_time"]) & \
+		(columns["close_time"][group_ends] == resampled_columns["close_time"]) & \
+		(np.diff(np.r_[group_starts, len(group_open_times)]) == timeframe_length // source_length)
+	return {column: values[is_complete] for column, values in resampled_columns.items()}
+
+
+def is_timeframe_boundary(close_time: int, timeframe: str) -> bool:
+	"""
+	Check if a lower timeframe candle closing at close_time also closes a candle of timeframe
+	"""
+	return (close_time + 1) % get_timeframe_length(timeframe) == 0
+
+
+def resample_into_candle_store(contract_symbol: str, timeframe: str, source_timeframe: str = "m1") -> int:
+	"""
+	Build the candles of timeframe that closed since its last stored candle from the source_timeframe store
+	Returns how many candles were added
+	"""
+	candle_store = get_candle_store(contract_symbol, timeframe)
+	source_candles = get_candle_store(contract_symbol, source_timeframe).since(candle_store.last_close_time())
+	return candle_store.append(resample_candles(source_candles, timeframe))
@@ -0,0 +1,116 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from time import perf_counter, time
+from config import (CLOCK_SYNC_INTERVAL_SECONDS, CLOCK_SAMPLES_COUNT, CLOCK_INITIAL_SAMPLES_COUNT,
+					CLOCK_MINIMUM_DRIFT_BASELINE_SECONDS, CLOCK_MAXIMUM_DRIFT_PPM)
+
+
+class ServerClock:
+	"""
+	Local model of the exchange clock, so the current server time costs no API call
+	The server time is sampled every CLOCK_SYNC_INTERVAL_SECONDS. Like NTP, every sample gives an offset
+	(server time minus the local midpoint of the request) and a round-trip time. Only the fastest half of
+	the samples is trusted, and a straight line through them gives the offset and the drift of the local clock
+	The drift is only fitted once those samples span minimum_drift_baseline seconds (over a few milliseconds the
+	millisecond server time makes the slope meaningless) and never beyond what a real clock does
+	"""
+
+	def __init__(
+		self,
+		fetch_server_timestamp,
+		sync_interval: float = CLOCK_SYNC_INTERVAL_SECONDS,
+		samples_count: int = CLOCK_SAMPLES_COUNT,
+		minimum_drift_baseline: float = CLOCK_MINIMUM_DRIFT_BASELINE_SECONDS,
+		maximum_drift_ppm: float = CLOCK_MAXIMUM_DRIFT_PPM
+	) -> None:
+		self.fetch_server_timestamp = fetch_server_timestamp
+		self.sync_interval = sync_interval
+		self.minimum_drift_baseline = minimum_drift_baseline
+		self.maximum_drift = maximum_drift_ppm / 1000000
+		self.samples = deque(maxlen=samples_count)
+		self.lock = threading.Lock()
+		self.start_lock = threading.Lock()
+		self.stop_event = threading.Event()
+		self.sync_thread = None
+		self.reference_time = 0.0
+		# Until the first sample arrives, trust the local wall clock
+		self.offset = time() * 1000 - self.get_local_milliseconds()
+		self.drift = 0.0
+		self.minimum_round_trip = float("inf")
+		self.last_sync_time = None
+
+	@staticmethod
+	def get_local_milliseconds() -> float:
+		return perf_counter() * 1000
+
+	def sample(self) -> None:
+		send_time = self.get_local_milliseconds()
+		server_timestamp = self.fetch_server_timestamp()
+		receive_time = self.get_local_milliseconds()
+		with self.lock:
+			self.samples.append((
+				(send_time + receive_time) / 2,
+				server_timestamp - (send_time + receive_time) / 2,
+				receive_time - send_time
+			))
+			self.estimate()
+			self.last_sync_time = receive_time
+
+	def estimate(self) -> None:
+		best_samples = sorted(self.samples, key=lambda sample: sample[2])[:max(len(self.samples) // 2, 1)]
+		self.minimum_round_trip = best_samples[0][2]
+		self.reference_time = sum(sample[0] for sample in best_samples) / len(best_samples)
+		self.offset = sum(sample[1] for sample in best_samples) / len(best_samples)
+		baseline = max(sample[0] for sample in best_samples) - min(sample[0] for sample in best_samples)
+		if baseline < self.minimum_drift_baseline * 1000:
+			self.drift = 0.0
+			return
+		time_variance = sum((sample[0] - self.reference_time) ** 2 for sample in best_samples)
+		drift = sum((sample[0] - self.reference_time) * (sample[1] - self.offset) for sample in best_samples) / time_variance
+		self.drift = min(max(drift, -self.maximum_drift), self.maximum_drift)
+
+	def sync(self) -> None:
+		try:
+			self.sample()
+		except Exception as e:
+			logging.error(f"ERROR in ServerClock.sync: {e}")
+
+	def start(self) -> None:
+		with self.start_lock:
+			if self.sync_thread is not None:
+				return
+			for i in range(CLOCK_INITIAL_SAMPLES_COUNT):
+				self.sync()
+			self.sync_thread = threading.Thread(target=self.run_sync_loop, name="server_clock", daemon=True)
+			self.sync_thread.start()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+
+	def run_sync_loop(self) -> None:
+		while not self.stop_event.wait(self.sync_interval):
+			self.sync()
+
+	def timestamp(self) -> int:
+		"""
+		Estimated server time in milliseconds
+		"""
+		if self.sync_thread is None:
+			self.start()
+		with self.lock:
+			local_time = self.get_local_milliseconds()
+			return int(local_time + self.offset + self.drift * (local_time - self.reference_time))
+
+	def now(self) -> datetime:
+		return datetime.fromtimestamp(self.timestamp() / 1000)
+
+	def error_bound(self) -> float:
+		"""
+		How far off (ms) the estimated server time can be: half of the fastest round trip,
+		plus what the drift may have added since the last sample
+		"""
+		if self.last_sync_time is None:
+			return float("inf")
+		return self.minimum_round_trip / 2 + abs(self.drift) * (self.get_local_milliseconds() - self.last_sync_time)
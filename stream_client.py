@@ -0,0 +1,74 @@
+import itertools
+import json
+import logging
+
+WEBSOCKET_STREAM_URL = "wss://fstream.binance.com"
+
+# Binance answers every SUBSCRIBE with {"result": null, "id": <id of the request>}
+subscription_ids = itertools.count(1)
+
+
+class ConnectorWebsocketClient:
+	"""
+	The streams' view of UMFuturesWebsocketClient from binance-futures-connector 3.1.1
+	The connector calls back with parsed payloads and quietly reconnects up to 10 times on its own;
+	here every payload reaches on_message(client, message) as JSON text (like ReplayWebsocketClient sends it),
+	on_reconnect(client) is called when the connector got the connection back (events in between were missed),
+	and on_close(client) when it gave up ("Max reconnect retries reached")
+	"""
+
+	def __init__(self, on_message, on_close=None, on_reconnect=None, stream_url: str = WEBSOCKET_STREAM_URL) -> None:
+		from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+		self.on_message = on_message
+		self.on_close = on_close
+		self.on_reconnect = on_reconnect
+		self.confirmed_subscription_ids = set()
+		self.is_stopped = False
+		# A thread running the twisted reactor, which every client of the process shares (a second one just returns)
+		self.client = UMFuturesWebsocketClient(stream_url=stream_url)
+		self.client.daemon = True
+		self.client.start()
+
+	def subscribe(self, stream, id: int = None) -> None:
+		"""
+		One stream name, or a list of them on one combined connection (events then come as {"stream": ..., "data": ...})
+		"""
+		self.client.live_subscribe(stream=stream, id=id or next(subscription_ids), callback=self.handle_payload)
+
+	def kline(self, symbol: str, interval: str, id: int = None) -> None:
+		self.subscribe(f"{symbol.lower()}@kline_{interval}", id)
+
+	def user_data(self, listen_key: str, id: int = None) -> None:
+		self.subscribe(listen_key, id)
+
+	def stop(self) -> None:
+		"""
+		Close the connections of this client only, the reactor keeps running for the others (it cannot be restarted)
+		"""
+		from twisted.internet import reactor
+		self.is_stopped = True
+		reactor.callFromThread(self.client.close)
+
+	def handle_payload(self, payload: dict) -> None:
+		if self.is_stopped:
+			return
+		try:
+			if "result" in payload and "id" in payload:
+				# The connector sends SUBSCRIBE again on every reconnect, so a second answer means the connection was lost
+				if payload["id"] in self.confirmed_subscription_ids:
+					if self.on_reconnect is not None:
+						self.on_reconnect(self)
+				self.confirmed_subscription_ids.add(payload["id"])
+				return
+			if payload.get("e") == "error":
+				logging.error(f"ERROR in ConnectorWebsocketClient: {payload.get('m')}")
+				if self.on_close is not None:
+					self.on_close(self)
+				return
+			self.on_message(self, json.dumps(payload))
+		except Exception as e:
+			logging.error(f"ERROR in ConnectorWebsocketClient.handle_payload: {e}")
+
+
+def create_websocket_client(on_message, on_close=None, on_reconnect=None) -> ConnectorWebsocketClient:
+	return ConnectorWebsocketClient(on_message, on_close=on_close, on_reconnect=on_reconnect)
@@ -0,0 +1,270 @@
+# Indicators that remember where they stopped, so every new candle costs the same tiny amount of work! ⏱️
+# Each one follows the math of the matching function in indicators.py, so both give the same numbers for the same history
+
+from collections import deque
+import numpy as np
+from vectorized_indicators import get_ema_series, get_sma_series, get_rsi_series, get_macd_series
+
+
+class StreamingIndicator:
+	name = ""
+
+	def __init__(self, *params) -> None:
+		self.params = tuple(params)
+		self.last_open_time = -1  # open time (ms) of the last candle fed in
+
+	def update(self, price: float) -> None:
+		raise NotImplementedError
+
+	def warm_up(self, prices: np.ndarray) -> None:
+		"""
+		Take the state a fresh indicator has after update() with every price, worked out from the vectorized series
+		"""
+		raise NotImplementedError
+
+	def update_with_candles(self, candles: dict) -> None:
+		"""
+		Feed the candles (columns like the candle store returns) that are newer than the last one fed in
+		A fresh indicator takes the whole stored history in one vectorized pass
+		"""
+		if self.last_open_time < 0 and len(candles["close"]) > 0:
+			self.warm_up(np.asarray(candles["close"], dtype=np.float64))
+			self.last_open_time = int(candles["open_time"][-1])
+			return
+		for open_time, close_price in zip(candles["open_time"].tolist(), candles["close"].tolist()):
+			if open_time <= self.last_open_time:
+				continue
+			self.update(close_price)
+			self.last_open_time = open_time
+
+	def get_values(self) -> dict:
+		"""
+		What the strategies read, copied so it stays the same when later candles arrive
+		"""
+		return {"value": self.value}
+
+	def get_state(self) -> list:
+		raise NotImplementedError
+
+	def set_state(self, state: list) -> None:
+		raise NotImplementedError
+
+	def to_dict(self) -> dict:
+		return {"name": self.name, "params": self.params, "last_open_time": self.last_open_time, "state": self.get_state()}
+
+
+class StreamingEma(StreamingIndicator):
+	"""
+	EMA started from the average of the first period prices, like get_ema
+	"""
+	name = "ema"
+
+	def __init__(self, period: int) -> None:
+		super().__init__(period)
+		self.period = period
+		self.multiplier = 2 / (period + 1)
+		self.count = 0
+		self.first_prices_sum = 0
+		self.value = 0
+
+	def update(self, price: float) -> float:
+		self.count += 1
+		if self.count <= self.period:
+			self.first_prices_sum += price
+			self.value = price if self.count < self.period else self.first_prices_sum / self.period
+		else:
+			self.value = (price - self.value) * self.multiplier + self.value
+		return self.value
+
+	def warm_up(self, prices: np.ndarray) -> None:
+		self.count = len(prices)
+		self.first_prices_sum = sum(prices[:self.period].tolist())
+		self.value = float(get_ema_series(prices, self.period)[-1])
+
+	def get_state(self) -> list:
+		return [self.count, self.first_prices_sum, self.value]
+
+	def set_state(self, state: list) -> None:
+		self.count, self.first_prices_sum, self.value = state
+
+
+class StreamingSma(StreamingIndicator):
+	"""
+	SMA from a running sum over a ring buffer of the last period prices, like get_sma
+	"""
+	name = "sma"
+
+	def __init__(self, period: int) -> None:
+		super().__init__(period)
+		self.period = period
+		self.prices = deque(maxlen=period)
+		self.prices_sum = 0
+		self.updates_count = 0
+		self.value = 0
+
+	def update(self, price: float) -> float:
+		if len(self.prices) == self.period:
+			self.prices_sum -= self.prices[0]
+		self.prices.append(price)
+		self.prices_sum += price
+		self.updates_count += 1
+		# Re-adding the buffer once per period keeps rounding errors of the running sum from piling up
+		if self.updates_count % self.period == 0:
+			self.prices_sum = sum(self.prices)
+		self.value = self.prices_sum / self.period if len(self.prices) == self.period else price
+		return self.value
+
+	def warm_up(self, prices: np.ndarray) -> None:
+		self.prices = deque(prices[-self.period:].tolist(), maxlen=self.period)
+		self.prices_sum = sum(self.prices)
+		self.updates_count = len(prices)
+		self.value = float(get_sma_series(prices, self.period)[-1])
+
+	def get_state(self) -> list:
+		return [list(self.prices), self.updates_count, self.value]
+
+	def set_state(self, state: list) -> None:
+		self.prices = deque(state[0], maxlen=self.period)
+		self.prices_sum = sum(self.prices)
+		self.updates_count, self.value = state[1], state[2]
+
+
+class StreamingRsi(StreamingIndicator):
+	"""
+	RSI from running sums of the last period gains and losses, like get_rsi
+	previous_value is the RSI one candle earlier, for crossing checks
+	"""
+	name = "rsi"
+
+	def __init__(self, period: int = 14) -> None:
+		super().__init__(period)
+		self.period = period
+		self.last_price = None
+		self.gains = deque(maxlen=period)
+		self.losses = deque(maxlen=period)
+		self.gains_sum = 0
+		self.losses_sum = 0
+		self.losses_count = 0  # how many changes in the window were losses, "no loss at all" must be exact
+		self.updates_count = 0
+		self.value = 50.0
+		self.previous_value = 50.0
+
+	def update(self, price: float) -> float:
+		if self.last_price is not None:
+			change = price - self.last_price
+			if len(self.gains) == self.period:
+				self.gains_sum -= self.gains[0]
+				self.losses_sum -= self.losses[0]
+				self.losses_count -= self.losses[0] > 0
+			self.gains.append(change if change > 0 else 0)
+			self.losses.append(-change if change < 0 else 0)
+			self.gains_sum += self.gains[-1]
+			self.losses_sum += self.losses[-1]
+			self.losses_count += self.losses[-1] > 0
+			self.updates_count += 1
+			if self.updates_count % self.period == 0:
+				self.gains_sum = sum(self.gains)
+				self.losses_sum = sum(self.losses)
+		self.last_price = price
+		self.previous_value = self.value
+		if len(self.gains) < self.period:
+			self.value = 50.0
+		elif self.losses_count == 0:
+			self.value = 100.0
+		else:
+			average_gain = max(self.gains_sum, 0) / self.period
+			average_loss = self.losses_sum / self.period
+			self.value = round(100 - (100 / (1 + average_gain / average_loss)), 2)
+		return self.value
+
+	def warm_up(self, prices: np.ndarray) -> None:
+		changes = np.diff(prices[-self.period - 1:]).tolist()
+		self.last_price = float(prices[-1])
+		self.gains = deque([change if change > 0 else 0 for change in changes], maxlen=self.period)
+		self.losses = deque([-change if change < 0 else 0 for change in changes], maxlen=self.period)
+		self.gains_sum = sum(self.gains)
+		self.losses_sum = sum(self.losses)
+		self.losses_count = sum(loss > 0 for loss in self.losses)
+		self.updates_count = len(prices) - 1
+		rsis = get_rsi_series(prices, self.period)
+		self.value = float(rsis[-1])
+		self.previous_value = float(rsis[-2]) if len(rsis) > 1 else 50.0
+
+	def get_values(self) -> dict:
+		return {"value": self.value, "previous_value": self.previous_value}
+
+	def get_state(self) -> list:
+		return [self.last_price, list(self.gains), list(self.losses), self.updates_count, self.value, self.previous_value]
+
+	def set_state(self, state: list) -> None:
+		self.last_price = state[0]
+		self.gains = deque(state[1], maxlen=self.period)
+		self.losses = deque(state[2], maxlen=self.period)
+		self.gains_sum = sum(self.gains)
+		self.losses_sum = sum(self.losses)
+		self.losses_count = sum(loss > 0 for loss in self.losses)
+		self.updates_count, self.value, self.previous_value = state[3], state[4], state[5]
+
+
+class StreamingMacd(StreamingIndicator):
+	"""
+	MACD line and signal line, like get_macd
+	The signal EMA starts once the slow EMA is ready
+	"""
+	name = "macd"
+
+	def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> None:
+		super().__init__(fast_period, slow_period, signal_period)
+		self.fast_ema = StreamingEma(fast_period)
+		self.slow_ema = StreamingEma(slow_period)
+		self.signal_ema = StreamingEma(signal_period)
+		self.macd_line = 0
+		self.signal_line = 0
+
+	def update(self, price: float) -> tuple:
+		self.macd_line = self.fast_ema.update(price) - self.slow_ema.update(price)
+		if self.slow_ema.count >= self.slow_ema.period:
+			self.signal_line = self.signal_ema.update(self.macd_line)
+		else:
+			self.signal_line = self.macd_line
+		return self.macd_line, self.signal_line
+
+	def warm_up(self, prices: np.ndarray) -> None:
+		self.fast_ema.warm_up(prices)
+		self.slow_ema.warm_up(prices)
+		macd_lines, signal_lines = get_macd_series(prices, *self.params)
+		if len(prices) >= self.slow_ema.period:
+			self.signal_ema.warm_up(macd_lines[self.slow_ema.period - 1:])
+		self.macd_line, self.signal_line = float(macd_lines[-1]), float(signal_lines[-1])
+
+	def get_values(self) -> dict:
+		return {"macd_line": self.macd_line, "signal_line": self.signal_line}
+
+	def get_state(self) -> list:
+		return [self.fast_ema.get_state(), self.slow_ema.get_state(), self.signal_ema.get_state(), self.macd_line, self.signal_line]
+
+	def set_state(self, state: list) -> None:
+		self.fast_ema.set_state(state[0])
+		self.slow_ema.set_state(state[1])
+		self.signal_ema.set_state(state[2])
+		self.macd_line, self.signal_line = state[3], state[4]
+
+
+STREAMING_INDICATOR_CLASSES = {
+	indicator_class.name: indicator_class for indicator_class in [StreamingEma, StreamingSma, StreamingRsi, StreamingMacd]
+}
+
+
+def get_indicator_key(name: str, params: tuple) -> str:
+	return "_".join([name] + [str(param) for param in params])
+
+
+def create_streaming_indicator(name: str, params: tuple) -> StreamingIndicator:
+	return STREAMING_INDICATOR_CLASSES[name](*params)
+
+
+def streaming_indicator_from_dict(indicator_dict: dict) -> StreamingIndicator:
+	indicator = create_streaming_indicator(indicator_dict["name"], indicator_dict["params"])
+	indicator.last_open_time = indicator_dict["last_open_time"]
+	indicator.set_state(indicator_dict["state"])
+	return indicator
@@ -1,10 +1,17 @@
-import telegram
 from credentials import TELEGRAM_API_KEY, TELEGRAM_USER_ID
 from config import SEND_TELEGRAM_MESSAGE
 import logging
 
 
-if SEND_TELEGRAM_MESSAGE:
+# Made by init_telegram_bot (or the first message), so importing this module needs no telegram package
+telegram_bot = None
+
+
+def init_telegram_bot():
+    global telegram_bot
+    if not SEND_TELEGRAM_MESSAGE or telegram_bot is not None:
+        return
+    import telegram
     telegram_bot = telegram.Bot(token=TELEGRAM_API_KEY)
 
 
@@ -32,7 +39,9 @@ def send_message(message):
     if not SEND_TELEGRAM_MESSAGE:
         return
 
+    import telegram
     try:
+        init_telegram_bot()
         telegram_bot.send_message(chat_id=TELEGRAM_USER_ID, text=message)
     except telegram.error.TelegramError:
         logging.error("ERROR in sending message to telegram")
@@ -0,0 +1,68 @@
+import threading
+from deadline_scheduler import DeadlineScheduler, get_next_deadline
+
+
+class FakeClock:
+	def __init__(self, now: float = 0) -> None:
+		self.now = now
+
+	def __call__(self) -> float:
+		return self.now
+
+
+def test_next_deadline_is_offset_past_the_next_multiple():
+	assert get_next_deadline(3600, 10, 7200) == 7210
+	assert get_next_deadline(3600, 10, 7209.5) == 7210
+	# A deadline that is exactly now has already come
+	assert get_next_deadline(3600, 10, 7210) == 10810
+	assert get_next_deadline(60, 0, 59.999) == 60
+
+
+def test_due_jobs_are_run_and_rescheduled():
+	clock = FakeClock(5)
+	scheduler = DeadlineScheduler(now=clock)
+	scheduler.add_periodic_job("h1", 60, None, offset=10)
+	clock.now = 10
+	assert [due_job[:3] for due_job in scheduler.wait_for_due_jobs()] == [("h1", 10, 0)]
+	clock.now = 70.5
+	assert [due_job[:3] for due_job in scheduler.wait_for_due_jobs()] == [("h1", 70, 0)]
+
+
+def test_missed_deadlines_are_caught_up_in_one_call():
+	clock = FakeClock(0)
+	scheduler = DeadlineScheduler(now=clock)
+	scheduler.add_periodic_job("m1", 60, None, offset=10)
+	# Asleep through the deadlines at 10, 70, 130 and 190
+	clock.now = 200
+	assert [due_job[:3] for due_job in scheduler.wait_for_due_jobs()] == [("m1", 190, 3)]
+	clock.now = 250
+	assert [due_job[:3] for due_job in scheduler.wait_for_due_jobs()] == [("m1", 250, 0)]
+
+
+def test_jobs_are_replaced_and_removed_by_key():
+	clock = FakeClock(0)
+	scheduler = DeadlineScheduler(now=clock)
+	old_callback, new_callback, other_callback = object(), object(), object()
+	scheduler.add_periodic_job("pair", 60, old_callback)
+	scheduler.add_periodic_job("pair", 60, new_callback)
+	scheduler.add_periodic_job("other", 60, other_callback)
+	clock.now = 60
+	assert sorted((key, callback is new_callback) for key, _, _, callback in scheduler.wait_for_due_jobs()) == \
+		[("other", False), ("pair", True)]
+	scheduler.remove_job("pair")
+	clock.now = 120
+	assert [(key, callback) for key, _, _, callback in scheduler.wait_for_due_jobs()] == [("other", other_callback)]
+
+
+def test_thread_calls_the_callback_with_the_missed_count():
+	clock = FakeClock(100)
+	scheduler = DeadlineScheduler(now=clock)
+	calls = []
+	called = threading.Event()
+	scheduler.add_periodic_job("m1", 60, lambda deadline, missed_deadlines_count: calls.append((deadline, missed_deadlines_count)) or called.set())
+	clock.now = 300
+	scheduler.start()
+	assert called.wait(2)
+	scheduler.stop()
+	scheduler.thread.join(2)
+	assert calls == [(300, 3)]
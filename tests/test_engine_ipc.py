@@ -0,0 +1,67 @@
+import logging
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from time import monotonic, sleep
+import pytest
+from engine_ipc import EngineStatusPublisher, EngineStatusSubscriber, read_engine_key
+from log_buffer import RingBufferLogHandler
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+	deadline = monotonic() + timeout
+	while not condition() and monotonic() < deadline:
+		sleep(0.01)
+
+
+@pytest.fixture
+def engine_stop_event():
+	return threading.Event()
+
+
+@pytest.fixture
+def publisher(tmp_path, engine_stop_event):
+	log_buffer_handler = RingBufferLogHandler()
+	log_buffer_handler.emit(logging.makeLogRecord({"msg": "engine started", "levelname": "INFO", "symbol": "BTCUSDT"}))
+	engine_status_publisher = EngineStatusPublisher(
+		lambda: {"is_bot_started": True, "trading_pairs": ["BTCUSDT"]},
+		log_buffer_handler,
+		on_stop=engine_stop_event.set,
+		address=("127.0.0.1", 0),
+		key_filename=str(tmp_path / "engine_ipc.key"),
+		interval=0.05
+	)
+	engine_status_publisher.start()
+	yield engine_status_publisher
+	engine_status_publisher.stop()
+
+
+def test_key_file_is_private_and_new_every_start(tmp_path, publisher):
+	key_filename = str(tmp_path / "engine_ipc.key")
+	first_key = read_engine_key(key_filename)
+	if os.name != "nt":
+		assert stat.S_IMODE(os.stat(key_filename).st_mode) == 0o600
+	second_publisher = EngineStatusPublisher(lambda: {}, RingBufferLogHandler(), address=("127.0.0.1", 0), key_filename=key_filename)
+	second_publisher.start()
+	second_publisher.stop()
+	assert read_engine_key(key_filename) != first_key
+
+
+def test_status_log_rows_and_stop_travel_as_json(tmp_path, publisher, engine_stop_event):
+	subscriber = EngineStatusSubscriber(publisher.listener.address, key_filename=str(tmp_path / "engine_ipc.key"), retry_interval=0.05)
+	subscriber.start()
+	wait_until(lambda: subscriber.get_latest_status() is not None)
+	assert subscriber.get_latest_status() == {"is_bot_started": True, "trading_pairs": ["BTCUSDT"]}
+	log_rows = subscriber.take_log_rows()
+	assert [log_row[1:] for log_row in log_rows] == [("INFO", "BTCUSDT", "engine started")]
+	assert subscriber.send_stop()
+	wait_until(engine_stop_event.is_set)
+	assert engine_stop_event.is_set()
+	subscriber.stop()
+
+
+def test_wrong_key_is_turned_away(publisher):
+	with pytest.raises(AuthenticationError):
+		Client(publisher.listener.address, authkey=b"binance_futures_bot")
@@ -0,0 +1,56 @@
+import json
+import threading
+from time import time
+import exchange_info
+from exchange_info import ExchangeInfoCache
+
+EXCHANGE_INFO = {"symbols": [{"symbol": "BTCUSDT", "filters": [
+	{"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+	{"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+	{"filterType": "MIN_NOTIONAL", "notional": "100"},
+]}]}
+
+
+def count_file_reads(monkeypatch) -> list:
+	file_reads = []
+	original_open = open
+
+	def counting_open(filename, *args, **kwargs):
+		file_reads.append(filename)
+		return original_open(filename, *args, **kwargs)
+	monkeypatch.setattr(exchange_info, "open", counting_open, raising=False)
+	return file_reads
+
+
+def test_saved_file_is_read_once(tmp_path, monkeypatch):
+	filename = str(tmp_path / "exchange_info.json")
+	with open(filename, "w") as handle:
+		json.dump({"saved_at": time(), "symbols": {"BTCUSDT": {"tick_size": "0.10", "step_size": "0.001"}}}, handle)
+	file_reads = count_file_reads(monkeypatch)
+	exchange_info_cache = ExchangeInfoCache(lambda: EXCHANGE_INFO, filename=filename)
+	for i in range(5):
+		assert exchange_info_cache.round_price("BTCUSDT", 37000.123) == 37000.1
+	assert file_reads == [filename]
+
+
+def test_failing_refresh_does_not_read_the_file_again(tmp_path, monkeypatch):
+	filename = str(tmp_path / "exchange_info.json")
+	with open(filename, "w") as handle:
+		json.dump({"saved_at": time() - 3600, "symbols": {}}, handle)
+	file_reads = count_file_reads(monkeypatch)
+	fetches = []
+
+	def fetch_exchange_info():
+		fetches.append(threading.get_ident())
+		raise ConnectionError("Binance is down")
+
+	exchange_info_cache = ExchangeInfoCache(fetch_exchange_info, filename=filename, ttl=60)
+	threads = [threading.Thread(target=exchange_info_cache.get_symbol_info, args=("BTCUSDT",)) for i in range(8)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(2)
+	# The fallbacks are used until the retry interval has passed
+	assert exchange_info_cache.round_price("BTCUSDT", 37000.123) == 37000.12
+	assert file_reads == [filename]
+	assert len(fetches) == 1
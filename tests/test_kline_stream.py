@@ -0,0 +1,127 @@
+import os
+import threading
+from time import monotonic, sleep
+import pytest
+import candle_store
+from candle_store import CandleStore
+from kline_stream import KlineStream
+from websocket_replay import ReplayWebsocketClient, load_recorded_messages
+
+RECORDING_FILENAME = os.path.join(os.path.dirname(__file__), "recordings", "kline_messages.jsonl")
+FIRST_OPEN_TIME = 1700000040000
+
+
+@pytest.fixture
+def btc_m1_store(tmp_path, monkeypatch):
+	store = CandleStore("BTCUSDT", "m1", directory=str(tmp_path))
+	monkeypatch.setattr(candle_store, "candle_stores", {("BTCUSDT", "m1"): store})
+	return store
+
+
+def wait_until(condition, timeout: float = 2) -> None:
+	deadline = monotonic() + timeout
+	while not condition() and monotonic() < deadline:
+		sleep(0.01)
+
+
+def get_closed_kline(open_time: int) -> dict:
+	return {"t": open_time, "T": open_time + 59999, "s": "BTCUSDT", "i": "1m",
+			"o": "37000", "h": "37010", "l": "36990", "c": "37000", "v": "10", "x": True}
+
+
+def create_replay_factory(websocket_clients: list):
+	def create_replay_client(**callbacks):
+		websocket_client = ReplayWebsocketClient(RECORDING_FILENAME, **callbacks)
+		websocket_clients.append(websocket_client)
+		return websocket_client
+	return create_replay_client
+
+
+def test_closed_candles_are_stored_and_gaps_filled(btc_m1_store):
+	closed_candles = []
+	gaps = []
+
+	def backfill(contract_symbol, timeframe, close_timestamp):
+		gaps.append((contract_symbol, timeframe, close_timestamp))
+		# What the REST backfill would download: the candle the stream never sent
+		missing_open_time = FIRST_OPEN_TIME + 2 * 60000
+		btc_m1_store.append_klines([[missing_open_time, "37000", "37010", "36990", "37004.5", "10", missing_open_time + 59999]])
+
+	websocket_clients = []
+	kline_stream = KlineStream([("BTCUSDT", "m1")], lambda *pair_timeframe: closed_candles.append(pair_timeframe),
+							   on_gap=backfill, websocket_client_factory=create_replay_factory(websocket_clients))
+	kline_stream.start()
+	websocket_clients[0].join()
+	wait_until(lambda: len(closed_candles) == 3)
+	kline_stream.stop()
+
+	# Updates of open candles and the unsubscribed ETHUSDT stream are left out
+	assert closed_candles == [("BTCUSDT", "m1")] * 3
+	assert gaps == [("BTCUSDT", "m1", FIRST_OPEN_TIME + 3 * 60000 + 59999)]
+	assert btc_m1_store.tail(10)["open_time"].tolist() == [FIRST_OPEN_TIME + i * 60000 for i in range(4)]
+	assert btc_m1_store.tail(10)["close"].tolist() == [37002.0, 37004.0, 37004.5, 37005.0]
+
+
+def test_backfill_runs_off_the_websocket_thread(btc_m1_store):
+	closed_candles = []
+	gaps = []
+	backfill_may_finish = threading.Event()
+
+	def slow_backfill(contract_symbol, timeframe, close_timestamp):
+		gaps.append(close_timestamp)
+		backfill_may_finish.wait(5)
+
+	websocket_clients = []
+	kline_stream = KlineStream([("BTCUSDT", "m1")], lambda *pair_timeframe: closed_candles.append(pair_timeframe),
+							   on_gap=slow_backfill, websocket_client_factory=create_replay_factory(websocket_clients))
+	kline_stream.start()
+	# Every message was handed over while the backfill is still downloading
+	websocket_clients[0].join(1)
+	assert not websocket_clients[0].replay_thread.is_alive()
+	wait_until(lambda: gaps)
+	assert closed_candles == [("BTCUSDT", "m1")] * 2
+	# More candles of the same pair, one with another gap, wait behind the backfill in flight instead of starting another
+	kline_stream.handle_closed_kline(get_closed_kline(FIRST_OPEN_TIME + 4 * 60000))
+	kline_stream.handle_closed_kline(get_closed_kline(FIRST_OPEN_TIME + 6 * 60000))
+	assert len(gaps) == 1
+	backfill_may_finish.set()
+	wait_until(lambda: len(closed_candles) == 5)
+	kline_stream.stop()
+
+	assert gaps == [FIRST_OPEN_TIME + 3 * 60000 + 59999, FIRST_OPEN_TIME + 6 * 60000 + 59999]
+	assert btc_m1_store.tail(10)["open_time"].tolist() == [FIRST_OPEN_TIME + i * 60000 for i in [0, 1, 3, 4, 6]]
+	assert closed_candles == [("BTCUSDT", "m1")] * 5
+
+
+def test_closed_connection_is_opened_again(btc_m1_store):
+	closed_candles = []
+	websocket_clients = []
+	kline_stream = KlineStream([("BTCUSDT", "m1")], lambda *pair_timeframe: closed_candles.append(pair_timeframe),
+							   websocket_client_factory=create_replay_factory(websocket_clients))
+	kline_stream.start()
+	websocket_clients[0].join()
+	# The connector gave up on the connection
+	websocket_clients[0].on_close(websocket_clients[0])
+	wait_until(lambda: len(websocket_clients) == 2)
+	websocket_clients[1].join()
+	kline_stream.stop()
+
+	assert len(websocket_clients) == 2
+	assert websocket_clients[1].streams == {"btcusdt@kline_1m"}
+	# The same candles again are not stored twice
+	assert len(btc_m1_store) == 3
+	assert closed_candles == [("BTCUSDT", "m1")] * 3
+
+
+def test_recording_is_replayed_as_recorded(tmp_path, btc_m1_store):
+	recording_filename = str(tmp_path / "recording.jsonl")
+	websocket_clients = []
+	kline_stream = KlineStream([("BTCUSDT", "m1")], lambda *pair_timeframe: None,
+							   websocket_client_factory=create_replay_factory(websocket_clients),
+							   recording_filename=recording_filename)
+	kline_stream.start()
+	websocket_clients[0].join()
+	kline_stream.stop()
+
+	assert load_recorded_messages(recording_filename) == [message for message in load_recorded_messages(RECORDING_FILENAME)
+														   if message["stream"] == "btcusdt@kline_1m"]
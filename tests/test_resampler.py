@@ -0,0 +1,31 @@
+import numpy as np
+from candle import convert_klines_to_candles
+from resampler import resample_candles
+
+FIRST_OPEN_TIME = 1700000100000  # a 15 minute boundary
+
+
+def get_m1_candles(minutes: list) -> np.ndarray:
+	return convert_klines_to_candles([[FIRST_OPEN_TIME + minute * 60000, "100", str(110 + minute), str(90 - minute), "101", "1",
+									   FIRST_OPEN_TIME + minute * 60000 + 59999] for minute in minutes])
+
+
+def test_complete_groups_are_aggregated():
+	resampled_candles = resample_candles(get_m1_candles(list(range(30))), "m15")
+	assert resampled_candles["open_time"].tolist() == [FIRST_OPEN_TIME, FIRST_OPEN_TIME + 15 * 60000]
+	assert resampled_candles["high"].tolist() == [124.0, 139.0]
+	assert resampled_candles["low"].tolist() == [76.0, 61.0]
+	assert resampled_candles["volume"].tolist() == [15.0, 15.0]
+	assert resampled_candles["close_time"].tolist() == [FIRST_OPEN_TIME + 15 * 60000 - 1, FIRST_OPEN_TIME + 30 * 60000 - 1]
+
+
+def test_group_missing_a_candle_inside_is_left_out():
+	# The first and the last minute of the first group are there, one in the middle is not
+	minutes = [minute for minute in range(30) if minute != 7]
+	resampled_candles = resample_candles(get_m1_candles(minutes), "m15")
+	assert resampled_candles["open_time"].tolist() == [FIRST_OPEN_TIME + 15 * 60000]
+
+
+def test_unfinished_groups_are_left_out():
+	resampled_candles = resample_candles(get_m1_candles(list(range(3, 20))), "m15")
+	assert len(resampled_candles["open_time"]) == 0
@@ -0,0 +1,62 @@
+from server_clock import ServerClock
+
+SERVER_OFFSET_MILLISECONDS = 1234567890000
+
+
+class FakeServer:
+	"""
+	Exchange clock running drift_ppm faster than the local one, with a fixed round trip
+	"""
+
+	def __init__(self, drift_ppm: float, round_trip: float = 20) -> None:
+		self.local_time = 0.0
+		self.drift = drift_ppm / 1000000
+		self.round_trip = round_trip
+
+	def get_local_milliseconds(self) -> float:
+		return self.local_time
+
+	def fetch_server_timestamp(self) -> int:
+		self.local_time += self.round_trip / 2
+		server_timestamp = int(SERVER_OFFSET_MILLISECONDS + self.local_time * (1 + self.drift))
+		self.local_time += self.round_trip / 2
+		return server_timestamp
+
+	def server_time(self) -> float:
+		return SERVER_OFFSET_MILLISECONDS + self.local_time * (1 + self.drift)
+
+
+def create_clock(fake_server: FakeServer, **kwargs) -> ServerClock:
+	server_clock = ServerClock(fake_server.fetch_server_timestamp, **kwargs)
+	server_clock.get_local_milliseconds = fake_server.get_local_milliseconds
+	return server_clock
+
+
+def test_back_to_back_samples_only_give_the_offset():
+	fake_server = FakeServer(drift_ppm=100, round_trip=3)
+	server_clock = create_clock(fake_server)
+	for i in range(4):
+		server_clock.sample()
+	assert server_clock.drift == 0.0
+	assert abs(server_clock.timestamp() - fake_server.server_time()) <= 2
+
+
+def test_drift_is_fitted_over_a_long_baseline():
+	fake_server = FakeServer(drift_ppm=100)
+	server_clock = create_clock(fake_server)
+	for i in range(16):
+		server_clock.sample()
+		fake_server.local_time += 60 * 1000
+	assert abs(server_clock.drift * 1000000 - 100) < 5
+	# An hour without asking is still right within a few milliseconds
+	fake_server.local_time += 60 * 60 * 1000
+	assert abs(server_clock.timestamp() - fake_server.server_time()) <= 5
+
+
+def test_drift_is_clamped():
+	fake_server = FakeServer(drift_ppm=5000)
+	server_clock = create_clock(fake_server, maximum_drift_ppm=500)
+	for i in range(16):
+		server_clock.sample()
+		fake_server.local_time += 60 * 1000
+	assert server_clock.drift == 500 / 1000000
@@ -0,0 +1,68 @@
+import numpy as np
+from indicators import get_ema, get_sma, get_rsi, get_macd
+from indicator_state_store import IndicatorStateStore
+from streaming_indicators import StreamingEma, StreamingSma, StreamingRsi, StreamingMacd, streaming_indicator_from_dict
+
+TOLERANCE = 1e-9
+
+
+def get_prices(count: int = 300) -> list:
+	random_generator = np.random.default_rng(11)
+	return np.round(100 + np.cumsum(random_generator.normal(0, 0.5, count)), 2).tolist()
+
+
+def test_streaming_ema_matches_get_ema():
+	prices = get_prices()
+	for period in [1, 10, 50]:
+		streaming_ema = StreamingEma(period)
+		for i, price in enumerate(prices):
+			assert abs(streaming_ema.update(price) - get_ema(prices[:i + 1], period)) <= TOLERANCE
+
+
+def test_streaming_sma_matches_get_sma():
+	prices = get_prices()
+	for period in [1, 5, 20]:
+		streaming_sma = StreamingSma(period)
+		for i, price in enumerate(prices):
+			assert abs(streaming_sma.update(price) - get_sma(prices[:i + 1], period)) <= TOLERANCE
+
+
+def test_streaming_rsi_matches_get_rsi():
+	prices = get_prices()
+	prices[150:170] = [prices[149]] * 20
+	for period in [6, 14]:
+		streaming_rsi = StreamingRsi(period)
+		for i, price in enumerate(prices):
+			assert abs(streaming_rsi.update(price) - get_rsi(prices[:i + 1], period)) <= TOLERANCE
+
+
+def test_streaming_macd_matches_get_macd():
+	prices = get_prices()
+	streaming_macd = StreamingMacd(12, 26, 9)
+	for i, price in enumerate(prices):
+		macd_line, signal_line = streaming_macd.update(price)
+		expected_macd_line, expected_signal_line = get_macd(prices[:i + 1], 12, 26, 9)
+		assert abs(macd_line - expected_macd_line) <= TOLERANCE
+		assert abs(signal_line - expected_signal_line) <= TOLERANCE
+
+
+def test_indicators_resume_from_saved_state(tmp_path):
+	prices = get_prices()
+	candles = {"open_time": np.arange(len(prices), dtype=np.int64) * 60000, "close": np.array(prices)}
+	for indicator_class, params in [(StreamingEma, (20,)), (StreamingSma, (20,)), (StreamingRsi, (14,)), (StreamingMacd, (12, 26, 9))]:
+		never_stopped_indicator = indicator_class(*params)
+		stopped_indicator = indicator_class(*params)
+		for i in range(120):
+			never_stopped_indicator.update_with_candles({column: values[i:i + 1] for column, values in candles.items()})
+			stopped_indicator.update_with_candles({column: values[i:i + 1] for column, values in candles.items()})
+		# The bot stops in the middle of the series and a new process loads the saved state
+		key = stopped_indicator.name
+		IndicatorStateStore(str(tmp_path), encode=lambda indicator: indicator.to_dict()).put("BTCUSDT", "1h", key, stopped_indicator)
+		resumed_indicator = IndicatorStateStore(str(tmp_path), decode=streaming_indicator_from_dict).get("BTCUSDT", "1h", key)
+		assert resumed_indicator is not stopped_indicator
+		assert resumed_indicator.to_dict() == streaming_indicator_from_dict(stopped_indicator.to_dict()).to_dict()
+		for i in range(120, len(prices)):
+			never_stopped_indicator.update_with_candles({column: values[i:i + 1] for column, values in candles.items()})
+			resumed_indicator.update_with_candles({column: values[i:i + 1] for column, values in candles.items()})
+			assert resumed_indicator.get_values() == never_stopped_indicator.get_values()
+		assert resumed_indicator.last_open_time == never_stopped_indicator.last_open_time
@@ -0,0 +1,99 @@
+import json
+import os
+from time import monotonic, sleep
+from user_data_stream import AccountBook, UserDataStream
+from websocket_replay import ReplayWebsocketClient
+
+RECORDING_FILENAME = os.path.join(os.path.dirname(__file__), "recordings", "user_data_messages.jsonl")
+SNAPSHOT_TIME = 1700000090000
+
+
+def wait_until(condition, timeout: float = 2) -> None:
+	deadline = monotonic() + timeout
+	while not condition() and monotonic() < deadline:
+		sleep(0.01)
+
+
+def take_snapshots():
+	# Taken before the recorded events: the market order is still open, no position yet
+	return (
+		[{"symbol": "BTCUSDT", "orderId": 1001, "clientOrderId": "bot_1001", "side": "BUY", "positionSide": "LONG",
+		  "type": "MARKET", "status": "NEW", "avgPrice": "0", "executedQty": "0", "stopPrice": "0", "updateTime": SNAPSHOT_TIME}],
+		[{"symbol": "BTCUSDT", "positionSide": "LONG", "positionAmt": "0", "entryPrice": "0", "markPrice": "36990.00",
+		  "unRealizedProfit": "0", "updateTime": SNAPSHOT_TIME}],
+		[{"asset": "USDT", "balance": "1000.00", "availableBalance": "1000.00", "crossUnPnl": "0", "updateTime": SNAPSHOT_TIME}],
+	)
+
+
+class SnapshotRaceReplayClient(ReplayWebsocketClient):
+	"""
+	Holds the recorded events back until the REST snapshot is being fetched, so they race with it
+	"""
+
+	def subscribe(self, stream, id=None) -> None:
+		self.subscription = (stream, id)
+
+	def replay_during_fetch(self) -> None:
+		super().subscribe(*self.subscription)
+		self.join()
+
+
+def create_user_data_stream(recording, websocket_clients: list, listen_keys: list) -> UserDataStream:
+	def create_replay_client(**callbacks):
+		websocket_client = SnapshotRaceReplayClient(recording, **callbacks)
+		websocket_clients.append(websocket_client)
+		return websocket_client
+
+	def create_listen_key():
+		listen_keys.append(f"listen_key_{len(listen_keys) + 1}")
+		return listen_keys[-1]
+
+	def fetch_snapshots():
+		snapshots = take_snapshots()
+		# The events arrive while the answer is on its way
+		websocket_clients[-1].replay_during_fetch()
+		return snapshots
+
+	return UserDataStream(AccountBook(), create_listen_key, lambda listen_key: None, fetch_snapshots,
+						  websocket_client_factory=create_replay_client)
+
+
+def test_events_are_applied_over_the_snapshot():
+	websocket_clients = []
+	user_data_stream = create_user_data_stream(RECORDING_FILENAME, websocket_clients, [])
+	user_data_stream.start()
+	account_book = user_data_stream.account_book
+
+	assert user_data_stream.is_live()
+	# The events are newer than the snapshot that came after them
+	filled_order = account_book.get_order("BTCUSDT", 1001)
+	assert filled_order["status"] == "FILLED"
+	assert filled_order["avgPrice"] == "37002.00"
+	assert [order["orderId"] for order in account_book.get_open_orders("BTCUSDT")] == [1002]
+	position = account_book.get_positions()[0]
+	assert position["positionAmt"] == "0.010"
+	assert "unRealizedProfit" not in position
+	balance = account_book.get_balance("USDT")
+	assert balance["balance"] == "990.50"
+	assert balance["availableBalance"] == "1000.00"
+
+	user_data_stream.stop()
+	assert not user_data_stream.is_live()
+
+
+def test_expired_listen_key_opens_a_new_stream(tmp_path):
+	recording_filename = str(tmp_path / "expired.jsonl")
+	with open(recording_filename, "w") as handle:
+		# Recorded as a combined stream, so only the first listen key hears the expiry
+		handle.write(json.dumps({"stream": "listen_key_1", "data": {"e": "listenKeyExpired", "E": SNAPSHOT_TIME + 1}}) + "\n")
+	websocket_clients = []
+	listen_keys = []
+	user_data_stream = create_user_data_stream(recording_filename, websocket_clients, listen_keys)
+	user_data_stream.start()
+	wait_until(lambda: len(websocket_clients) == 2 and user_data_stream.is_live())
+
+	assert listen_keys == ["listen_key_1", "listen_key_2"]
+	assert websocket_clients[1].streams == {"listen_key_2"}
+	assert user_data_stream.websocket_client is websocket_clients[1]
+	assert user_data_stream.is_live()
+	user_data_stream.stop()
@@ -0,0 +1,70 @@
+import numpy as np
+from indicators import get_ema, get_sma, get_rsi, get_macd
+from vectorized_indicators import get_ema_series, get_sma_series, get_rsi_series, get_macd_series
+from streaming_indicators import create_streaming_indicator
+
+TOLERANCE = 1e-9
+
+
+def get_prices(count: int = 400) -> np.ndarray:
+	"""
+	A fixed random walk rounded like real prices, with a flat stretch for the "no loss at all" RSI case
+	"""
+	random_generator = np.random.default_rng(7)
+	prices = np.round(100 + np.cumsum(random_generator.normal(0, 0.5, count)), 2)
+	prices[200:220] = prices[199]
+	return prices
+
+
+def test_sma_series_matches_get_sma():
+	prices = get_prices()
+	for period in [1, 5, 20]:
+		expected = [get_sma(prices[:i + 1].tolist(), period) for i in range(len(prices))]
+		np.testing.assert_allclose(get_sma_series(prices, period), expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_ema_series_matches_get_ema():
+	prices = get_prices()
+	for period in [1, 10, 50]:
+		expected = [get_ema(prices[:i + 1].tolist(), period) for i in range(len(prices))]
+		np.testing.assert_allclose(get_ema_series(prices, period), expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_rsi_series_matches_get_rsi():
+	prices = get_prices()
+	for period in [6, 14]:
+		expected = [get_rsi(prices[:i + 1].tolist(), period) for i in range(len(prices))]
+		np.testing.assert_allclose(get_rsi_series(prices, period), expected, rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_macd_series_matches_get_macd():
+	prices = get_prices()
+	macd_lines, signal_lines = get_macd_series(prices, 12, 26, 9)
+	expected = [get_macd(prices[:i + 1].tolist(), 12, 26, 9) for i in range(len(prices))]
+	np.testing.assert_allclose(macd_lines, [macd_line for macd_line, signal_line in expected], rtol=TOLERANCE, atol=TOLERANCE)
+	np.testing.assert_allclose(signal_lines, [signal_line for macd_line, signal_line in expected], rtol=TOLERANCE, atol=TOLERANCE)
+
+
+def test_short_histories_match_the_scalar_fallbacks():
+	prices = get_prices()[:5]
+	np.testing.assert_allclose(get_ema_series(prices, 10), prices)
+	np.testing.assert_allclose(get_sma_series(prices, 10), prices)
+	assert get_rsi_series(prices, 14).tolist() == [50.0] * 5
+
+
+def test_fresh_streaming_indicators_warm_up_from_the_series():
+	prices = get_prices()
+	candles = {"open_time": np.arange(len(prices), dtype=np.int64) * 60000, "close": prices}
+	for name, params in [("ema", (20,)), ("sma", (20,)), ("rsi", (14,)), ("macd", (12, 26, 9))]:
+		warmed_up_indicator = create_streaming_indicator(name, params)
+		warmed_up_indicator.update_with_candles({column: values[:300] for column, values in candles.items()})
+		stepped_indicator = create_streaming_indicator(name, params)
+		for price in prices[:300].tolist():
+			stepped_indicator.update(price)
+		# Both go on from the same state, one candle at a time
+		warmed_up_indicator.update_with_candles(candles)
+		for price in prices[300:].tolist():
+			stepped_indicator.update(price)
+		assert warmed_up_indicator.last_open_time == candles["open_time"][-1]
+		for key, value in stepped_indicator.get_values().items():
+			assert abs(warmed_up_indicator.get_values()[key] - value) <= TOLERANCE
@@ -0,0 +1,304 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from config import LISTEN_KEY_KEEPALIVE_INTERVAL_SECONDS, USER_DATA_RESYNC_INTERVAL_SECONDS, ACCOUNT_BOOK_MAXIMUM_CLOSED_ORDERS
+from stream_client import create_websocket_client
+from websocket_replay import record_message
+
+OPEN_ORDER_STATUSES = ["NEW", "PARTIALLY_FILLED"]
+# Position fields that follow the mark price, which the book does not keep
+MARK_PRICE_FIELDS = ["markPrice", "unRealizedProfit", "notional", "liquidationPrice"]
+
+
+class AccountBook:
+	"""
+	Local copy of the account: orders, positions and balances
+	It is filled from REST once (resync), then kept up to date by ORDER_TRADE_UPDATE and ACCOUNT_UPDATE events
+	Orders and positions keep the names the REST endpoints use, and every entry remembers the time of its last
+	change, so an older snapshot or a late event never overwrites something newer
+	Positions have no unrealized profit: it changes with every mark price but only comes with ACCOUNT_UPDATE,
+	so it would be hours old, ask positionRisk for it
+	"""
+
+	def __init__(self) -> None:
+		self.lock = threading.Lock()
+		self.order_updated = threading.Condition(self.lock)
+		self.orders = OrderedDict()
+		self.positions = {}
+		self.balances = {}
+		self.is_synced = False
+		# Counts every order change, so a resync can tell the orders that changed while its snapshot was fetched
+		self.changes_count = 0
+		self.order_changes_counts = {}
+
+	def set_order(self, order: dict) -> None:
+		key = (order["symbol"], int(order["orderId"]))
+		known_order = self.orders.get(key)
+		if known_order is not None and known_order["updateTime"] > order["updateTime"]:
+			return
+		self.orders[key] = order
+		self.orders.move_to_end(key)
+		self.changes_count += 1
+		self.order_changes_counts[key] = self.changes_count
+		self.order_updated.notify_all()
+		# Orders that are done only matter for a little while (e.g. to read the fill price)
+		closed_orders_count = sum(order["status"] not in OPEN_ORDER_STATUSES for order in self.orders.values())
+		for key in list(self.orders):
+			if closed_orders_count <= ACCOUNT_BOOK_MAXIMUM_CLOSED_ORDERS:
+				break
+			if self.orders[key]["status"] not in OPEN_ORDER_STATUSES:
+				del self.orders[key]
+				self.order_changes_counts.pop(key, None)
+				closed_orders_count -= 1
+
+	def set_position(self, position: dict) -> None:
+		key = (position["symbol"], position["positionSide"])
+		known_position = self.positions.get(key)
+		if known_position is not None and known_position["updateTime"] > position["updateTime"]:
+			return
+		self.positions[key] = position
+
+	def get_changes_count(self) -> int:
+		with self.lock:
+			return self.changes_count
+
+	def resync(self, open_orders: list, positions: list, balances: list, changes_count: int = None) -> None:
+		"""
+		Start over from REST snapshots of the open orders, the positions and the balances
+		changes_count is get_changes_count() from before the snapshots were fetched: orders changed since are newer than them
+		"""
+		with self.lock:
+			open_order_keys = {(order["symbol"], int(order["orderId"])) for order in open_orders}
+			for key, order in list(self.orders.items()):
+				# Anything the book still thinks is open but Binance does not list has finished while we were not listening
+				if order["status"] in OPEN_ORDER_STATUSES and key not in open_order_keys and (
+						changes_count is None or self.order_changes_counts.get(key, 0) <= changes_count):
+					del self.orders[key]
+					self.order_changes_counts.pop(key, None)
+			for order in open_orders:
+				self.set_order({**order, "updateTime": int(order.get("updateTime", 0))})
+			for position in positions:
+				position = {key: value for key, value in position.items() if key not in MARK_PRICE_FIELDS}
+				self.set_position({**position, "updateTime": int(position.get("updateTime", 0))})
+			for balance in balances:
+				known_balance = self.balances.get(balance["asset"], {})
+				if known_balance.get("updateTime", 0) > int(balance.get("updateTime", 0)):
+					# Keep the newer wallet balance from the events, take the rest from REST
+					self.balances[balance["asset"]] = {**balance, **known_balance}
+				else:
+					self.balances[balance["asset"]] = {**balance, "updateTime": int(balance.get("updateTime", 0))}
+			self.is_synced = True
+
+	def apply_order_trade_update(self, event: dict) -> None:
+		order = event["o"]
+		with self.lock:
+			self.set_order({
+				"symbol": order["s"],
+				"orderId": int(order["i"]),
+				"clientOrderId": order["c"],
+				"side": order["S"],
+				"positionSide": order["ps"],
+				"type": order["o"],
+				"status": order["X"],
+				"avgPrice": order["ap"],
+				"executedQty": order["z"],
+				"stopPrice": order["sp"],
+				"updateTime": int(order["T"]),
+			})
+
+	def apply_account_update(self, event: dict) -> None:
+		account = event["a"]
+		update_time = int(event["T"])
+		with self.lock:
+			for balance in account.get("B", []):
+				known_balance = self.balances.get(balance["a"], {"asset": balance["a"]})
+				if known_balance.get("updateTime", 0) > update_time:
+					continue
+				self.balances[balance["a"]] = {
+					**known_balance,
+					"balance": balance["wb"],
+					"crossWalletBalance": balance["cw"],
+					"updateTime": update_time
+				}
+			for position in account.get("P", []):
+				known_position = self.positions.get((position["s"], position["ps"]), {})
+				self.set_position({
+					**known_position,
+					"symbol": position["s"],
+					"positionSide": position["ps"],
+					"positionAmt": position["pa"],
+					"entryPrice": position["ep"],
+					"updateTime": update_time
+				})
+
+	def apply_event(self, event: dict) -> None:
+		if event.get("e") == "ORDER_TRADE_UPDATE":
+			self.apply_order_trade_update(event)
+		elif event.get("e") == "ACCOUNT_UPDATE":
+			self.apply_account_update(event)
+
+	def get_order(self, contract_symbol: str, order_id: int) -> dict:
+		with self.lock:
+			order = self.orders.get((contract_symbol, int(order_id)))
+			return dict(order) if order is not None else None
+
+	def is_order_open(self, contract_symbol: str, order_id: int) -> bool:
+		order = self.get_order(contract_symbol, order_id)
+		return order is not None and order["status"] in OPEN_ORDER_STATUSES
+
+	def wait_for_order(self, contract_symbol: str, order_id: int, timeout: float) -> dict:
+		"""
+		Block until the order is done (filled, cancelled, expired), or return None after timeout seconds
+		"""
+		key = (contract_symbol, int(order_id))
+		with self.order_updated:
+			if self.order_updated.wait_for(lambda: key in self.orders and self.orders[key]["status"] not in OPEN_ORDER_STATUSES, timeout):
+				return dict(self.orders[key])
+			return None
+
+	def add_order(self, contract_symbol: str, order: dict) -> None:
+		"""
+		Put an order the bot just placed into the book, unless its own events already got there first
+		"""
+		with self.lock:
+			if (contract_symbol, int(order["orderId"])) not in self.orders:
+				self.set_order({**order, "symbol": contract_symbol, "updateTime": int(order.get("updateTime", 0))})
+
+	def get_open_orders(self, contract_symbol: str = None) -> list:
+		with self.lock:
+			return [dict(order) for order in self.orders.values()
+					if order["status"] in OPEN_ORDER_STATUSES and (contract_symbol is None or order["symbol"] == contract_symbol)]
+
+	def get_positions(self) -> list:
+		with self.lock:
+			return [dict(position) for position in self.positions.values()]
+
+	def get_balance(self, asset: str) -> dict:
+		with self.lock:
+			balance = self.balances.get(asset)
+			return dict(balance) if balance is not None else None
+
+
+class UserDataStream:
+	"""
+	Listen-key user data stream feeding an AccountBook
+	The listen key is renewed every LISTEN_KEY_KEEPALIVE_INTERVAL_SECONDS. Whenever events may have been missed
+	(first start, expired listen key, lost connection) and every USER_DATA_RESYNC_INTERVAL_SECONDS,
+	the book is resynced from REST by fetch_snapshots(), which returns (open_orders, positions, balances)
+	"""
+
+	def __init__(
+		self,
+		account_book: AccountBook,
+		create_listen_key,
+		renew_listen_key,
+		fetch_snapshots,
+		websocket_client_factory=create_websocket_client,
+		recording_filename: str = None
+	) -> None:
+		self.account_book = account_book
+		self.create_listen_key = create_listen_key
+		self.renew_listen_key = renew_listen_key
+		self.fetch_snapshots = fetch_snapshots
+		self.websocket_client_factory = websocket_client_factory
+		self.recording_filename = recording_filename
+		self.websocket_client = None
+		self.listen_key = None
+		self.lock = threading.Lock()
+		self.stop_event = threading.Event()
+		self.keepalive_thread = None
+		self.connection_id = 0
+
+	def start(self) -> None:
+		# Started first, so a stream that fails to connect now is tried again at the next keepalive
+		self.keepalive_thread = threading.Thread(target=self.run_keepalive_loop, name="user_data_keepalive", daemon=True)
+		self.keepalive_thread.start()
+		self.connect()
+
+	def stop(self) -> None:
+		self.stop_event.set()
+		with self.lock:
+			self.connection_id += 1
+			websocket_client, self.websocket_client = self.websocket_client, None
+		if websocket_client is not None:
+			websocket_client.stop()
+
+	def connect(self) -> None:
+		"""
+		Open the stream with a fresh listen key, then resync, so nothing between the two is lost
+		"""
+		with self.lock:
+			if self.stop_event.is_set():
+				return
+			self.connection_id += 1
+			connection_id = self.connection_id
+			old_websocket_client = self.websocket_client
+			self.websocket_client = None
+			if old_websocket_client is not None:
+				old_websocket_client.stop()
+			self.account_book.is_synced = False
+			self.listen_key = self.create_listen_key()
+			self.websocket_client = self.websocket_client_factory(
+				on_message=self.handle_message,
+				on_close=lambda *_: self.handle_close(connection_id),
+				on_reconnect=lambda *_: self.handle_reconnect(connection_id)
+			)
+			self.websocket_client.user_data(listen_key=self.listen_key)
+		self.resync()
+
+	def resync(self) -> None:
+		try:
+			changes_count = self.account_book.get_changes_count()
+			self.account_book.resync(*self.fetch_snapshots(), changes_count)
+		except Exception as e:
+			logging.error(f"ERROR in UserDataStream.resync: {e}")
+
+	def reconnect(self) -> None:
+		try:
+			self.connect()
+		except Exception as e:
+			logging.error(f"ERROR in UserDataStream.reconnect: {e}")
+
+	def run_keepalive_loop(self) -> None:
+		seconds_since_resync = 0
+		while not self.stop_event.wait(LISTEN_KEY_KEEPALIVE_INTERVAL_SECONDS):
+			try:
+				self.renew_listen_key(self.listen_key)
+			except Exception as e:
+				logging.error(f"ERROR in UserDataStream.run_keepalive_loop: {e}")
+				self.reconnect()
+				seconds_since_resync = 0
+				continue
+			seconds_since_resync += LISTEN_KEY_KEEPALIVE_INTERVAL_SECONDS
+			if seconds_since_resync >= USER_DATA_RESYNC_INTERVAL_SECONDS:
+				self.resync()
+				seconds_since_resync = 0
+
+	def handle_message(self, _, message: str) -> None:
+		try:
+			if self.recording_filename:
+				record_message(self.recording_filename, message)
+			payload = json.loads(message)
+			event = payload.get("data", payload)
+			if event.get("e") == "listenKeyExpired":
+				threading.Thread(target=self.reconnect, daemon=True).start()
+				return
+			self.account_book.apply_event(event)
+		except Exception as e:
+			logging.error(f"ERROR in UserDataStream.handle_message: {e}")
+
+	def handle_close(self, connection_id: int) -> None:
+		# Connections replaced on purpose close too, only losing the current one means events were missed
+		if self.stop_event.is_set() or connection_id != self.connection_id:
+			return
+		threading.Thread(target=self.reconnect, daemon=True).start()
+
+	def handle_reconnect(self, connection_id: int) -> None:
+		# The connection came back by itself with the same listen key, only the events in between are missing
+		if self.stop_event.is_set() or connection_id != self.connection_id:
+			return
+		threading.Thread(target=self.resync, daemon=True).start()
+
+	def is_live(self) -> bool:
+		return self.account_book.is_synced and self.websocket_client is not None and not self.stop_event.is_set()
@@ -1,8 +1,12 @@
+import random
+from time import sleep
+
+
 def round_down(x: float, precision: int) -> int:
 	return round(x - 5 * (10 ** (-precision - 1)), precision)
 
 
-def retry(max_retries, on_fail):
+def retry(max_retries, on_fail, backoff=0.1, maximum_backoff=5.0):
 	def wrapper(fn):
 		def inner(*args, **kwargs):
 			so_far = 0
@@ -13,6 +17,9 @@ def retry(max_retries, on_fail):
 				except Exception as e:
 					exceptions[type(e)] = str(e)
 					so_far += 1
+					# Wait a little longer after every failure (with jitter, so many threads do not retry together)
+					if so_far <= max_retries:
+						sleep(min(backoff * 2 ** (so_far - 1), maximum_backoff) * random.uniform(0.5, 1.5))
 			return on_fail('\n'.join(exceptions.values()))
 		return inner
 	return wrapper
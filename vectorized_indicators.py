@@ -0,0 +1,92 @@
+# The same math tools as indicators.py, but for whole price histories at once! 📈
+# Every function takes a float64 array of close prices and returns the indicator after every price,
+# so series[i] is what the matching function in indicators.py returns for prices[:i + 1]
+
+import numpy as np
+
+EMA_FILTER_MAXIMUM_BLOCK_LENGTH = 4096
+EMA_FILTER_MAXIMUM_LOG_SCALE = np.log(1e200)  # Keeps 1 / decay ** block_length far away from overflowing
+
+
+def apply_ema_filter(values: np.ndarray, multiplier: float, initial_value: float) -> np.ndarray:
+	"""
+	Run the EMA recursion ema[i] = multiplier * values[i] + (1 - multiplier) * ema[i - 1] starting from initial_value
+	Inside a block the recursion has a closed form (a cumulative sum scaled by powers of the decay),
+	so only one Python step per block of up to EMA_FILTER_MAXIMUM_BLOCK_LENGTH values is needed
+	"""
+	if multiplier == 1:
+		return values.copy()
+	decay = 1 - multiplier
+	block_length = int(max(1, min(EMA_FILTER_MAXIMUM_BLOCK_LENGTH, EMA_FILTER_MAXIMUM_LOG_SCALE / -np.log(decay))))
+	decay_powers = decay ** np.arange(1, block_length + 1)
+	emas = np.empty(len(values))
+	ema = initial_value
+	for block_start in range(0, len(values), block_length):
+		block = values[block_start:block_start + block_length]
+		block_decay_powers = decay_powers[:len(block)]
+		block_emas = block_decay_powers * (ema + np.cumsum(multiplier * block / block_decay_powers))
+		emas[block_start:block_start + len(block)] = block_emas
+		ema = block_emas[-1]
+	return emas
+
+
+def get_sma_series(prices: np.ndarray, period: int) -> np.ndarray:
+	"""
+	SMA after every price from a rolling sum (the price itself until there are period prices)
+	"""
+	prices = np.asarray(prices, dtype=np.float64)
+	smas = prices.copy()
+	if len(prices) < period:
+		return smas
+	cumulative_sums = np.cumsum(np.r_[0.0, prices])
+	smas[period - 1:] = (cumulative_sums[period:] - cumulative_sums[:-period]) / period
+	return smas
+
+
+def get_ema_series(prices: np.ndarray, period: int) -> np.ndarray:
+	"""
+	EMA after every price, started from the SMA of the first period prices
+	"""
+	prices = np.asarray(prices, dtype=np.float64)
+	emas = prices.copy()
+	if len(prices) < period:
+		return emas
+	emas[period - 1] = np.sum(prices[:period]) / period
+	emas[period:] = apply_ema_filter(prices[period:], 2 / (period + 1), emas[period - 1])
+	return emas
+
+
+def get_rsi_series(prices: np.ndarray, period: int = 14) -> np.ndarray:
+	"""
+	RSI after every price from rolling sums of the last period gains and losses (50 until there are enough prices)
+	"""
+	prices = np.asarray(prices, dtype=np.float64)
+	rsis = np.full(len(prices), 50.0)
+	if len(prices) < period + 1:
+		return rsis
+	changes = np.diff(prices)
+	gains = np.where(changes > 0, changes, 0.0)
+	losses = np.where(changes < 0, -changes, 0.0)
+	gain_sums = np.cumsum(np.r_[0.0, gains])
+	loss_sums = np.cumsum(np.r_[0.0, losses])
+	loss_counts = np.cumsum(np.r_[0, losses > 0])
+	average_gains = np.maximum(gain_sums[period:] - gain_sums[:-period], 0) / period
+	average_losses = np.maximum(loss_sums[period:] - loss_sums[:-period], 0) / period
+	# Counting the losses keeps "no loss at all" exact, whatever rounding the rolling sums picked up
+	has_losses = (loss_counts[period:] - loss_counts[:-period]) > 0
+	with np.errstate(divide="ignore", invalid="ignore"):
+		window_rsis = 100 - 100 / (1 + average_gains / average_losses)
+	rsis[period:] = np.round(np.where(has_losses, window_rsis, 100.0), 2)
+	return rsis
+
+
+def get_macd_series(prices: np.ndarray, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> tuple:
+	"""
+	MACD line and signal line after every price
+	The signal line is the EMA of the MACD line from the moment the slow EMA is ready
+	"""
+	prices = np.asarray(prices, dtype=np.float64)
+	macd_lines = get_ema_series(prices, fast_period) - get_ema_series(prices, slow_period)
+	signal_lines = macd_lines.copy()
+	signal_lines[slow_period - 1:] = get_ema_series(macd_lines[slow_period - 1:], signal_period)
+	return macd_lines, signal_lines
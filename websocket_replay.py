@@ -0,0 +1,67 @@
+import json
+import threading
+from time import sleep
+
+
+def load_recorded_messages(filename: str) -> list:
+	"""
+	Read a recording made with record_message: one raw stream message (JSON) per line
+	"""
+	with open(filename, "r") as handle:
+		return [json.loads(line) for line in handle if line.strip()]
+
+
+def record_message(filename: str, message: str) -> None:
+	with open(filename, "a") as handle:
+		handle.write(message.strip() + "\n")
+
+
+class ReplayWebsocketClient:
+	"""
+	Offline stand-in for ConnectorWebsocketClient (stream_client.py)
+	Replays recorded combined-stream messages ({"stream": ..., "data": ...}) to on_message,
+	only for the streams that were subscribed, so the stream consumers can run without a network
+	Messages recorded from a single stream have no "stream" and are always replayed
+	"""
+
+	def __init__(self, recording, on_message=None, message_interval: float = 0.0, on_close=None, on_reconnect=None) -> None:
+		self.messages = load_recorded_messages(recording) if isinstance(recording, str) else list(recording)
+		self.on_message = on_message
+		self.on_close = on_close
+		self.on_reconnect = on_reconnect
+		self.message_interval = message_interval
+		self.streams = set()
+		self.stop_event = threading.Event()
+		self.replay_thread = None
+
+	def subscribe(self, stream, id=None) -> None:
+		self.streams.update([stream] if isinstance(stream, str) else stream)
+		if self.replay_thread is None:
+			self.replay_thread = threading.Thread(target=self.replay, daemon=True)
+			self.replay_thread.start()
+
+	def kline(self, symbol: str, interval: str, id=None, action=None, **kwargs) -> None:
+		self.subscribe(f"{symbol.lower()}@kline_{interval}", id)
+
+	def user_data(self, listen_key: str, id=None, action=None, **kwargs) -> None:
+		self.subscribe(listen_key, id)
+
+	def replay(self) -> None:
+		for message in self.messages:
+			if self.stop_event.is_set():
+				break
+			if "stream" not in message or message["stream"] in self.streams:
+				self.on_message(self, json.dumps(message))
+			if self.message_interval:
+				sleep(self.message_interval)
+
+	def join(self, timeout: float = None) -> None:
+		if self.replay_thread is not None:
+			self.replay_thread.join(timeout)
+
+	def stop(self, id=None) -> None:
+		self.stop_event.set()
+		if threading.current_thread() is not self.replay_thread:
+			self.join()
+		if self.on_close is not None:
+			self.on_close(self)